@@ -5,19 +5,44 @@ from __future__ import annotations
 import os
 from typing import Type
 
-from .base import LLMClient
+from .base import ClientWrapper, LLMClient
 from .ollama_client import OllamaClient
 from .openai_client import OpenAIClient
 from .gemini_client import GeminiClient
 from .deepseek_client import DeepSeekClient
+from .cache import CachedLLMClient, ResponseCache, cache_from_env
+from .router import RouterClient, RouterError
+from .limits import RateLimitedClient, limiters_from_env, limits_from_env
+from .cascade import CascadeClient, cascade, cascade_stats
+from .metrics import stream_metrics
+from .profiles import PROFILES, GenerationProfile, register_profile
+from .scheduler import PriorityScheduler, ScheduledClient, llm_priority, scheduler_from_env
+from ..resources import shared
 
 __all__ = [
     "LLMClient",
+    "ClientWrapper",
     "OllamaClient",
     "OpenAIClient",
     "GeminiClient",
     "DeepSeekClient",
+    "CachedLLMClient",
+    "ResponseCache",
+    "RouterClient",
+    "RouterError",
+    "RateLimitedClient",
+    "PriorityScheduler",
+    "ScheduledClient",
+    "llm_priority",
+    "stream_metrics",
+    "GenerationProfile",
+    "PROFILES",
+    "register_profile",
+    "CascadeClient",
+    "cascade",
+    "cascade_stats",
     "get_default_client",
+    "get_small_client",
 ]
 
 
@@ -29,8 +54,69 @@ _CLIENTS: dict[str, Type[LLMClient]] = {
 }
 
 
+def _provider(backend: str, model: str | None = None) -> LLMClient:
+    """Instantiate one provider behind its configured rate/concurrency limits.
+
+    Every client of a provider shares one set of limits, so a second model
+    on the same Ollama server counts against the same window.
+    """
+    backend = backend if backend in _CLIENTS else "ollama"
+    cls = _CLIENTS[backend]
+    client = cls(model=model) if model else cls()
+    limiters = shared(("llm-limits", backend), lambda: limiters_from_env(backend))
+    return limits_from_env(backend, client, limiters)
+
+
+def _build_router() -> RouterClient:
+    """Route across ``LLM_ROUTER_BACKENDS`` (comma separated, primary first)."""
+    names = os.environ.get("LLM_ROUTER_BACKENDS", "ollama").lower().split(",")
+    clients = {n.strip(): _provider(n.strip()) for n in names if n.strip() in _CLIENTS}
+    return RouterClient(
+        clients,
+        hedge=os.environ.get("LLM_ROUTER_HEDGE", "").lower() in {"1", "true", "yes"},
+        cooldown=float(os.environ.get("LLM_ROUTER_COOLDOWN", 30)),
+    )
+
+
+def _build_client(backend: str, model: str | None = None) -> LLMClient:
+    """Instantiate ``backend`` and apply the wrappers enabled via env vars.
+
+    The priority scheduler is shared by every client built here.
+    """
+    client: LLMClient
+    if backend == "router":
+        client = _build_router()
+    else:
+        client = _provider(backend, model)
+    scheduler = shared(("llm-scheduler",), scheduler_from_env)
+    if scheduler is not None:
+        client = ScheduledClient(client, scheduler)
+    cache = cache_from_env()
+    if cache is not None:
+        client = CachedLLMClient(client, cache)
+    return client
+
+
 def get_default_client() -> LLMClient:
-    """Instantiate the LLM client based on env vars."""
+    """Return the shared LLM client selected by env vars.
+
+    Clients are built once per backend/model and reused by every caller so
+    model wrappers and HTTP connection pools survive across graph nodes.
+    """
     backend = os.environ.get("LLM_BACKEND", "ollama").lower()
-    cls = _CLIENTS.get(backend, OllamaClient)
-    return cls()
+    model = os.environ.get(f"{backend.upper()}_MODEL")
+    return shared(("llm", backend, model), lambda: _build_client(backend))
+
+
+def get_small_client() -> LLMClient | None:
+    """Return the shared small local model for cascades.
+
+    Set ``LLM_CASCADE_MODEL`` (e.g. ``phi3:mini``) to enable; ``None``
+    otherwise so callers fall back to the default client. The client goes
+    through the same Ollama limits, scheduler and response cache as the
+    default one.
+    """
+    model = os.environ.get("LLM_CASCADE_MODEL")
+    if not model:
+        return None
+    return shared(("llm-small", model), lambda: _build_client("ollama", model))
@@ -2,8 +2,10 @@ from __future__ import annotations
 
 """Abstract interface for LLM backends."""
 
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Iterable, List
+from typing import AsyncIterator, Callable, Iterable, List
 
 from langchain_core.messages import BaseMessage, AIMessage
 
@@ -26,3 +28,104 @@ class LLMClient(ABC):
     @abstractmethod
     def count_tokens(self, messages: List[BaseMessage]) -> int:
         """Count tokens for the provided messages."""
+
+    # --- Async API ---------------------------------------------------------
+    # Providers override these with native async calls. The defaults run the
+    # blocking method in a worker thread so every client can be awaited.
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        """Return a single chat completion without blocking the event loop."""
+        return await asyncio.to_thread(self.chat, messages, **kwargs)
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        """Asynchronously yield chat completions as a stream."""
+        iterator = iter(self.stream_chat(messages, **kwargs))
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Return embeddings for a list of texts without blocking."""
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class ClientWrapper(LLMClient):
+    """Base for clients that decorate another :class:`LLMClient`.
+
+    Every method delegates to ``inner``; subclasses override only what they
+    change. Unknown attributes (``chat_model``, ``model``, ``backend``...)
+    are looked up on the wrapped client so wrappers can be stacked freely.
+    """
+
+    def __init__(self, inner: LLMClient) -> None:
+        self.inner = inner
+
+    def __getattr__(self, name: str):
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return self.inner.chat(messages, **kwargs)
+
+    def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
+        yield from self.inner.stream_chat(messages, **kwargs)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed(texts)
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        return self.inner.count_tokens(messages)
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return await self.inner.achat(messages, **kwargs)
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        async for chunk in self.inner.astream_chat(messages, **kwargs):
+            yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.inner.aembed(texts)
+
+    def close(self) -> None:
+        close = getattr(self.inner, "close", None)
+        if callable(close):
+            close()
+
+
+async def acquire_in_thread(acquire: Callable[[], None], release: Callable[[], None]) -> None:
+    """Await a blocking ``acquire`` from a worker thread, safely cancellable.
+
+    The thread cannot be interrupted, so if the awaiting task is cancelled
+    (hedge loser, ``wait_for`` timeout) the slot it still obtains afterwards
+    is handed straight back with ``release``. The hand-back happens in the
+    thread itself, so it does not depend on the event loop still running.
+    """
+    lock = threading.Lock()
+    cancelled = held = False
+
+    def run() -> None:
+        nonlocal held
+        acquire()
+        with lock:
+            if cancelled:
+                release()
+            else:
+                held = True
+
+    try:
+        await asyncio.to_thread(run)
+    except asyncio.CancelledError:
+        with lock:
+            cancelled = True
+            # The thread may have acquired just before the task was cancelled.
+            if held:
+                release()
+        raise
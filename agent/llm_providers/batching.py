@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+"""Coalesce concurrent embedding requests into batched model calls."""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_WINDOW_MS = 10
+
+_STOP = object()
+
+
+class EmbeddingBatcher(Embeddings):
+    """Micro-batch ``embed_documents`` calls from many threads or coroutines.
+
+    Requests are queued and a single worker thread gathers them until either
+    ``max_batch`` texts are pending or ``window`` seconds have passed since
+    the first one arrived. The worker sends one deduplicated request to the
+    wrapped model and resolves each caller's future with its own slice.
+    Query embeddings use a different prompt on some backends and are passed
+    straight through.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        *,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        window: float = DEFAULT_WINDOW_MS / 1000,
+    ) -> None:
+        self.inner = inner
+        self.model = getattr(inner, "model", None)
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._queue: "queue.Queue[Tuple[List[str], Future] | object]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue ``texts`` and return a future resolving to their vectors."""
+        fut: Future = Future()
+        if not texts:
+            fut.set_result([])
+            return fut
+        self._queue.put((list(texts), fut))
+        return fut
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        batch = [first]
+        pending = len(first[0])
+        deadline = time.monotonic() + self.window
+        while pending < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)  # type: ignore[arg-type]
+            pending += len(item[0])  # type: ignore[index]
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            # Callers cancelled while queued (e.g. an awaiting task) are
+            # dropped; the rest can no longer be cancelled once running.
+            batch = [
+                (texts, fut)
+                for texts, fut in self._collect(item)  # type: ignore[arg-type]
+                if fut.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            unique = list(dict.fromkeys(t for texts, _ in batch for t in texts))
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(unique)
+            try:
+                vectors = dict(zip(unique, self.inner.embed_documents(unique)))
+                results = [[vectors[t] for t in texts] for texts, _ in batch]
+            except Exception as exc:
+                results = [exc] * len(batch)
+            for (_, fut), result in zip(batch, results):
+                try:
+                    if isinstance(result, Exception):
+                        fut.set_exception(result)
+                    else:
+                        fut.set_result(result)
+                except Exception:  # never let one caller stop the worker
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._worker.join(timeout=1)
+
+
+def batched_embeddings(embeddings):
+    """Wrap ``embeddings`` in a batcher when ``EMBED_BATCH_WINDOW_MS`` is set."""
+    window = os.environ.get("EMBED_BATCH_WINDOW_MS")
+    if not window or embeddings is None:
+        return embeddings
+    return EmbeddingBatcher(
+        embeddings,
+        max_batch=int(os.environ.get("EMBED_BATCH_MAX", DEFAULT_MAX_BATCH)),
+        window=float(window) / 1000,
+    )
+
+
+__all__ = ["EmbeddingBatcher", "batched_embeddings"]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+"""SQLite-backed response cache in front of any :class:`LLMClient`."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+
+from .base import ClientWrapper, LLMClient
+
+DEFAULT_TTL = 24 * 3600  # 1 day
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Per-call kwargs that describe tracing/bookkeeping rather than the request.
+_IGNORED_KWARGS = {"metadata", "callbacks", "config", "tags", "run_name"}
+
+
+def _normalize_content(content) -> str:
+    if not isinstance(content, str):
+        return json.dumps(content, sort_keys=True, default=str)
+    return content.replace("\r\n", "\n").strip()
+
+
+def cache_key(backend: str, model: str | None, messages: List[BaseMessage], kwargs: dict) -> str:
+    """Return a stable hash for a chat request."""
+    payload = {
+        "backend": backend,
+        "model": model,
+        "messages": [[m.type, _normalize_content(m.content)] for m in messages],
+        "kwargs": {k: v for k, v in kwargs.items() if k not in _IGNORED_KWARGS},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=repr)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU store of chat responses with per-entry expiry."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                message TEXT,
+                expires_at REAL,
+                last_access REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> AIMessage | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message, expires_at FROM responses WHERE key=?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access=? WHERE key=?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, message: AIMessage, ttl: float | None = None) -> None:
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        blob = json.dumps(message_to_dict(message), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, message, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, blob, expires, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLMClient(ClientWrapper):
+    """Serve repeated ``chat`` requests from a :class:`ResponseCache`.
+
+    Pass ``cache=False`` to skip the cache for a single call and
+    ``cache_ttl=<seconds>`` to override the expiry of the stored response.
+    Streaming and embeddings are passed through untouched.
+    """
+
+    def __init__(self, inner: LLMClient, cache: ResponseCache) -> None:
+        super().__init__(inner)
+        self.cache = cache
+
+    def _key(self, messages: List[BaseMessage], kwargs: dict) -> str:
+        backend = getattr(self.inner, "backend", type(self.inner).__name__)
+        return cache_key(backend, getattr(self.inner, "model", None), messages, kwargs)
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        use_cache = kwargs.pop("cache", True)
+        ttl = kwargs.pop("cache_ttl", None)
+        if not use_cache:
+            return self.inner.chat(messages, **kwargs)
+        key = self._key(messages, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        ai = self.inner.chat(messages, **kwargs)
+        self.cache.put(key, ai, ttl)
+        return ai
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        use_cache = kwargs.pop("cache", True)
+        ttl = kwargs.pop("cache_ttl", None)
+        if not use_cache:
+            return await self.inner.achat(messages, **kwargs)
+        key = self._key(messages, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        ai = await self.inner.achat(messages, **kwargs)
+        self.cache.put(key, ai, ttl)
+        return ai
+
+    def close(self) -> None:
+        self.cache.close()
+        super().close()
+
+
+def cache_from_env() -> ResponseCache | None:
+    """Build a cache from ``LLM_CACHE_PATH``; caching is off when unset."""
+    path = os.environ.get("LLM_CACHE_PATH")
+    if not path:
+        return None
+    return ResponseCache(
+        path,
+        ttl=float(os.environ.get("LLM_CACHE_TTL", DEFAULT_TTL)),
+        max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+__all__ = ["ResponseCache", "CachedLLMClient", "cache_key", "cache_from_env"]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+"""Small-model-first cascade for cheap, checkable calls."""
+
+import threading
+from typing import Callable, Dict, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .base import ClientWrapper, LLMClient
+
+Acceptor = Callable[[AIMessage], bool]
+
+
+class CascadeStats:
+    """Thread-safe counters of how often each cascade escalates."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, outcome: str) -> None:
+        with self._lock:
+            d = self._data.setdefault(name, {"calls": 0, "accepted": 0, "rejected": 0, "error": 0})
+            d["calls"] += 1
+            d[outcome] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {}
+            for name, d in self._data.items():
+                escalated = d["rejected"] + d["error"]
+                out[name] = {**d, "escalated": escalated, "escalation_rate": escalated / d["calls"]}
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+stats = CascadeStats()
+
+
+class CascadeClient(ClientWrapper):
+    """Answer with ``small`` when ``accept`` approves, else ask ``inner``.
+
+    ``accept`` sees the small model's reply and returns ``False`` when it
+    cannot be parsed or is too close to a decision boundary to trust.
+    Errors from the small model also escalate. Streaming and embeddings
+    always use ``inner``. The reply's ``response_metadata["cascade"]`` says
+    which tier answered.
+    """
+
+    def __init__(
+        self, inner: LLMClient, small: LLMClient, accept: Acceptor, name: str = "default"
+    ) -> None:
+        super().__init__(inner)
+        self.small = small
+        self.accept = accept
+        self.name = name
+
+    def _accepted(self, draft: AIMessage) -> bool:
+        try:
+            return bool(self.accept(draft))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _tag(message: AIMessage, tier: str) -> AIMessage:
+        message.response_metadata["cascade"] = tier
+        return message
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        try:
+            draft = self.small.chat(messages, **kwargs)
+        except Exception:
+            stats.record(self.name, "error")
+        else:
+            if self._accepted(draft):
+                stats.record(self.name, "accepted")
+                return self._tag(draft, "small")
+            stats.record(self.name, "rejected")
+        return self._tag(self.inner.chat(messages, **kwargs), "large")
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        try:
+            draft = await self.small.achat(messages, **kwargs)
+        except Exception:
+            stats.record(self.name, "error")
+        else:
+            if self._accepted(draft):
+                stats.record(self.name, "accepted")
+                return self._tag(draft, "small")
+            stats.record(self.name, "rejected")
+        return self._tag(await self.inner.achat(messages, **kwargs), "large")
+
+
+def cascade(llm: LLMClient, small: LLMClient | None, accept: Acceptor, name: str) -> LLMClient:
+    """Wrap ``llm`` in a cascade when a small model is configured."""
+    if small is None:
+        return llm
+    return CascadeClient(llm, small, accept, name)
+
+
+def cascade_stats() -> Dict[str, dict]:
+    """Calls, acceptances and escalation rate per cascade name."""
+    return stats.snapshot()
+
+
+__all__ = ["CascadeClient", "CascadeStats", "cascade", "cascade_stats"]
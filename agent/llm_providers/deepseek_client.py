@@ -2,34 +2,144 @@ from __future__ import annotations
 
 """DeepSeek API client via raw HTTP requests."""
 
+import asyncio
+import json
 import os
-from typing import Iterable, List
+import weakref
+from typing import AsyncIterator, Iterable, Iterator, List
 
+import httpx
 import requests
-from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
 
 from .base import LLMClient
+from .metrics import atimed_stream, timed_stream
+from .profiles import GenerationProfile, openai_options, pop_profile
+from utils.token_counter import count_message_tokens
 
 
 class DeepSeekError(Exception):
     """Custom error raised when DeepSeek API calls fail."""
 
-    pass
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SSEParser:
+    """Incremental parser for ``text/event-stream`` bodies.
+
+    Feed it one line at a time; it returns the ``data`` payload of every
+    event completed by that line. Multi-line ``data:`` fields are joined
+    with newlines and comment lines (``:``) are ignored. The ``[DONE]``
+    sentinel sets :attr:`done` and is not returned.
+    """
+
+    def __init__(self) -> None:
+        self._data: List[str] = []
+        self.done = False
+
+    def feed(self, line: str | bytes) -> List[str]:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        if not line:
+            return self.flush()
+        if line.startswith(":"):
+            return []
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return []
+
+    def flush(self) -> List[str]:
+        if not self._data:
+            return []
+        payload = "\n".join(self._data)
+        self._data = []
+        if payload.strip() == "[DONE]":
+            self.done = True
+            return []
+        return [payload]
+
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def _to_messages(messages: List[BaseMessage]) -> List[dict]:
+    """Map LangChain messages onto chat-completion roles, content untouched.
+
+    Sending the system prompt as its own message keeps the request prefix
+    byte-identical across calls, which DeepSeek's context cache relies on.
+    """
+    return [{"role": _ROLES.get(m.type, "user"), "content": m.content} for m in messages]
+
+
+def _usage(usage: dict | None) -> dict | None:
+    """Convert DeepSeek ``usage`` into LangChain ``usage_metadata``."""
+    if not usage:
+        return None
+    return {
+        "input_tokens": usage.get("prompt_tokens", 0),
+        "output_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+        "input_token_details": {"cache_read": usage.get("prompt_cache_hit_tokens", 0)},
+    }
+
+
+def _response_metadata(body: dict) -> dict:
+    usage = body.get("usage") or {}
+    return {
+        "model_name": body.get("model"),
+        "cached_tokens": usage.get("prompt_cache_hit_tokens", 0),
+        "cache_miss_tokens": usage.get("prompt_cache_miss_tokens", 0),
+    }
+
+
+def _delta_chunks(payloads: Iterable[str]) -> Iterator[AIMessageChunk]:
+    """Turn OpenAI-style streaming payloads into content deltas."""
+    for payload in payloads:
+        try:
+            body = json.loads(payload)
+        except ValueError as exc:
+            raise DeepSeekError(f"Malformed DeepSeek stream event: {payload[:200]}") from exc
+        if "error" in body:
+            raise DeepSeekError(f"DeepSeek stream error: {body['error']}")
+        choice = (body.get("choices") or [{}])[0]
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            yield AIMessageChunk(content=content)
+        if body.get("usage"):
+            yield AIMessageChunk(
+                content="",
+                usage_metadata=_usage(body["usage"]),
+                response_metadata=_response_metadata(body),
+            )
+
+
+# Pending ``aclose()`` tasks; the event loop only keeps weak references.
+_closing: set = set()
 
 
 class DeepSeekClient(LLMClient):
     """Simple wrapper for DeepSeek LLM endpoints."""
 
     BASE_URL = "https://api.deepseek.com"
+    backend = "deepseek"
 
     def __init__(self) -> None:
         self.api_key = os.environ.get("DEEPSEEK_API_KEY")
         self.model = os.environ.get("DEEPSEEK_MODEL", "deepseek-chat")
+        # Keep-alive connection pool for the blocking API.
+        self._session = requests.Session()
+        # httpx async pools are bound to the loop that created them, so keep
+        # one pooled client per running event loop.
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
     def _post(self, endpoint: str, json: dict, **kwargs) -> requests.Response:
         """Send a POST request and convert any errors to ``DeepSeekError``."""
         try:
-            resp = requests.post(
+            resp = self._session.post(
                 f"{self.BASE_URL}{endpoint}",
                 headers=self._headers(),
                 json=json,
@@ -41,44 +151,93 @@ class DeepSeekClient(LLMClient):
         except requests.Timeout as exc:
             raise DeepSeekError("DeepSeek request timed out") from exc
         except requests.HTTPError as exc:
-            status = exc.response.status_code if exc.response else "N/A"
-            text = exc.response.text if getattr(exc, "response", None) else str(exc)
-            raise DeepSeekError(f"DeepSeek API error {status}: {text}") from exc
+            response = getattr(exc, "response", None)
+            status = response.status_code if response is not None else None
+            text = response.text if response is not None else str(exc)
+            raise DeepSeekError(
+                f"DeepSeek API error {status or 'N/A'}: {text}", status_code=status
+            ) from exc
         except requests.RequestException as exc:
             raise DeepSeekError(f"DeepSeek request failed: {exc}") from exc
 
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.BASE_URL, headers=self._headers(), timeout=30
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def _apost(self, endpoint: str, json: dict) -> httpx.Response:
+        """Async counterpart of :meth:`_post` using the pooled httpx client."""
+        try:
+            resp = await self._async_client().post(endpoint, json=json)
+            resp.raise_for_status()
+            return resp
+        except httpx.TimeoutException as exc:
+            raise DeepSeekError("DeepSeek request timed out") from exc
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            raise DeepSeekError(
+                f"DeepSeek API error {status}: {exc.response.text}", status_code=status
+            ) from exc
+        except httpx.HTTPError as exc:
+            raise DeepSeekError(f"DeepSeek request failed: {exc}") from exc
+
     def _headers(self) -> dict[str, str]:
         return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
-    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+    def _chat_payload(
+        self,
+        messages: List[BaseMessage],
+        stream: bool = False,
+        profile: GenerationProfile | None = None,
+    ) -> dict:
         data = {
             "model": self.model,
-            "messages": [
-                {"role": "user", "content": "\n".join(m.content for m in messages)}
-            ],
+            "messages": _to_messages(messages),
+            **openai_options(profile),
         }
-        resp = self._post("/chat/completions", json=data)
-        content = (
-            resp.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+        if stream:
+            data["stream"] = True
+            data["stream_options"] = {"include_usage": True}
+        return data
+
+    @staticmethod
+    def _chat_message(body: dict) -> AIMessage:
+        content = body.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return AIMessage(
+            content=content,
+            usage_metadata=_usage(body.get("usage")),
+            response_metadata=_response_metadata(body),
         )
-        return AIMessage(content=content)
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        data = self._chat_payload(messages, profile=pop_profile(kwargs))
+        resp = self._post("/chat/completions", json=data)
+        return self._chat_message(resp.json())
+
+    def _sse_payloads(self, resp: requests.Response) -> Iterator[str]:
+        parser = SSEParser()
+        # ``chunk_size=None`` hands lines over as soon as they arrive instead
+        # of waiting for a 512-byte buffer to fill.
+        for line in resp.iter_lines(chunk_size=None):
+            yield from parser.feed(line)
+            if parser.done:
+                return
+        yield from parser.flush()
 
     def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
-        data = {
-            "model": self.model,
-            "messages": [
-                {"role": "user", "content": "\n".join(m.content for m in messages)}
-            ],
-            "stream": True,
-        }
+        data = self._chat_payload(messages, stream=True, profile=pop_profile(kwargs))
         resp = self._post("/chat/completions", json=data, stream=True)
         with resp:
-            for line in resp.iter_lines():
-                if line:
-                    yield AIMessage(content=line.decode())
+            chunks = _delta_chunks(self._sse_payloads(resp))
+            yield from timed_stream(self.backend, chunks)
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         resp = self._post(
@@ -87,6 +246,69 @@ class DeepSeekClient(LLMClient):
         )
         return [e["embedding"] for e in resp.json().get("data", [])]
 
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        data = self._chat_payload(messages, profile=pop_profile(kwargs))
+        resp = await self._apost("/chat/completions", json=data)
+        return self._chat_message(resp.json())
+
+    async def _asse_chunks(self, data: dict) -> AsyncIterator[AIMessageChunk]:
+        try:
+            async with self._async_client().stream(
+                "POST", "/chat/completions", json=data
+            ) as resp:
+                resp.raise_for_status()
+                parser = SSEParser()
+                async for line in resp.aiter_lines():
+                    for chunk in _delta_chunks(parser.feed(line)):
+                        yield chunk
+                    if parser.done:
+                        return
+                for chunk in _delta_chunks(parser.flush()):
+                    yield chunk
+        except httpx.TimeoutException as exc:
+            raise DeepSeekError("DeepSeek request timed out") from exc
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            raise DeepSeekError(f"DeepSeek API error {status}", status_code=status) from exc
+        except httpx.HTTPError as exc:
+            raise DeepSeekError(f"DeepSeek request failed: {exc}") from exc
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        data = self._chat_payload(messages, stream=True, profile=pop_profile(kwargs))
+        async for chunk in atimed_stream(self.backend, self._asse_chunks(data)):
+            yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        resp = await self._apost("/embeddings", json={"model": self.model, "input": texts})
+        return [e["embedding"] for e in resp.json().get("data", [])]
+
+    def close(self) -> None:
+        """Drop pooled connections; called by the resource registry.
+
+        Async pools are closed right away when no event loop is running in
+        this thread; otherwise ``aclose()`` is scheduled on a running loop
+        (the pool's own when it is still running) and completes there.
+        """
+        self._session.close()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, client in list(self._async_clients.items()):
+            if loop is not running and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            elif running is not None:
+                task = running.create_task(client.aclose())
+                _closing.add(task)
+                task.add_done_callback(_closing.discard)
+            else:
+                try:
+                    asyncio.run(client.aclose())
+                except Exception:  # pragma: no cover - pool's loop already closed
+                    pass
+        self._async_clients.clear()
+
     def count_tokens(self, messages: List[BaseMessage]) -> int:
-        content = "\n".join(m.content for m in messages)
-        return len(content.split())
+        return count_message_tokens(messages, model=self.model)
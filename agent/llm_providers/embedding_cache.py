@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+"""Content-addressed embedding cache stored as float16 in memory-mapped files."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Keys per ``IN (...)`` query, well under SQLite's bound-variable limit.
+_CHUNK = 500
+
+
+def _as_stored(vec: Sequence[float]) -> List[float]:
+    """``vec`` rounded to float16 as the cache stores it."""
+    return np.asarray(vec, dtype=np.float16).astype(np.float32).tolist()
+
+
+def text_key(model: str, text: str) -> str:
+    """Return the cache key for ``text`` embedded by ``model``."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class EmbeddingCache:
+    """Persist vectors keyed by ``(model, sha256(text))``.
+
+    Vectors of each dimensionality live in their own ``vectors_<dim>.f16``
+    file and are read through ``np.memmap``; a SQLite index maps keys to row
+    numbers. Row allocation happens inside an immediate transaction so
+    ingestion and the agent can share one cache directory.
+    """
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._maps: Dict[int, np.memmap] = {}
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.db"), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, dim INTEGER, row INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (dim INTEGER PRIMARY KEY, rows INTEGER)"
+        )
+
+    def _path(self, dim: int) -> str:
+        return os.path.join(self.directory, f"vectors_{dim}.f16")
+
+    def _known(self, keys: List[str]) -> Dict[str, tuple[int, int]]:
+        """Map the stored ``keys`` to ``(dim, row)``, querying in chunks."""
+        found: Dict[str, tuple[int, int]] = {}
+        for start in range(0, len(keys), _CHUNK):
+            chunk = keys[start : start + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for key, dim, row in self._conn.execute(
+                f"SELECT key, dim, row FROM vectors WHERE key IN ({marks})", chunk
+            ):
+                found[key] = (dim, row)
+        return found
+
+    def _matrix(self, dim: int, min_rows: int) -> np.memmap:
+        mm = self._maps.get(dim)
+        if mm is None or mm.shape[0] < min_rows:
+            rows = os.path.getsize(self._path(dim)) // (dim * 2)
+            mm = np.memmap(self._path(dim), dtype=np.float16, mode="r", shape=(rows, dim))
+            self._maps[dim] = mm
+        return mm
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors for ``texts`` (``None`` for misses)."""
+        keys = [text_key(model, t) for t in texts]
+        with self._lock:
+            found = self._known(list(dict.fromkeys(keys)))
+            out: List[Optional[List[float]]] = []
+            for key in keys:
+                loc = found.get(key)
+                if loc is None:
+                    out.append(None)
+                    continue
+                dim, row = loc
+                vec = self._matrix(dim, row + 1)[row]
+                out.append(vec.astype(np.float32).tolist())
+            hits = sum(v is not None for v in out)
+            self.hits += hits
+            self.misses += len(out) - hits
+        return out
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """Store ``vectors`` for ``texts``; existing keys are left untouched."""
+        by_key: Dict[str, Sequence[float]] = {}
+        for text, vec in zip(texts, vectors):
+            by_key.setdefault(text_key(model, text), vec)
+        if not by_key:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                known = self._known(list(by_key))
+                groups: Dict[int, List[tuple[str, Sequence[float]]]] = {}
+                for key, vec in by_key.items():
+                    if key not in known:
+                        groups.setdefault(len(vec), []).append((key, vec))
+                for dim, items in groups.items():
+                    row = self._conn.execute(
+                        "SELECT rows FROM files WHERE dim=?", (dim,)
+                    ).fetchone()
+                    start = row[0] if row else 0
+                    data = np.asarray([v for _, v in items], dtype=np.float16)
+                    mode = "r+b" if os.path.exists(self._path(dim)) else "wb"
+                    with open(self._path(dim), mode) as fh:
+                        fh.seek(start * dim * 2)
+                        fh.write(data.tobytes())
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO files (dim, rows) VALUES (?, ?)",
+                        (dim, start + len(items)),
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO vectors (key, dim, row) VALUES (?, ?, ?)",
+                        [(key, dim, start + i) for i, (key, _) in enumerate(items)],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def embed_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        """Return vectors for ``texts``, calling ``embed_fn`` only for misses.
+
+        Fresh vectors are returned rounded to float16 like cached ones, so a
+        text gets the same vector whether or not it was a hit.
+        """
+        cached = self.get_many(model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        if missing:
+            fresh = dict(zip(missing, embed_fn(missing)))
+            self.put_many(model, missing, [fresh[t] for t in missing])
+            stored = {t: _as_stored(fresh[t]) for t in missing}
+            cached = [v if v is not None else list(stored[t]) for t, v in zip(texts, cached)]
+        return cached  # type: ignore[return-value]
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._maps.clear()
+            self._conn.close()
+
+
+def _model_name(embeddings) -> str:
+    name = getattr(embeddings, "model", None) or type(embeddings).__name__
+    return str(name)
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain ``Embeddings`` that consults an :class:`EmbeddingCache` first."""
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model: str | None = None) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.model = model or _model_name(inner)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed_many(self.model, texts, self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cache.embed_many(
+            self.model, [text], lambda ts: [self.inner.embed_query(ts[0])]
+        )[0]
+
+    def close(self) -> None:
+        close = getattr(self.inner, "close", None)
+        if callable(close):
+            close()
+
+
+def embedding_cache_from_env() -> EmbeddingCache | None:
+    """Return the shared cache under ``EMBED_CACHE_DIR``; ``None`` when unset."""
+    directory = os.environ.get("EMBED_CACHE_DIR")
+    if not directory:
+        return None
+    from ..resources import shared
+
+    return shared(("embedding-cache", directory), lambda: EmbeddingCache(directory))
+
+
+def cached_embeddings(embeddings):
+    """Wrap ``embeddings`` with the env-configured cache when enabled."""
+    cache = embedding_cache_from_env()
+    if cache is None or embeddings is None:
+        return embeddings
+    return CachedEmbeddings(embeddings, cache)
+
+
+__all__ = [
+    "EmbeddingCache",
+    "CachedEmbeddings",
+    "embedding_cache_from_env",
+    "cached_embeddings",
+    "text_key",
+]
@@ -3,11 +3,14 @@ from __future__ import annotations
 """Google Gemini client using google-generativeai SDK."""
 
 import os
-from typing import Iterable, List
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
 
 from langchain_core.messages import AIMessage, BaseMessage
 
 from .base import LLMClient
+from .metrics import atimed_stream, timed_stream
+from .profiles import gemini_config, pop_profile
+from utils.token_counter import count_message_tokens
 
 try:
     import google.generativeai as genai
@@ -15,30 +18,108 @@ except Exception:  # pragma: no cover - optional dependency
     genai = None
 
 
+def _to_message(resp) -> AIMessage:
+    """Convert a Gemini response (or stream chunk) to an ``AIMessage``."""
+    usage = getattr(resp, "usage_metadata", None)
+    if usage is None:
+        return AIMessage(content=resp.text)
+    prompt = getattr(usage, "prompt_token_count", 0) or 0
+    output = getattr(usage, "candidates_token_count", 0) or 0
+    cached = getattr(usage, "cached_content_token_count", 0) or 0
+    return AIMessage(
+        content=resp.text,
+        usage_metadata={
+            "input_tokens": prompt,
+            "output_tokens": output,
+            "total_tokens": prompt + output,
+            "input_token_details": {"cache_read": cached},
+        },
+        response_metadata={"cached_tokens": cached},
+    )
+
+
+def _to_contents(messages: List[BaseMessage]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Split messages into a system instruction and Gemini ``contents``.
+
+    System messages become the model's ``system_instruction`` so the
+    guidelines form a stable prefix; consecutive turns from the same role
+    are merged because Gemini expects user/model turns to alternate.
+    """
+    system = [m.content for m in messages if m.type == "system"]
+    contents: List[Dict[str, Any]] = []
+    for m in messages:
+        if m.type == "system":
+            continue
+        role = "model" if m.type == "ai" else "user"
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].append(m.content)
+        else:
+            contents.append({"role": role, "parts": [m.content]})
+    return "\n\n".join(system), contents
+
+
 class GeminiClient(LLMClient):
     """Thin wrapper around the Gemini API."""
 
+    backend = "gemini"
+    MAX_SYSTEM_MODELS = 8
+
     def __init__(self) -> None:
         if genai is None:
             raise ImportError("google-generativeai required for Gemini backend")
         genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
         model = os.environ.get("GEMINI_MODEL", "gemini-pro")
+        self.model = model
         self.chat_model = genai.GenerativeModel(model)
+        self._system_models: Dict[str, Any] = {}
+
+    def _request(
+        self, messages: List[BaseMessage], kwargs: dict
+    ) -> Tuple[Any, List[Dict[str, Any]], Dict[str, Any]]:
+        """Return the model for the system instruction, the turns and options."""
+        system, contents = _to_contents(messages)
+        config = gemini_config(pop_profile(kwargs))
+        options = {"generation_config": config} if config else {}
+        if not system:
+            return self.chat_model, contents, options
+        model = self._system_models.get(system)
+        if model is None:
+            if len(self._system_models) >= self.MAX_SYSTEM_MODELS:
+                self._system_models.pop(next(iter(self._system_models)))
+            model = genai.GenerativeModel(self.model, system_instruction=system)
+            self._system_models[system] = model
+        return model, contents, options
 
     def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
-        content = "\n".join(m.content for m in messages)
-        resp = self.chat_model.generate_content(content)
-        return AIMessage(content=resp.text)
+        model, contents, options = self._request(messages, kwargs)
+        resp = model.generate_content(contents, **options)
+        return _to_message(resp)
 
     def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
-        content = "\n".join(m.content for m in messages)
-        stream = self.chat_model.generate_content(content, stream=True)
-        for chunk in stream:
-            yield AIMessage(content=chunk.text)
+        model, contents, options = self._request(messages, kwargs)
+        stream = model.generate_content(contents, stream=True, **options)
+        chunks = (_to_message(chunk) for chunk in stream)
+        yield from timed_stream(self.backend, chunks)
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        model, contents, options = self._request(messages, kwargs)
+        resp = await model.generate_content_async(contents, **options)
+        return _to_message(resp)
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        model, contents, options = self._request(messages, kwargs)
+        stream = await model.generate_content_async(contents, stream=True, **options)
+        chunks = (_to_message(chunk) async for chunk in stream)
+        async for chunk in atimed_stream(self.backend, chunks):
+            yield chunk
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         raise NotImplementedError("Gemini does not support embeddings")
 
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError("Gemini does not support embeddings")
+
     def count_tokens(self, messages: List[BaseMessage]) -> int:
-        content = "\n".join(m.content for m in messages)
-        return len(content.split())
+        return count_message_tokens(messages, model=self.model)
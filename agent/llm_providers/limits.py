@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+"""Per-provider request quotas and adaptive concurrency limits."""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterable, Iterator, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .base import ClientWrapper, LLMClient, acquire_in_thread
+
+
+class LimitTimeout(Exception):
+    """Raised when a request waits longer than allowed for a slot."""
+
+    pass
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Return ``True`` for rate-limit (429/503) and timeout failures."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in (429, 503):
+        return True
+    if isinstance(exc, TimeoutError):
+        return True
+    name = type(exc).__name__.lower()
+    return "timeout" in name or "ratelimit" in name or "timed out" in str(exc).lower()
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` requests/second with ``capacity`` burst."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.waiting = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token and return 0, or return the seconds until one is free."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout: float | None = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self.try_acquire()
+                if wait == 0:
+                    return
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    raise LimitTimeout("rate limit wait exceeded timeout")
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    async def aacquire(self) -> None:
+        # Same lock as acquire(): worker threads may share this bucket.
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                wait = self.try_acquire()
+                if wait == 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+
+class AIMDLimiter:
+    """Adaptive concurrency window (additive increase, multiplicative decrease).
+
+    The window grows by one slot after a full window of calls completes
+    within ``tolerance`` times the baseline latency, and shrinks by
+    ``backoff`` whenever a call times out or is rate limited.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        *,
+        minimum: int = 1,
+        maximum: int = 16,
+        backoff: float = 0.5,
+        tolerance: float = 1.5,
+        alpha: float = 0.1,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.baseline: float | None = None
+        self.in_flight = 0
+        self.waiting = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float | None = None) -> None:
+        with self._cond:
+            self.waiting += 1
+            try:
+                ok = self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout)
+                if not ok:
+                    raise LimitTimeout("concurrency wait exceeded timeout")
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self, latency: float | None = None, overloaded: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._successes = 0
+            elif latency is not None:
+                stable = self.baseline is None or latency <= self.baseline * self.tolerance
+                if self.baseline is None:
+                    self.baseline = latency
+                else:
+                    self.baseline = self.alpha * latency + (1 - self.alpha) * self.baseline
+                if stable:
+                    self._successes += 1
+                    if self._successes >= int(self.limit):
+                        self.limit = min(self.maximum, self.limit + 1)
+                        self._successes = 0
+                else:
+                    self._successes = 0
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot; latency and overload signals feed the window."""
+        self.acquire()
+        start = time.perf_counter()
+        latency = None
+        overloaded = False
+        try:
+            yield
+            latency = time.perf_counter() - start
+        except Exception as exc:
+            overloaded = is_overload_error(exc)
+            raise
+        finally:
+            self.release(latency, overloaded)
+
+
+class RateLimitedClient(ClientWrapper):
+    """Apply a token bucket and/or adaptive concurrency window to a client."""
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        *,
+        bucket: TokenBucket | None = None,
+        window: AIMDLimiter | None = None,
+    ) -> None:
+        super().__init__(inner)
+        self.bucket = bucket
+        self.window = window
+
+    @contextmanager
+    def _guard(self) -> Iterator[None]:
+        if self.bucket is not None:
+            self.bucket.acquire()
+        if self.window is None:
+            yield
+            return
+        with self.window.slot():
+            yield
+
+    @asynccontextmanager
+    async def _aguard(self) -> AsyncIterator[None]:
+        if self.bucket is not None:
+            await self.bucket.aacquire()
+        if self.window is None:
+            yield
+            return
+        await acquire_in_thread(self.window.acquire, self.window.release)
+        start = time.perf_counter()
+        latency = None
+        overloaded = False
+        try:
+            yield
+            latency = time.perf_counter() - start
+        except Exception as exc:
+            overloaded = is_overload_error(exc)
+            raise
+        finally:
+            self.window.release(latency, overloaded)
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        with self._guard():
+            return self.inner.chat(messages, **kwargs)
+
+    def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
+        with self._guard():
+            yield from self.inner.stream_chat(messages, **kwargs)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with self._guard():
+            return self.inner.embed(texts)
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        async with self._aguard():
+            return await self.inner.achat(messages, **kwargs)
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        async with self._aguard():
+            async for chunk in self.inner.astream_chat(messages, **kwargs):
+                yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        async with self._aguard():
+            return await self.inner.aembed(texts)
+
+    def metrics(self) -> dict:
+        """Current limits and queue depth for dashboards and logs."""
+        data = {"concurrency_limit": None, "in_flight": 0, "queue_depth": 0}
+        if self.window is not None:
+            data["concurrency_limit"] = int(self.window.limit)
+            data["in_flight"] = self.window.in_flight
+            data["queue_depth"] = self.window.waiting
+        if self.bucket is not None:
+            data["rate_limit"] = self.bucket.rate
+            data["queue_depth"] += self.bucket.waiting
+        return data
+
+
+def limiters_from_env(backend: str) -> Tuple[TokenBucket | None, AIMDLimiter | None]:
+    """Build the token bucket and adaptive window configured for ``backend``.
+
+    ``<BACKEND>_RPS`` (and optional ``<BACKEND>_BURST``) set a token bucket;
+    ``<BACKEND>_MAX_CONCURRENCY`` sets the ceiling of the adaptive window.
+    Local Ollama defaults to an adaptive window starting at two requests.
+    """
+    prefix = backend.upper()
+    rps = os.environ.get(f"{prefix}_RPS")
+    ceiling = os.environ.get(f"{prefix}_MAX_CONCURRENCY")
+    if backend == "ollama" and ceiling is None:
+        ceiling = "4"
+    bucket = None
+    if rps is not None:
+        burst = os.environ.get(f"{prefix}_BURST")
+        bucket = TokenBucket(float(rps), float(burst) if burst else None)
+    window = None
+    if ceiling is not None:
+        window = AIMDLimiter(initial=min(2, int(ceiling)), maximum=int(ceiling))
+    return bucket, window
+
+
+def limits_from_env(
+    backend: str,
+    client: LLMClient,
+    limiters: Tuple[TokenBucket | None, AIMDLimiter | None] | None = None,
+) -> LLMClient:
+    """Wrap ``client`` with the limits configured for ``backend``.
+
+    Pass ``limiters`` (from :func:`limiters_from_env`) to put several
+    clients of one provider behind the same bucket and window.
+    """
+    bucket, window = limiters or limiters_from_env(backend)
+    if bucket is None and window is None:
+        return client
+    return RateLimitedClient(client, bucket=bucket, window=window)
+
+
+__all__ = [
+    "TokenBucket",
+    "AIMDLimiter",
+    "RateLimitedClient",
+    "LimitTimeout",
+    "is_overload_error",
+    "limiters_from_env",
+    "limits_from_env",
+]
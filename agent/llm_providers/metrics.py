@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+"""Time-to-first-token and throughput metrics for streaming chat calls."""
+
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterable, Iterator
+
+
+def _chunk_tokens(chunk) -> int | None:
+    usage = getattr(chunk, "usage_metadata", None)
+    if usage:
+        return usage.get("output_tokens")
+    return None
+
+
+class StreamMetrics:
+    """Aggregate per-backend streaming latency.
+
+    ``ttft`` is the delay until the first non-empty chunk and ``tokens_per_sec``
+    the generation rate after it, both over the streams that produced a
+    first chunk (``ttft_streams``). Token counts come from the provider's usage
+    metadata when it reports one, otherwise every non-empty chunk counts as a
+    token (true for OpenAI-style delta streams).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = {}
+
+    def record(self, backend: str, ttft: float | None, tokens: int, duration: float) -> None:
+        with self._lock:
+            d = self._data.setdefault(
+                backend,
+                {
+                    "streams": 0,
+                    "ttft_streams": 0,
+                    "ttft_total": 0.0,
+                    "ttft_last": None,
+                    "tokens": 0,
+                    "gen_time": 0.0,
+                },
+            )
+            d["streams"] += 1
+            if ttft is not None:
+                d["ttft_streams"] += 1
+                d["ttft_total"] += ttft
+                d["ttft_last"] = ttft
+                d["tokens"] += tokens
+                d["gen_time"] += max(duration - ttft, 0.0)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            out = {}
+            for backend, d in self._data.items():
+                out[backend] = {
+                    "streams": d["streams"],
+                    "ttft_streams": d["ttft_streams"],
+                    "ttft_avg": d["ttft_total"] / d["ttft_streams"] if d["ttft_streams"] else None,
+                    "ttft_last": d["ttft_last"],
+                    "tokens": d["tokens"],
+                    "tokens_per_sec": d["tokens"] / d["gen_time"] if d["gen_time"] else None,
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+metrics = StreamMetrics()
+
+
+class _Timer:
+    def __init__(self, backend: str) -> None:
+        self.backend = backend
+        self.start = time.perf_counter()
+        self.first: float | None = None
+        self.chunks = 0
+        self.reported: int | None = None
+
+    def see(self, chunk) -> None:
+        if getattr(chunk, "content", None):
+            if self.first is None:
+                self.first = time.perf_counter()
+            self.chunks += 1
+        reported = _chunk_tokens(chunk)
+        if reported:
+            self.reported = reported
+
+    def finish(self) -> None:
+        end = time.perf_counter()
+        ttft = None if self.first is None else self.first - self.start
+        tokens = self.reported if self.reported is not None else self.chunks
+        metrics.record(self.backend, ttft, tokens, end - self.start)
+
+
+def timed_stream(backend: str, stream: Iterable) -> Iterator:
+    """Yield from ``stream`` while recording TTFT and tokens/sec for ``backend``."""
+    timer = _Timer(backend)
+    try:
+        for chunk in stream:
+            timer.see(chunk)
+            yield chunk
+    finally:
+        timer.finish()
+
+
+async def atimed_stream(backend: str, stream: AsyncIterator) -> AsyncIterator:
+    """Async counterpart of :func:`timed_stream`."""
+    timer = _Timer(backend)
+    try:
+        async for chunk in stream:
+            timer.see(chunk)
+            yield chunk
+    finally:
+        timer.finish()
+
+
+def stream_metrics() -> Dict[str, dict]:
+    """Return a snapshot of streaming metrics keyed by backend."""
+    return metrics.snapshot()
+
+
+__all__ = ["StreamMetrics", "timed_stream", "atimed_stream", "stream_metrics", "metrics"]
@@ -2,31 +2,81 @@ from __future__ import annotations
 
 """LLMClient implementation using local Ollama."""
 
-from typing import Iterable, List
+import os
+from typing import AsyncIterator, Iterable, List
 
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_core.messages import AIMessage, BaseMessage
 
 from .base import LLMClient
+from .batching import batched_embeddings
+from .embedding_cache import cached_embeddings
+from .metrics import atimed_stream, timed_stream
+from .ollama_residency import ollama_base_url, residency_manager
+from .profiles import ollama_options, pop_profile
 from utils.token_counter import count_message_tokens
 
 
 class OllamaClient(LLMClient):
     """Wrapper around ChatOllama."""
 
+    backend = "ollama"
+
     def __init__(self, model: str | None = None) -> None:
-        self.chat_model = ChatOllama(model=model) if model else ChatOllama()
-        self.embed_model = OllamaEmbeddings(model=model) if model else OllamaEmbeddings()
+        # The residency manager must warm the server that serves the calls.
+        base_url = ollama_base_url()
+        options = {"base_url": base_url, **({"model": model} if model else {})}
+        self.chat_model = ChatOllama(**options)
+        self.embed_model = cached_embeddings(batched_embeddings(OllamaEmbeddings(**options)))
+        self.model = model or getattr(self.chat_model, "model", None)
+        self.residency = residency_manager(base_url)
+        self.residency.register(self.model, "chat")
+        self.residency.register(
+            getattr(self.embed_model, "model", None),
+            "embed",
+            keep_alive=os.environ.get("OLLAMA_EMBED_KEEP_ALIVE"),
+        )
+        # Every chat request carries keep_alive, otherwise Ollama resets the
+        # model's expiry to the server default on each call.
+        self.chat_model.keep_alive = self.residency.keep_alive_for(self.model)
+
+    def _observe(self, message: AIMessage) -> AIMessage:
+        self.residency.observe(self.model, getattr(message, "response_metadata", None))
+        return message
+
+    def _observed(self, stream: Iterable[AIMessage]) -> Iterable[AIMessage]:
+        for chunk in stream:
+            yield self._observe(chunk)
+
+    @staticmethod
+    def _options(kwargs: dict) -> dict:
+        """Merge a generation ``profile`` into the call kwargs."""
+        profile = pop_profile(kwargs)
+        return {**ollama_options(profile), **kwargs}
 
     def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
-        return self.chat_model.invoke(messages, **kwargs)
+        return self._observe(self.chat_model.invoke(messages, **self._options(kwargs)))
 
     def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
-        yield from self.chat_model.stream(messages, **kwargs)
+        stream = self._observed(self.chat_model.stream(messages, **self._options(kwargs)))
+        yield from timed_stream(self.backend, stream)
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         return self.embed_model.embed_documents(texts)
 
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return self._observe(await self.chat_model.ainvoke(messages, **self._options(kwargs)))
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        stream = self.chat_model.astream(messages, **self._options(kwargs))
+        async for chunk in atimed_stream(self.backend, stream):
+            yield self._observe(chunk)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.embed_model.aembed_documents(texts)
+
     def count_tokens(self, messages: List[BaseMessage]) -> int:
-        return count_message_tokens(messages)
+        return count_message_tokens(messages, model=self.model)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+"""Keep Ollama models resident and report cold loads."""
+
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import psutil
+import requests
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_RAM_FRACTION = 0.6
+# Warm requests report a load_duration of a few milliseconds; anything above
+# this many seconds means the weights were read from disk.
+DEFAULT_COLD_THRESHOLD = 1.0
+
+
+def ollama_base_url() -> str:
+    return os.environ.get("OLLAMA_BASE_URL", DEFAULT_BASE_URL)
+
+
+class ResidencyManager:
+    """Preload Ollama models, pin them with ``keep_alive`` and track cold loads.
+
+    Clients :meth:`register` the chat and embedding models they use. At
+    service start :meth:`warm` loads as many of them as fit in
+    ``ram_fraction`` of system memory, in registration order, using
+    sizes reported by ``/api/tags``. :meth:`observe` reads the
+    ``load_duration`` Ollama returns with every response and counts cold
+    loads per model. :meth:`resident` lists what ``/api/ps`` reports as
+    loaded.
+
+    ``OllamaEmbeddings`` does not forward ``keep_alive``, so embedding
+    requests fall back to the server default. Call :meth:`ensure_resident`
+    periodically to reload anything that has been evicted.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        *,
+        keep_alive: Dict[str, str] | None = None,
+        default_keep_alive: str = DEFAULT_KEEP_ALIVE,
+        cold_threshold: float = DEFAULT_COLD_THRESHOLD,
+        ram_fraction: float = DEFAULT_RAM_FRACTION,
+        ram_bytes: int | None = None,
+        timeout: float = 120.0,
+    ) -> None:
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.keep_alive = dict(keep_alive or {})
+        self.default_keep_alive = default_keep_alive
+        self.cold_threshold = cold_threshold
+        self.ram_fraction = ram_fraction
+        self.ram_bytes = ram_bytes if ram_bytes is not None else psutil.virtual_memory().total
+        self.timeout = timeout
+        self.cold_loads: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+        self.last_load: Dict[str, float] = {}
+        self._models: Dict[str, str] = {}
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    # --- configuration -------------------------------------------------------
+
+    def register(
+        self, model: str | None, kind: str = "chat", keep_alive: str | None = None
+    ) -> None:
+        """Declare that ``model`` is used for ``kind`` ("chat" or "embed")."""
+        if not model:
+            return
+        with self._lock:
+            self._models.setdefault(model, kind)
+            if keep_alive is not None:
+                self.keep_alive[model] = keep_alive
+
+    def models(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(self._models.items())
+
+    def keep_alive_for(self, model: str) -> str:
+        return self.keep_alive.get(model, self.default_keep_alive)
+
+    # --- Ollama API ----------------------------------------------------------
+
+    def _get(self, path: str) -> dict:
+        resp = self._session.get(f"{self.base_url}{path}", timeout=10)
+        resp.raise_for_status()
+        return resp.json()
+
+    def model_sizes(self) -> Dict[str, int]:
+        """Return on-disk size of every pulled model (a proxy for RAM use)."""
+        return {m["name"]: m.get("size", 0) for m in self._get("/api/tags").get("models", [])}
+
+    def resident(self) -> List[dict]:
+        """Models currently loaded by the server, as reported by ``/api/ps``."""
+        return [
+            {
+                "name": m.get("name") or m.get("model"),
+                "size": m.get("size", 0),
+                "size_vram": m.get("size_vram", 0),
+                "expires_at": m.get("expires_at"),
+            }
+            for m in self._get("/api/ps").get("models", [])
+        ]
+
+    def preload(self, model: str, kind: str = "chat") -> bool:
+        """Load ``model`` without generating anything; return ``True`` if cold."""
+        if kind == "embed":
+            path, payload = "/api/embed", {"model": model, "input": ""}
+        else:
+            path, payload = "/api/generate", {"model": model, "prompt": ""}
+        payload["keep_alive"] = self.keep_alive_for(model)
+        resp = self._session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return self.observe(model, resp.json())
+
+    # --- planning ------------------------------------------------------------
+
+    def plan(self, sizes: Dict[str, int] | None = None) -> Tuple[List[str], List[str]]:
+        """Split registered models into those that fit in RAM and the rest."""
+        if sizes is None:
+            try:
+                sizes = self.model_sizes()
+            except requests.RequestException:
+                sizes = {}
+        budget = self.ram_bytes * self.ram_fraction
+        used = 0
+        fit: List[str] = []
+        skip: List[str] = []
+        for model, _ in self.models():
+            size = sizes.get(model) or sizes.get(f"{model}:latest", 0)
+            if fit and used + size > budget:
+                skip.append(model)
+                continue
+            used += size
+            fit.append(model)
+        return fit, skip
+
+    def warm(self) -> dict:
+        """Preload every registered model that fits; failures are reported."""
+        fit, skipped = self.plan()
+        kinds = dict(self.models())
+        loaded: List[str] = []
+        failed: List[str] = []
+        for model in fit:
+            try:
+                self.preload(model, kinds[model])
+                loaded.append(model)
+            except requests.RequestException:
+                logging.warning("could not preload Ollama model %s", model, exc_info=True)
+                failed.append(model)
+        return {"loaded": loaded, "skipped": skipped, "failed": failed}
+
+    def ensure_resident(self) -> List[str]:
+        """Reload planned models that the server has evicted."""
+        names = {m["name"] for m in self.resident()}
+        fit, _ = self.plan()
+        kinds = dict(self.models())
+        reloaded = []
+        for model in fit:
+            if model not in names and f"{model}:latest" not in names:
+                self.preload(model, kinds[model])
+                reloaded.append(model)
+        return reloaded
+
+    # --- observation ---------------------------------------------------------
+
+    def observe(self, model: str | None, metadata: dict | None) -> bool:
+        """Record the ``load_duration`` (ns) of an Ollama response.
+
+        Returns ``True`` when the call paid for a cold model load.
+        """
+        if not model or not metadata or metadata.get("load_duration") is None:
+            return False
+        seconds = metadata["load_duration"] / 1e9
+        cold = seconds >= self.cold_threshold
+        with self._lock:
+            self.calls[model] = self.calls.get(model, 0) + 1
+            if cold:
+                self.cold_loads[model] = self.cold_loads.get(model, 0) + 1
+                self.last_load[model] = seconds
+        if cold:
+            logging.info("Ollama cold load of %s took %.2fs", model, seconds)
+        return cold
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": dict(self._models),
+                "calls": dict(self.calls),
+                "cold_loads": dict(self.cold_loads),
+                "last_load_seconds": dict(self.last_load),
+            }
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def residency_manager(base_url: str | None = None) -> ResidencyManager:
+    """Return the shared manager for ``base_url`` (``OLLAMA_BASE_URL``)."""
+    from ..resources import shared
+
+    url = base_url or ollama_base_url()
+    chat_keep = os.environ.get("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+    return shared(
+        ("ollama-residency", url),
+        lambda: ResidencyManager(
+            url,
+            default_keep_alive=chat_keep,
+            ram_fraction=float(os.environ.get("OLLAMA_RAM_FRACTION", DEFAULT_RAM_FRACTION)),
+        ),
+    )
+
+
+def warm_default_models() -> dict:
+    """Build the default client (registering its models) and preload them."""
+    from . import get_default_client
+
+    get_default_client()
+    return residency_manager().warm()
+
+
+__all__ = ["ResidencyManager", "ollama_base_url", "residency_manager", "warm_default_models"]
@@ -3,33 +3,63 @@ from __future__ import annotations
 """OpenAI API client adhering to LLMClient interface."""
 
 import os
-from typing import Iterable, List
+from typing import AsyncIterator, Iterable, List
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.messages import AIMessage, BaseMessage
-import tiktoken
 
 from .base import LLMClient
+from .batching import batched_embeddings
+from .embedding_cache import cached_embeddings
+from .metrics import atimed_stream, timed_stream
+from .profiles import openai_options, pop_profile
+from utils.token_counter import count_message_tokens
 
 
 class OpenAIClient(LLMClient):
     """Implementation using OpenAI's API via langchain-openai."""
 
+    backend = "openai"
+
     def __init__(self) -> None:
         model = os.environ.get("OPENAI_MODEL", "gpt-4o")
+        self.model = model
         embedding_model = os.environ.get("OPENAI_EMBED_MODEL", "text-embedding-3-small")
         self.chat_model = ChatOpenAI(model=model, api_key=os.environ.get("OPENAI_API_KEY"))
-        self.embed_model = OpenAIEmbeddings(model=embedding_model, api_key=os.environ.get("OPENAI_API_KEY"))
-        self._encoder = tiktoken.encoding_for_model(model)
+        self.embed_model = cached_embeddings(
+            batched_embeddings(
+                OpenAIEmbeddings(model=embedding_model, api_key=os.environ.get("OPENAI_API_KEY"))
+            )
+        )
+
+    @staticmethod
+    def _options(kwargs: dict) -> dict:
+        """Merge a generation ``profile`` into the call kwargs."""
+        profile = pop_profile(kwargs)
+        return {**openai_options(profile), **kwargs}
 
     def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
-        return self.chat_model.invoke(messages, **kwargs)
+        return self.chat_model.invoke(messages, **self._options(kwargs))
 
     def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
-        yield from self.chat_model.stream(messages, **kwargs)
+        stream = self.chat_model.stream(messages, **self._options(kwargs))
+        yield from timed_stream(self.backend, stream)
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         return self.embed_model.embed_documents(texts)
 
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        return await self.chat_model.ainvoke(messages, **self._options(kwargs))
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        stream = self.chat_model.astream(messages, **self._options(kwargs))
+        async for chunk in atimed_stream(self.backend, stream):
+            yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.embed_model.aembed_documents(texts)
+
     def count_tokens(self, messages: List[BaseMessage]) -> int:
-        return sum(len(self._encoder.encode(m.content)) for m in messages)
+        return count_message_tokens(messages, model=self.model)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+"""Named generation profiles shared by every LLM backend."""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Decoding limits for one kind of call.
+
+    ``None`` leaves the backend default in place. Clients translate the
+    profile into their native options (``num_predict`` for Ollama,
+    ``max_tokens`` for OpenAI/DeepSeek, ``max_output_tokens`` for Gemini).
+    """
+
+    name: str
+    max_tokens: int | None = None
+    stop: Tuple[str, ...] = ()
+    temperature: float | None = None
+    json: bool = False
+
+
+PROFILES: Dict[str, GenerationProfile] = {
+    # A single number such as ``0.7``.
+    "score": GenerationProfile("score", max_tokens=8, stop=("\n\n",), temperature=0.0),
+    # A short bullet list of steps.
+    "plan": GenerationProfile("plan", max_tokens=384, temperature=0.2),
+    # Rolling conversation summary (agent.memory).
+    "summary": GenerationProfile("summary", max_tokens=256, temperature=0.0),
+    # The user-facing answer.
+    "respond": GenerationProfile("respond", max_tokens=1024),
+}
+
+
+def register_profile(profile: GenerationProfile) -> None:
+    """Add or replace a named profile."""
+    PROFILES[profile.name] = profile
+
+
+def get_profile(profile: str | GenerationProfile | None) -> GenerationProfile | None:
+    """Resolve a profile name; unknown names raise ``KeyError``."""
+    if profile is None or isinstance(profile, GenerationProfile):
+        return profile
+    return PROFILES[profile]
+
+
+def pop_profile(kwargs: dict) -> GenerationProfile | None:
+    """Remove ``profile`` from call kwargs and resolve it."""
+    return get_profile(kwargs.pop("profile", None))
+
+
+def openai_options(profile: GenerationProfile | None) -> dict:
+    """Translate to OpenAI-compatible chat completion parameters."""
+    if profile is None:
+        return {}
+    opts: dict = {}
+    if profile.max_tokens is not None:
+        opts["max_tokens"] = profile.max_tokens
+    if profile.stop:
+        opts["stop"] = list(profile.stop)
+    if profile.temperature is not None:
+        opts["temperature"] = profile.temperature
+    if profile.json:
+        opts["response_format"] = {"type": "json_object"}
+    return opts
+
+
+def ollama_options(profile: GenerationProfile | None) -> dict:
+    """Translate to ``ChatOllama`` call kwargs."""
+    if profile is None:
+        return {}
+    opts: dict = {}
+    if profile.max_tokens is not None:
+        opts["num_predict"] = profile.max_tokens
+    if profile.stop:
+        opts["stop"] = list(profile.stop)
+    if profile.temperature is not None:
+        opts["temperature"] = profile.temperature
+    if profile.json:
+        opts["format"] = "json"
+    return opts
+
+
+def gemini_config(profile: GenerationProfile | None) -> dict:
+    """Translate to a Gemini ``generation_config`` mapping."""
+    if profile is None:
+        return {}
+    config: dict = {}
+    if profile.max_tokens is not None:
+        config["max_output_tokens"] = profile.max_tokens
+    if profile.stop:
+        config["stop_sequences"] = list(profile.stop)
+    if profile.temperature is not None:
+        config["temperature"] = profile.temperature
+    if profile.json:
+        config["response_mime_type"] = "application/json"
+    return config
+
+
+__all__ = [
+    "GenerationProfile",
+    "PROFILES",
+    "register_profile",
+    "get_profile",
+    "pop_profile",
+    "openai_options",
+    "ollama_options",
+    "gemini_config",
+]
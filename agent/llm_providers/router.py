@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+"""Latency-aware routing across several LLM providers."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Dict, Iterable, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .base import LLMClient
+
+
+class RouterError(Exception):
+    """Raised when no provider is available to serve a request."""
+
+    pass
+
+
+class ProviderHealth:
+    """EWMA latency/error tracking plus a circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        window: int = 100,
+    ) -> None:
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency: float | None = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.calls = 0
+        self._trial = False
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _ewma(self, old: float | None, value: float) -> float:
+        return value if old is None else self.alpha * value + (1 - self.alpha) * old
+
+    def record_success(self, latency: float, *, complete: bool = True) -> None:
+        """Record a success; only ``complete`` responses feed :meth:`p95`.
+
+        Streams report their time to first token with ``complete=False``,
+        which would otherwise pull the hedge deadline below what a full
+        ``chat`` response takes.
+        """
+        with self._lock:
+            self.calls += 1
+            self.latency = self._ewma(self.latency, latency)
+            self.error_rate = self._ewma(self.error_rate, 0.0)
+            if complete:
+                self._samples.append(latency)
+            self.failures = 0
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.error_rate = self._ewma(self.error_rate, 1.0)
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def available(self) -> bool:
+        """Return ``True`` unless the breaker is open and still cooling down
+        or, once half-open, its single trial call is already in flight."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            return self.state == "closed" or (self.state == "half_open" and not self._trial)
+
+    def begin(self) -> bool:
+        """Admit a call; returns ``True`` when it is the half-open trial call.
+
+        Raises :class:`RouterError` while the breaker is open or the trial
+        call is in flight. Every admitted call must be paired with
+        :meth:`end`.
+        """
+        with self._lock:
+            if self.state == "open" or (self.state == "half_open" and self._trial):
+                raise RouterError(f"provider {self.name} is unavailable")
+            self._trial = self.state == "half_open"
+            return self._trial
+
+    def end(self, trial: bool) -> None:
+        """Release the trial slot taken by :meth:`begin`, however the call ended."""
+        if trial:
+            with self._lock:
+                self._trial = False
+
+    def score(self) -> float:
+        """Lower is better; untried providers score 0 so they get explored."""
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1.0 + 4.0 * self.error_rate)
+
+    def p95(self, min_samples: int = 5) -> float | None:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "state": self.state,
+            "calls": self.calls,
+            "p95": self.p95(),
+        }
+
+
+class RouterClient(LLMClient):
+    """Send each call to the fastest healthy provider.
+
+    Providers are ranked by EWMA latency weighted by their recent error rate.
+    Repeated failures open a provider's circuit breaker for ``cooldown``
+    seconds, after which a single trial call decides whether it closes
+    again; other calls skip the provider while that call is in flight.
+    With ``hedge=True`` a second provider is raced once the first one
+    exceeds its own p95 latency. Embeddings always use the first configured
+    provider because vectors from different models are not comparable.
+    """
+
+    backend = "router"
+
+    def __init__(
+        self,
+        clients: Dict[str, LLMClient],
+        *,
+        hedge: bool = False,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ) -> None:
+        if not clients:
+            raise ValueError("RouterClient needs at least one provider")
+        self.clients = dict(clients)
+        self.primary = next(iter(self.clients))
+        self.hedge = hedge
+        self.hedges = 0
+        self.health = {
+            name: ProviderHealth(
+                name, alpha=alpha, failure_threshold=failure_threshold, cooldown=cooldown
+            )
+            for name in self.clients
+        }
+        self._pool = ThreadPoolExecutor(max_workers=2 * len(self.clients) + 2)
+
+    @property
+    def model(self) -> str | None:
+        return getattr(self.clients[self.primary], "model", None)
+
+    def candidates(self) -> List[str]:
+        """Healthy providers ordered from fastest to slowest."""
+        names = [n for n in self.clients if self.health[n].available()]
+        return sorted(names, key=lambda n: self.health[n].score())
+
+    def _call(self, name: str, messages: List[BaseMessage], kwargs: dict) -> AIMessage:
+        health = self.health[name]
+        trial = health.begin()
+        start = time.perf_counter()
+        try:
+            result = self.clients[name].chat(messages, **kwargs)
+            health.record_success(time.perf_counter() - start)
+        except Exception:
+            health.record_failure()
+            raise
+        finally:
+            health.end(trial)
+        return result
+
+    def _hedged(
+        self, first: str, second: str, messages: List[BaseMessage], kwargs: dict, used: set
+    ) -> AIMessage:
+        futures = {self._pool.submit(self._call, first, messages, kwargs): first}
+        done, _ = wait(futures, timeout=self.health[first].p95())
+        if not done:
+            self.hedges += 1
+            used.add(second)
+            futures[self._pool.submit(self._call, second, messages, kwargs)] = second
+        error: Exception | None = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    return fut.result()
+                error = fut.exception()
+        raise error  # type: ignore[misc]
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        order = self.candidates()
+        used: set[str] = set()
+        error: Exception | None = None
+        for i, name in enumerate(order):
+            if name in used:
+                continue
+            used.add(name)
+            rest = [n for n in order[i + 1 :] if n not in used]
+            try:
+                if self.hedge and rest and self.health[name].p95() is not None:
+                    return self._hedged(name, rest[0], messages, kwargs, used)
+                return self._call(name, messages, kwargs)
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            raise error
+        raise RouterError("no healthy LLM provider available")
+
+    async def _acall(self, name: str, messages: List[BaseMessage], kwargs: dict) -> AIMessage:
+        health = self.health[name]
+        trial = health.begin()
+        start = time.perf_counter()
+        try:
+            result = await self.clients[name].achat(messages, **kwargs)
+            health.record_success(time.perf_counter() - start)
+        except Exception:
+            health.record_failure()
+            raise
+        finally:
+            # Also on cancellation (hedge loser), which records nothing.
+            health.end(trial)
+        return result
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        order = self.candidates()
+        used: set[str] = set()
+        error: Exception | None = None
+        for i, name in enumerate(order):
+            if name in used:
+                continue
+            used.add(name)
+            rest = [n for n in order[i + 1 :] if n not in used]
+            deadline = self.health[name].p95() if self.hedge and rest else None
+            first = asyncio.ensure_future(self._acall(name, messages, kwargs))
+            tasks = {first}
+            try:
+                if deadline is not None:
+                    done, _ = await asyncio.wait(tasks, timeout=deadline)
+                    if not done:
+                        self.hedges += 1
+                        used.add(rest[0])
+                        tasks.add(asyncio.ensure_future(self._acall(rest[0], messages, kwargs)))
+                while tasks:
+                    done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        error = task.exception()
+            finally:
+                # The hedge loser, or every call when the caller was cancelled.
+                for task in tasks:
+                    task.cancel()
+        if error is not None:
+            raise error
+        raise RouterError("no healthy LLM provider available")
+
+    def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
+        error: Exception | None = None
+        for name in self.candidates():
+            health = self.health[name]
+            try:
+                trial = health.begin()
+            except RouterError as exc:
+                error = exc
+                continue
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in self.clients[name].stream_chat(messages, **kwargs):
+                    if not started:
+                        started = True
+                        health.record_success(time.perf_counter() - start, complete=False)
+                    yield chunk
+                return
+            except Exception as exc:
+                health.record_failure()
+                if started:
+                    raise
+                error = exc
+            finally:
+                health.end(trial)
+        if error is not None:
+            raise error
+        raise RouterError("no healthy LLM provider available")
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        error: Exception | None = None
+        for name in self.candidates():
+            health = self.health[name]
+            try:
+                trial = health.begin()
+            except RouterError as exc:
+                error = exc
+                continue
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in self.clients[name].astream_chat(messages, **kwargs):
+                    if not started:
+                        started = True
+                        health.record_success(time.perf_counter() - start, complete=False)
+                    yield chunk
+                return
+            except Exception as exc:
+                health.record_failure()
+                if started:
+                    raise
+                error = exc
+            finally:
+                health.end(trial)
+        if error is not None:
+            raise error
+        raise RouterError("no healthy LLM provider available")
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.clients[self.primary].embed(texts)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.clients[self.primary].aembed(texts)
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        return self.clients[self.primary].count_tokens(messages)
+
+    def stats(self) -> dict:
+        return {
+            "hedges": self.hedges,
+            "providers": {n: h.snapshot() for n, h in self.health.items()},
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        for client in self.clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                close()
+
+
+__all__ = ["RouterClient", "RouterError", "ProviderHealth"]
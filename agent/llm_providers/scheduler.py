@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+"""Priority-aware admission of LLM requests with aging."""
+
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterable, Iterator, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from .base import ClientWrapper, LLMClient, acquire_in_thread
+
+PRIORITY_CLASSES = ("interactive", "task", "background")
+DEFAULT_CLASS = "task"
+DEFAULT_QUEUE_LIMITS = {"interactive": 64, "task": 256, "background": 1024}
+
+_current_class: ContextVar[str] = ContextVar("llm_priority", default=DEFAULT_CLASS)
+
+
+@contextmanager
+def llm_priority(name: str) -> Iterator[None]:
+    """Tag every LLM call made inside the block with priority class ``name``."""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"unknown priority class {name!r}")
+    token = _current_class.set(name)
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+def current_priority() -> str:
+    return _current_class.get()
+
+
+class SchedulerFull(Exception):
+    """Raised when the queue for a priority class is at capacity."""
+
+    pass
+
+
+class _Ticket:
+    __slots__ = ("cls", "rank", "enqueued", "seq", "granted")
+
+    def __init__(self, cls: str, seq: int) -> None:
+        self.cls = cls
+        self.rank = PRIORITY_CLASSES.index(cls)
+        self.enqueued = time.monotonic()
+        self.seq = seq
+        self.granted = False
+
+
+class PriorityScheduler:
+    """Hand out ``slots`` concurrent model calls, best priority first.
+
+    Each class has a bounded queue. A waiting request gains one priority
+    level for every ``aging`` seconds it has waited, so background work
+    still makes progress while interactive turns keep jumping the queue.
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        *,
+        aging: float = 10.0,
+        queue_limits: Dict[str, int] | None = None,
+    ) -> None:
+        self.slots = slots
+        self.aging = aging
+        self.queue_limits = dict(DEFAULT_QUEUE_LIMITS, **(queue_limits or {}))
+        self.busy = 0
+        self._waiting: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {
+            c: {"calls": 0, "rejected": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for c in PRIORITY_CLASSES
+        }
+
+    def _effective(self, ticket: _Ticket, now: float) -> tuple[float, int]:
+        return ticket.rank - (now - ticket.enqueued) / self.aging, ticket.seq
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self.busy < self.slots and self._waiting:
+            best = min(self._waiting, key=lambda t: self._effective(t, now))
+            self._waiting.remove(best)
+            best.granted = True
+            self.busy += 1
+        self._cond.notify_all()
+
+    def _record(self, cls: str, waited: float) -> None:
+        stats = self._stats[cls]
+        stats["calls"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def acquire(self, cls: str | None = None) -> None:
+        cls = cls or current_priority()
+        with self._cond:
+            if self.busy < self.slots and not self._waiting:
+                self.busy += 1
+                self._record(cls, 0.0)
+                return
+            queued = sum(1 for t in self._waiting if t.cls == cls)
+            if queued >= self.queue_limits[cls]:
+                self._stats[cls]["rejected"] += 1
+                raise SchedulerFull(f"{cls} queue is full ({queued} waiting)")
+            ticket = _Ticket(cls, next(self._seq))
+            self._waiting.append(ticket)
+            self._cond.wait_for(lambda: ticket.granted)
+            self._record(cls, time.monotonic() - ticket.enqueued)
+
+    def release(self) -> None:
+        with self._cond:
+            self.busy -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, cls: str | None = None) -> Iterator[None]:
+        self.acquire(cls)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """Per-class call counts, queue depth and wait times (seconds)."""
+        with self._cond:
+            depth = {c: 0 for c in PRIORITY_CLASSES}
+            for t in self._waiting:
+                depth[t.cls] += 1
+            out = {}
+            for c, s in self._stats.items():
+                out[c] = {
+                    "calls": s["calls"],
+                    "rejected": s["rejected"],
+                    "queue_depth": depth[c],
+                    "wait_avg": s["wait_total"] / s["calls"] if s["calls"] else 0.0,
+                    "wait_max": s["wait_max"],
+                }
+            return out
+
+
+class ScheduledClient(ClientWrapper):
+    """Admit calls to ``inner`` through a :class:`PriorityScheduler`.
+
+    The class comes from ``priority_class=`` on the call or, more commonly,
+    from an enclosing :func:`llm_priority` block.
+    """
+
+    def __init__(self, inner: LLMClient, scheduler: PriorityScheduler) -> None:
+        super().__init__(inner)
+        self.scheduler = scheduler
+
+    def chat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        with self.scheduler.slot(kwargs.pop("priority_class", None)):
+            return self.inner.chat(messages, **kwargs)
+
+    def stream_chat(self, messages: List[BaseMessage], **kwargs) -> Iterable[AIMessage]:
+        with self.scheduler.slot(kwargs.pop("priority_class", None)):
+            yield from self.inner.stream_chat(messages, **kwargs)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with self.scheduler.slot():
+            return self.inner.embed(texts)
+
+    @asynccontextmanager
+    async def _aslot(self, cls: str | None) -> AsyncIterator[None]:
+        cls = cls or current_priority()
+        await acquire_in_thread(lambda: self.scheduler.acquire(cls), self.scheduler.release)
+        try:
+            yield
+        finally:
+            self.scheduler.release()
+
+    async def achat(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        async with self._aslot(kwargs.pop("priority_class", None)):
+            return await self.inner.achat(messages, **kwargs)
+
+    async def astream_chat(
+        self, messages: List[BaseMessage], **kwargs
+    ) -> AsyncIterator[AIMessage]:
+        async with self._aslot(kwargs.pop("priority_class", None)):
+            async for chunk in self.inner.astream_chat(messages, **kwargs):
+                yield chunk
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        async with self._aslot(None):
+            return await self.inner.aembed(texts)
+
+
+def scheduler_from_env() -> PriorityScheduler | None:
+    """Build a scheduler when ``LLM_SCHEDULER_SLOTS`` is set."""
+    slots = os.environ.get("LLM_SCHEDULER_SLOTS")
+    if not slots:
+        return None
+    return PriorityScheduler(
+        int(slots), aging=float(os.environ.get("LLM_SCHEDULER_AGING", 10.0))
+    )
+
+
+__all__ = [
+    "PRIORITY_CLASSES",
+    "PriorityScheduler",
+    "ScheduledClient",
+    "SchedulerFull",
+    "llm_priority",
+    "current_priority",
+    "scheduler_from_env",
+]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+"""Rolling summary memory that keeps per-turn prompt size bounded."""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from agent.llm_providers import llm_priority
+from agent.resources import shared
+from utils.token_counter import count_message_tokens, trim_messages
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SUMMARY_PROMPT = (
+    "Condense the conversation below into a short summary that keeps names,"
+    " decisions, open questions and commitments. Extend the previous summary"
+    " if one is given. Reply with the summary only."
+)
+
+
+def _feed(h, message: BaseMessage) -> None:
+    h.update(message.type.encode())
+    h.update(b"\0")
+    h.update(str(message.content).encode("utf-8"))
+    h.update(b"\1")
+
+
+def range_key(messages: List[BaseMessage]) -> str:
+    """Hash of the role and content of every message in ``messages``."""
+    h = hashlib.sha256()
+    for m in messages:
+        _feed(h, m)
+    return h.hexdigest()
+
+
+def boundary_keys(messages: List[BaseMessage], end: int, step: int) -> Dict[int, str]:
+    """``range_key(messages[:b])`` for every multiple ``b`` of ``step`` up to ``end``."""
+    h = hashlib.sha256()
+    keys: Dict[int, str] = {}
+    for i, m in enumerate(messages[:end], 1):
+        _feed(h, m)
+        if i % step == 0:
+            keys[i] = h.copy().hexdigest()
+    return keys
+
+
+class SummaryMemory:
+    """Replace old turns with a cached summary once history gets long.
+
+    History beyond ``keep_recent`` messages is summarized in blocks of
+    ``step`` messages. The cut point only moves every ``step`` messages,
+    so the summary for a range, keyed by :func:`range_key`, is reused on
+    the following turns. Each new block extends the previous summary
+    rather than re-reading the whole history. Compaction runs on a
+    background thread. Until it finishes, the newest ready summary and
+    the raw messages after it are sent, trimmed to ``max_tokens``.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: int = 2000,
+        keep_recent: int = 6,
+        step: int = 8,
+        max_tokens: int = 8192,
+        max_entries: int = 256,
+        background: bool = True,
+    ) -> None:
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.step = step
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self.background = background
+        self.hits = 0
+        self.misses = 0
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-memory")
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            text = self._summaries.get(key)
+            if text is not None:
+                self._summaries.move_to_end(key)
+            return text
+
+    def _put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._summaries[key] = text
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+    def _latest(self, keys: Dict[int, str], end: int) -> Tuple[int, str | None]:
+        """Newest cached summary covering ``messages[:b]`` for ``b <= end``."""
+        for b in range(end, 0, -self.step):
+            text = self._get(keys[b])
+            if text is not None:
+                return b, text
+        return 0, None
+
+    def _summarize(self, llm, previous: str | None, messages: List[BaseMessage]) -> str:
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in messages)
+        if previous:
+            transcript = f"Previous summary:\n{previous}\n\nNew messages:\n{transcript}"
+        with llm_priority("background"):
+            ai = llm.chat(
+                [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=transcript)],
+                profile="summary",
+            )
+        return ai.content.strip()
+
+    def _compact(self, llm, messages: List[BaseMessage], end: int) -> str:
+        """Build (and cache) summaries block by block up to ``messages[:end]``."""
+        keys = boundary_keys(messages, end, self.step)
+        start, text = self._latest(keys, end)
+        for b in range(start + self.step, end + 1, self.step):
+            text = self._summarize(llm, text, messages[b - self.step : b])
+            self._put(keys[b], text)
+        return text or ""
+
+    def _compact_logged(self, llm, messages: List[BaseMessage], end: int) -> str:
+        try:
+            return self._compact(llm, messages, end)
+        except Exception:
+            logging.warning("conversation summary failed", exc_info=True)
+            return ""
+
+    def _schedule(self, llm, messages: List[BaseMessage], key: str, end: int) -> Future:
+        with self._lock:
+            fut = self._pending.get(key)
+            if fut is None:
+                fut = self._pool.submit(self._compact_logged, llm, list(messages), end)
+                self._pending[key] = fut
+                fut.add_done_callback(lambda _f, k=key: self._drop_pending(k))
+        return fut
+
+    def _drop_pending(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def context(self, messages: List[BaseMessage], llm) -> List[BaseMessage]:
+        """Return the history to send: ``[summary] + recent`` when compacted."""
+        if count_message_tokens(messages) <= self.threshold:
+            return list(messages)
+        end = (len(messages) - self.keep_recent) // self.step * self.step
+        if end <= 0:
+            return trim_messages(messages, self.max_tokens)
+        keys = boundary_keys(messages, end, self.step)
+        text = self._get(keys[end])
+        covered = end
+        if text is None:
+            self.misses += 1
+            if self.background:
+                self._schedule(llm, messages, keys[end], end)
+                covered, text = self._latest(keys, end)
+            else:
+                text = self._compact_logged(llm, messages, end)
+                covered = end if text else 0
+        else:
+            self.hits += 1
+        history = list(messages[covered:])
+        if text:
+            # A user turn rather than a system message: providers that fold
+            # system messages into one instruction (Gemini) would otherwise
+            # change the cached guidelines prefix whenever the summary does.
+            history.insert(0, HumanMessage(content=SUMMARY_PREFIX + text))
+        return trim_messages(history, self.max_tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "summaries": len(self._summaries),
+                "pending": len(self._pending),
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def summary_memory() -> SummaryMemory:
+    """Process-wide memory configured from ``MEMORY_*`` env vars."""
+    return shared(
+        ("summary-memory",),
+        lambda: SummaryMemory(
+            threshold=int(os.environ.get("MEMORY_SUMMARY_THRESHOLD", 2000)),
+            keep_recent=int(os.environ.get("MEMORY_KEEP_RECENT", 6)),
+        ),
+    )
+
+
+__all__ = ["SummaryMemory", "summary_memory", "range_key"]
@@ -2,23 +2,25 @@
 
 from __future__ import annotations
 
-from agent.llm_providers import get_default_client
+from agent.llm_providers import get_default_client, llm_priority
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
 
+from .resources import qdrant_url, shared, shared_embeddings
+
 
 COLLECTION = "reflections_log"
 GUIDELINES_FILE = "guidelines.txt"
 
 
 def _load_reflections() -> list[str]:
-    client = QdrantClient(url="http://localhost:6333")
+    url = qdrant_url()
     store = Qdrant(
-        client=client,
+        client=shared(("qdrant", url), lambda: QdrantClient(url=url)),
         collection_name=COLLECTION,
-        embeddings=OllamaEmbeddings(),
+        embeddings=shared_embeddings("ollama", OllamaEmbeddings),
     )
     docs = store.similarity_search("recent reflections", k=20)
     return [d.page_content for d in docs]
@@ -29,7 +31,8 @@ def run_meta_agent() -> str | None:
     if not texts:
         return None
     llm = get_default_client()
-    ai: AIMessage = llm.chat([HumanMessage(content="\n".join(texts))])
+    with llm_priority("background"):
+        ai: AIMessage = llm.chat([HumanMessage(content="\n".join(texts))])
     with open(GUIDELINES_FILE, "w") as fh:
         fh.write(ai.content.strip())
     return ai.content.strip()
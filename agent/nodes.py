@@ -5,18 +5,28 @@ from __future__ import annotations
 from typing import List, Dict, Any
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from agent.llm_providers import get_default_client
+from agent.llm_providers import (
+    GenerationProfile,
+    cascade,
+    get_default_client,
+    get_small_client,
+    llm_priority,
+)
+import copy
+import logging
 import os
 import re
-import yaml
 import uuid
 from datetime import datetime
 
 from .state import AgentState
 from .tasks_db import add_task
+from .priority_rules import PRIORITY_RULES_FILE, engine_for, rule_engine
+from .score_cache import score_cache
+from .urgency_classifier import confident_predictions
 from langgraph.prebuilt import ToolNode
 from . import tools as agent_tools
-from utils.token_counter import trim_messages, count_message_tokens
+from utils.token_counter import trim_messages, trim_messages_with_delta
 from .retrieve_context import query_pkg, filter_qdrant_by_entities
 
 tool_node = ToolNode(agent_tools.build_action_tools())
@@ -29,11 +39,34 @@ def remaining_steps(task: dict) -> bool:
 GUIDELINES_FILE = "guidelines.txt"
 
 
+_guidelines_cache: tuple[str, tuple[int, int], str] | None = None
+
+
+def _model_name(llm) -> str | None:
+    """Model id used to pick the tokenizer for trimming budgets."""
+    model = getattr(llm, "model", None)
+    return model if isinstance(model, str) else None
+
+
 def _load_guidelines() -> str:
-    if not os.path.exists(GUIDELINES_FILE):
+    """Return the guidelines text, re-reading the file only when it changes.
+
+    The same string object is reused between calls so the system prompt
+    stays byte-identical and provider-side prefix caches keep hitting.
+    """
+    global _guidelines_cache
+    try:
+        st = os.stat(GUIDELINES_FILE)
+    except OSError:
         return ""
+    cached = _guidelines_cache
+    stamp = (st.st_mtime_ns, st.st_size)
+    if cached and cached[0] == GUIDELINES_FILE and cached[1] == stamp:
+        return cached[2]
     with open(GUIDELINES_FILE) as fh:
-        return fh.read().strip()
+        text = fh.read().strip()
+    _guidelines_cache = (GUIDELINES_FILE, stamp, text)
+    return text
 
 
 
@@ -41,23 +74,40 @@ def _load_guidelines() -> str:
 # --- Nodes --------------------------------------------------------------------
 
 
+def _query_pkg_cached(state: AgentState, query: str) -> tuple:
+    """Run :func:`query_pkg` once per query per graph run.
+
+    Results live in ``state["pkg_cache"]`` so later nodes (and later loops
+    through ``retrieve``) reuse them. Returns ``(doc_ids, meta, cache, hit)``;
+    the node must return ``cache`` as ``pkg_cache`` to persist it.
+    """
+    cache = dict(state.get("pkg_cache") or {})
+    entry = cache.get(query)
+    if entry is not None:
+        return entry["doc_ids"], entry["meta"], cache, True
+    doc_ids, meta = query_pkg(query)
+    cache[query] = {"doc_ids": doc_ids, "meta": meta}
+    return doc_ids, meta, cache, False
+
+
 def retrieve_context(state: AgentState) -> Dict[str, Any]:
     """Retrieve docs using PKG guidance and return metadata."""
     query = state["messages"][-1].content
-    _, meta = query_pkg(query)
+    _, meta, cache, hit = _query_pkg_cached(state, query)
     entities = [m["entity"] for m in meta if "entity" in m]
     docs, rmeta = filter_qdrant_by_entities(query, entities)
     return {
         "context_docs": [d.page_content for d in docs],
         "graph_metadata": meta,
-        "retrieval_meta": rmeta,
+        "retrieval_meta": {**rmeta, "pkg_cache_hit": hit},
+        "pkg_cache": cache,
     }
 
 
 def plan_step(state: AgentState) -> Dict[str, Any]:
     """Generate a task list informed by PKG context."""
     prompt = state["messages"][-1].content
-    _, meta = query_pkg(prompt)
+    _, meta, cache, _ = _query_pkg_cached(state, prompt)
     parts = []
     for m in meta:
         if "email" in m:
@@ -65,7 +115,7 @@ def plan_step(state: AgentState) -> Dict[str, Any]:
         else:
             parts.append(m["entity"])
     context = ", ".join(parts)
-    llm = get_default_client()
+    llm = cascade(get_default_client(), get_small_client(), _plan_acceptor, "plan")
     user_prompt = (
         f"Known entities: {context}\nUser request: {prompt}\nPlan as bullet list."
     )
@@ -74,55 +124,150 @@ def plan_step(state: AgentState) -> Dict[str, Any]:
     if guidelines:
         messages.append(SystemMessage(content=guidelines))
     messages.append(HumanMessage(content=user_prompt))
-    before = count_message_tokens(messages)
-    trimmed = trim_messages(messages)
-    after = count_message_tokens(trimmed)
-    meta_info = {"trimmed": True, "token_delta": before - after} if after < before else {}
-    ai: AIMessage = llm.chat(trimmed, metadata=meta_info)
+    trimmed, delta = trim_messages_with_delta(messages, model=_model_name(llm))
+    meta_info = {"trimmed": True, "token_delta": delta} if delta else {}
+    with llm_priority("interactive"):
+        ai: AIMessage = llm.chat(trimmed, metadata=meta_info, profile="plan")
     tasks = [t.strip("- ") for t in ai.content.splitlines() if t.strip()]
-    return {"tasks": tasks}
-
-
-PRIORITY_RULES_FILE = "rules/priority.yml"
+    return {"tasks": tasks, "pkg_cache": cache}
 
 
 def load_priority_rules(path: str = PRIORITY_RULES_FILE) -> dict:
-    """Load priority rules from YAML, return empty dict if missing."""
-    if not os.path.exists(path):
-        return {}
-    with open(path, "r") as fh:
-        return yaml.safe_load(fh)
+    """Load priority rules from YAML, return empty dict if missing.
+
+    The file is only re-parsed when its mtime or size changes; each call
+    returns a fresh copy, so callers may modify it.
+    """
+    return copy.deepcopy(rule_engine(path).rules)
 
 
 def apply_deterministic_rules(
     objective: str, sender: str | None, rules: dict
 ) -> str | None:
     """Return priority if a deterministic rule matches."""
-    domain = sender.split("@")[-1] if sender else None
-    if domain and domain in rules.get("bank_whitelist", []):
-        return "high"
-    for pat in rules.get("patterns", []):
-        regex = pat.get("regex")
-        priority = pat.get("priority")
-        if regex and re.search(regex, objective, re.IGNORECASE):
-            return priority
-    return None
+    return engine_for(rules).classify(objective, sender)
 
 
-def _score_with_llm(llm, objective: str) -> float:
-    """Return a numeric urgency score using the LLM (0-1)."""
+def _score_with_llm(llm, objective: str) -> float | None:
+    """Return a numeric urgency score using the LLM (0-1), ``None`` if unparsed."""
     prompt = (
         "On a scale from 0 to 1, how urgent is the following task?"
         " Respond with just the number.\nTask: "
         + objective
     )
-    msgs = trim_messages([HumanMessage(content=prompt)])
-    ai: AIMessage = llm.chat(msgs)
-    match = re.search(r"0(?:\.\d+)?|1(?:\.0+)?", ai.content)
+    msgs = trim_messages([HumanMessage(content=prompt)], model=_model_name(llm))
+    ai: AIMessage = llm.chat(msgs, profile="score")
+    return _parse_score(ai.content)
+
+
+SCORE_BATCH_MAX = 10
+_BATCH_LINE = re.compile(r"^\s*(\d+)\s*[:.)=-]\s*(0(?:\.\d+)?|1(?:\.0+)?)\b")
+
+
+def _score_batch_prompt(objectives: List[str]) -> str:
+    items = "\n".join(f"{i}. {obj}" for i, obj in enumerate(objectives, 1))
+    return (
+        "On a scale from 0 to 1, how urgent is each of the following tasks?"
+        " Reply with one line per task in the form `<number>: <score>` and"
+        " nothing else.\nTasks:\n" + items
+    )
+
+
+def _parse_batch_scores(text: str) -> Dict[int, float]:
+    """Map 1-based item numbers to the scores found in ``text``."""
+    scores: Dict[int, float] = {}
+    for line in text.splitlines():
+        match = _BATCH_LINE.match(line)
+        if match:
+            scores[int(match.group(1))] = float(match.group(2))
+    return scores
+
+
+def _score_batch_with_llm(llm, objectives: List[str]) -> List[float | None]:
+    """Score several objectives with one LLM call; ``None`` if unparsed."""
+    msgs = trim_messages(
+        [HumanMessage(content=_score_batch_prompt(objectives))], model=_model_name(llm)
+    )
+    profile = GenerationProfile("score_batch", max_tokens=8 * len(objectives) + 8, temperature=0.0)
+    try:
+        ai: AIMessage = llm.chat(msgs, profile=profile)
+    except Exception:
+        logging.warning("batched urgency scoring failed", exc_info=True)
+        return [None] * len(objectives)
+    parsed = _parse_batch_scores(ai.content)
+    return [parsed.get(i) for i in range(1, len(objectives) + 1)]
+
+
+def _score_many(
+    llm, objectives: List[str], batch_max: int = SCORE_BATCH_MAX, batch_llm=None
+) -> List[float | None]:
+    """Score ``objectives`` in batches of ``batch_max``.
+
+    Items missing from a batch reply are re-scored one by one with
+    :func:`_score_with_llm`, as is a single objective; ``None`` marks an
+    objective no reply could be parsed for. ``batch_llm`` defaults to
+    ``llm``.
+    """
+    if len(objectives) <= 1 or batch_max <= 1:
+        return [_score_with_llm(llm, obj) for obj in objectives]
+    batch_llm = batch_llm or llm
+    scores: List[float | None] = []
+    for start in range(0, len(objectives), batch_max):
+        chunk = objectives[start : start + batch_max]
+        batch = _score_batch_with_llm(batch_llm, chunk) if len(chunk) > 1 else [None]
+        scores.extend(
+            _score_with_llm(llm, obj) if score is None else score
+            for obj, score in zip(chunk, batch)
+        )
+    return scores
+
+
+def _parse_score(text: str) -> float | None:
+    match = re.search(r"0(?:\.\d+)?|1(?:\.0+)?", text)
     try:
-        return float(match.group()) if match else 0.0
+        return float(match.group()) if match else None
     except Exception:
-        return 0.0
+        return None
+
+
+def _clear_of_thresholds(rules: dict):
+    """Return a predicate: is a score at least ``cascade_band`` from every cut?"""
+    t = rules.get("llm_thresholds", {})
+    cuts = [t.get("critical", 0.95), t.get("high", 0.75), t.get("med", 0.5)]
+    band = rules.get("cascade_band", 0.05)
+    return lambda score: all(abs(score - c) >= band for c in cuts)
+
+
+def _score_acceptor(rules: dict):
+    """Accept a small-model score unless unparseable or near a threshold."""
+    clear = _clear_of_thresholds(rules)
+
+    def accept(ai: AIMessage) -> bool:
+        score = _parse_score(ai.content)
+        return score is not None and clear(score)
+
+    return accept
+
+
+def _score_batch_acceptor(rules: dict):
+    """Accept a small-model batch when every parsed score is clear of the cuts.
+
+    Items the small model skipped are re-scored one by one afterwards, so
+    only ambiguous scores escalate the whole batch.
+    """
+    clear = _clear_of_thresholds(rules)
+
+    def accept(ai: AIMessage) -> bool:
+        scores = _parse_batch_scores(ai.content).values()
+        return bool(scores) and all(clear(s) for s in scores)
+
+    return accept
+
+
+def _plan_acceptor(ai: AIMessage) -> bool:
+    """Accept a plan only if it is a non-empty bullet or numbered list."""
+    lines = [line.strip() for line in ai.content.splitlines() if line.strip()]
+    return bool(lines) and all(re.match(r"([-*\u2022]|\d+[.)])\s*\S", line) for line in lines)
 
 
 def _priority_from_score(score: float, rules: dict) -> str:
@@ -137,51 +282,104 @@ def _priority_from_score(score: float, rules: dict) -> str:
     return rules.get("default", "low")
 
 
+PRIORITY_ORDER = {"low": 1, "med": 2, "high": 3, "critical": 4}
+
+
+def _score_cache_version(rules_version: str) -> str:
+    """Key cached scores to the rules and to the models that produce them."""
+    backend = os.environ.get("LLM_BACKEND", "ollama").lower()
+    small = get_small_client()
+    models = [_model_name(get_default_client()), _model_name(small) if small else None]
+    return ":".join([rules_version, backend, *(m or "-" for m in models)])
+
+
+def _decide_priorities(items: List[tuple], rules: dict) -> List[tuple]:
+    """Return ``(priority, decided_by)`` for each ``(objective, sender)``.
+
+    The higher of the rule and LLM priorities wins, so a rule returning the
+    top level decides without scoring. Other objectives reuse a cached
+    score for the same normalized text, rules version and scoring models
+    (unparsed replies are never cached), then the local
+    urgency classifier answers where it is confident, and only the rest
+    are scored by the LLM.
+    """
+    engine = engine_for(rules)
+    objectives = [obj for obj, _ in items]
+    deterministic = engine.classify_many(objectives, [sender for _, sender in items])
+    top = max(PRIORITY_ORDER, key=PRIORITY_ORDER.get)
+    need = [i for i, pr in enumerate(deterministic) if pr != top]
+    predicted: Dict[int, str] = {}
+    source: Dict[int, str] = {}
+    if need:
+        cache = score_cache()
+        version = _score_cache_version(engine.version)
+        for i, score in zip(need, cache.get_many([objectives[i] for i in need], version)):
+            if score is not None:
+                predicted[i], source[i] = _priority_from_score(score, rules), "cache"
+        missing = [i for i in need if i not in predicted]
+        guesses = confident_predictions([objectives[i] for i in missing])
+        for i, guess in zip(missing, guesses):
+            if guess is not None:
+                predicted[i], source[i] = guess, "classifier"
+        missing = [i for i in missing if i not in predicted]
+        if missing:
+            default, small = get_default_client(), get_small_client()
+            llm = cascade(default, small, _score_acceptor(rules), "score")
+            batch_llm = cascade(default, small, _score_batch_acceptor(rules), "score_batch")
+            fresh = _score_many(
+                llm,
+                [objectives[i] for i in missing],
+                rules.get("score_batch_max", SCORE_BATCH_MAX),
+                batch_llm=batch_llm,
+            )
+            for i, score in zip(missing, fresh):
+                # An unparsed reply counts as 0.0 here but is never cached.
+                predicted[i], source[i] = _priority_from_score(score or 0.0, rules), "llm"
+            scored = {objectives[i]: s for i, s in zip(missing, fresh) if s is not None}
+            if scored:
+                cache.put_many(scored, version)
+
+    out = []
+    for i, pr_det in enumerate(deterministic):
+        if i not in predicted:
+            out.append((pr_det, "rule"))
+            continue
+        pr_model = predicted[i]
+        if pr_det is not None and PRIORITY_ORDER.get(pr_det, 0) >= PRIORITY_ORDER.get(pr_model, 0):
+            out.append((pr_det, "rule"))
+        else:
+            out.append((pr_model, source[i]))
+    return out
+
+
 def prioritise(state: AgentState) -> Dict[str, Any]:
     """Assign priority using deterministic rules then LLM."""
     rules = load_priority_rules()
-    llm = get_default_client()
 
     if state.get("current_task"):
         task = state["current_task"]
-        obj = task.get("objective", "")
-        sender = task.get("sender")
-        pr_det = apply_deterministic_rules(obj, sender, rules)
-        score = _score_with_llm(llm, obj)
-        pr_llm = _priority_from_score(score, rules)
-        if pr_det is None:
-            pr = pr_llm
-        else:
-            order = {"low": 1, "med": 2, "high": 3, "critical": 4}
-            pr = pr_det if order.get(pr_det, 0) >= order.get(pr_llm, 0) else pr_llm
+        [(pr, decided_by)] = _decide_priorities(
+            [(task.get("objective", ""), task.get("sender"))], rules
+        )
         task["priority"] = pr
+        task["decided_by"] = decided_by
         task["status"] = "READY"
         add_task(task)
         return {"current_task": task}
 
-    tasks = state.get("tasks", [])
+    tasks = [
+        (t.get("objective", ""), t.get("sender")) if isinstance(t, dict) else (t, None)
+        for t in state.get("tasks", [])
+    ]
     results = []
-    for t in tasks:
-        if isinstance(t, dict):
-            obj = t.get("objective", "")
-            sender = t.get("sender")
-        else:
-            obj = t
-            sender = None
-        pr_det = apply_deterministic_rules(obj, sender, rules)
-        score = _score_with_llm(llm, obj)
-        pr_llm = _priority_from_score(score, rules)
-        if pr_det is None:
-            pr = pr_llm
-        else:
-            order = {"low": 1, "med": 2, "high": 3, "critical": 4}
-            pr = pr_det if order.get(pr_det, 0) >= order.get(pr_llm, 0) else pr_llm
+    for (obj, _), (pr, decided_by) in zip(tasks, _decide_priorities(tasks, rules)):
         results.append(
             {
                 "task_id": str(uuid.uuid4()),
                 "created_at": datetime.utcnow().isoformat() + "Z",
                 "objective": obj,
                 "priority": pr,
+                "decided_by": decided_by,
                 "status": "READY",
                 "subtasks": [],
                 "last_updated": datetime.utcnow().isoformat() + "Z",
@@ -196,10 +394,11 @@ def execute_tool(state: AgentState) -> Dict[str, Any]:
     task = state["current_task"]
     try:
         tool_calls = task.get("tool_calls", [])
-        before = count_message_tokens(tool_calls) if isinstance(tool_calls, list) else 0
-        trimmed_calls = trim_messages(tool_calls) if isinstance(tool_calls, list) else tool_calls
-        after = count_message_tokens(trimmed_calls) if isinstance(trimmed_calls, list) else 0
-        meta_info = {"trimmed": True, "token_delta": before - after} if after < before else {}
+        if isinstance(tool_calls, list):
+            trimmed_calls, delta = trim_messages_with_delta(tool_calls)
+        else:
+            trimmed_calls, delta = tool_calls, 0
+        meta_info = {"trimmed": True, "token_delta": delta} if delta else {}
         result = tool_node.invoke(trimmed_calls, config={"metadata": meta_info})
         task["tool_output"] = result
         task["status"] = "IN_PROGRESS" if remaining_steps(task) else "DONE"
@@ -212,17 +411,17 @@ def execute_tool(state: AgentState) -> Dict[str, Any]:
 def generate_response(state: AgentState) -> Dict[str, Any]:
     """Summarize tool output as final message."""
     llm = get_default_client()
-    prompt = f"Task {state.get('current_task', {}).get('objective')}: {state.get('tool_output', '')}"
+    task = state.get("current_task", {})
+    prompt = f"Task {task.get('objective')}: {state.get('tool_output', '')}"
     guidelines = _load_guidelines()
     messages: List[BaseMessage] = []
     if guidelines:
         messages.append(SystemMessage(content=guidelines))
     messages.append(HumanMessage(content=prompt))
-    before = count_message_tokens(messages)
-    trimmed = trim_messages(messages)
-    after = count_message_tokens(trimmed)
-    meta_info = {"trimmed": True, "token_delta": before - after} if after < before else {}
-    ai: AIMessage = llm.chat(trimmed, metadata=meta_info)
+    trimmed, delta = trim_messages_with_delta(messages, model=_model_name(llm))
+    meta_info = {"trimmed": True, "token_delta": delta} if delta else {}
+    with llm_priority("interactive"):
+        ai: AIMessage = llm.chat(trimmed, metadata=meta_info, profile="respond")
     return {"messages": state.get("messages", []) + [ai], "current_task": None}
 
 
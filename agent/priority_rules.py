@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+"""Precompiled deterministic priority rules (``rules/priority.yml``)."""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import yaml
+
+PRIORITY_RULES_FILE = "rules/priority.yml"
+
+_LEADING_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+# Constructs that stop a pattern from being lower-cased and joined with the
+# others: case-dependent escapes, numbered back-references, inline flags,
+# anchors and lookarounds (objectives are joined with newlines in bulk).
+_NOT_FOLDABLE = re.compile(r"\\[A-Z0-9xuN]|\(\?[aiLmsux-]+[:)]|\(\?<?[=!]|\^|\$")
+
+
+def _folded(regex: str) -> str | None:
+    """Lower-cased form of a case-insensitive pattern, or ``None``.
+
+    Searching the folded pattern in lower-cased ASCII text gives the same
+    result as ``re.IGNORECASE`` on the original, and avoids the slow
+    case-insensitive scan of the ``re`` engine.
+    """
+    match = _LEADING_FLAGS.match(regex)
+    if match:
+        if match.group(1) != "i":
+            return None
+        regex = regex[match.end():]
+    if not regex.isascii() or _NOT_FOLDABLE.search(regex):
+        return None
+    return regex.lower()
+
+
+def rules_version(rules: dict | None) -> str:
+    """Digest identifying the content of a rules mapping."""
+    blob = json.dumps(rules or {}, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class RuleEngine:
+    """Classify objectives with the deterministic rules in one pass.
+
+    A whitelisted sender domain wins (``high``); otherwise the first pattern
+    in file order that matches decides. Patterns are lower-cased (see
+    :func:`_folded`) and joined into one screening alternation, so an
+    objective that matches no rule costs a single case-sensitive scan of
+    its lower-cased text; only objectives that pass the screen are checked
+    against the patterns in order. Whitelist entries starting with ``.``
+    also match every subdomain.
+
+    :meth:`classify_many` runs the screen once over all objectives joined
+    by newlines. Rule sets that cannot be folded and non-ASCII objectives
+    use the plain per-pattern ``re.IGNORECASE`` path instead.
+    """
+
+    def __init__(self, rules: dict | None) -> None:
+        self.rules = rules or {}
+        # Identifies the rule set, e.g. to key cached scores to it.
+        self.version = rules_version(self.rules)
+        domains = [str(d).lower() for d in self.rules.get("bank_whitelist") or []]
+        self.domains = frozenset(d for d in domains if not d.startswith("."))
+        self.suffixes = frozenset(d.lstrip(".") for d in domains if d.startswith("."))
+        self.patterns: List[Tuple[re.Pattern, str]] = []
+        for pat in self.rules.get("patterns") or []:
+            if pat.get("regex"):
+                self.patterns.append((re.compile(pat["regex"], re.IGNORECASE), pat.get("priority")))
+        self._folded: List[Tuple[re.Pattern, str]] | None = None
+        self._screen: re.Pattern | None = None
+        folded = [_folded(p.pattern) for p, _ in self.patterns]
+        if folded and None not in folded:
+            try:
+                self._folded = [(re.compile(f), pr) for f, (_, pr) in zip(folded, self.patterns)]
+                # No grouping: a flat alternation keeps re's literal prefilter.
+                self._screen = re.compile("|".join(folded))
+            except re.error:
+                self._folded = self._screen = None
+
+    def _domain_priority(self, sender: str | None) -> str | None:
+        if not sender:
+            return None
+        domain = sender.rsplit("@", 1)[-1].lower()
+        if domain in self.domains:
+            return "high"
+        if self.suffixes:
+            parts = domain.split(".")
+            for i in range(1, len(parts)):
+                if ".".join(parts[i:]) in self.suffixes:
+                    return "high"
+        return None
+
+    def _pattern_priority(self, objective: str) -> str | None:
+        if self._screen is None or not objective.isascii():
+            return self._first_match(self.patterns, objective)
+        text = objective.lower()
+        if not self._screen.search(text):
+            return None
+        return self._first_match(self._folded, text)
+
+    @staticmethod
+    def _first_match(patterns: List[Tuple[re.Pattern, str]], text: str) -> str | None:
+        for regex, priority in patterns:
+            if regex.search(text):
+                return priority
+        return None
+
+    def _patterns_many(self, objectives: List[str]) -> List[str | None]:
+        if self._screen is None or not objectives:
+            return [self._pattern_priority(o) for o in objectives]
+        todo = {i for i, o in enumerate(objectives) if not o.isascii()}
+        texts = [("" if i in todo else o) for i, o in enumerate(objectives)] if todo else objectives
+        starts = list(accumulate((len(t) + 1 for t in texts[:-1]), initial=0))
+        for match in self._screen.finditer("\n".join(texts).lower()):
+            first = bisect_right(starts, match.start()) - 1
+            last = bisect_right(starts, max(match.end() - 1, match.start())) - 1
+            todo.update(range(first, last + 1))
+        out: List[str | None] = [None] * len(objectives)
+        for i in todo:
+            out[i] = self._pattern_priority(objectives[i])
+        return out
+
+    def classify(self, objective: str, sender: str | None = None) -> str | None:
+        """Return the deterministic priority or ``None`` when no rule applies."""
+        return self._domain_priority(sender) or self._pattern_priority(objective)
+
+    def classify_many(
+        self, objectives: Sequence[str], senders: Iterable[str | None] | None = None
+    ) -> List[str | None]:
+        """Classify many objectives with one regex scan over all of them."""
+        out = self._patterns_many(list(objectives))
+        if senders is not None:
+            for i, sender in enumerate(senders):
+                if sender and self._domain_priority(sender):
+                    out[i] = "high"
+        return out
+
+
+_engines: Dict[str, Tuple[Tuple[int, int], RuleEngine]] = {}
+_last: RuleEngine | None = None
+_lock = threading.Lock()
+
+
+def rule_engine(path: str = PRIORITY_RULES_FILE) -> RuleEngine:
+    """Return the engine for ``path``, rebuilt only when the file changes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return RuleEngine({})
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _engines.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r") as fh:
+        engine = RuleEngine(yaml.safe_load(fh))
+    with _lock:
+        _engines[path] = (stamp, engine)
+    return engine
+
+
+def engine_for(rules: dict) -> RuleEngine:
+    """Return a compiled engine for an already-loaded rules mapping.
+
+    Engines are matched on :func:`rules_version`, so a copy of a loaded
+    mapping reuses its engine and an edited one gets a fresh engine.
+    """
+    global _last
+    version = rules_version(rules)
+    for _, engine in list(_engines.values()):
+        if engine.version == version:
+            return engine
+    last = _last
+    if last is not None and last.version == version:
+        return last
+    _last = RuleEngine(rules)
+    return _last
+
+
+__all__ = ["PRIORITY_RULES_FILE", "RuleEngine", "rule_engine", "engine_for", "rules_version"]
@@ -0,0 +1,128 @@
+"""Process-wide registry of long-lived clients and connection pools."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from neo4j import GraphDatabase
+
+
+class ResourceRegistry:
+    """Thread-safe cache of shared clients keyed by backend/model/URL.
+
+    ``get`` builds a resource with ``factory`` the first time a key is seen
+    and hands the same instance to every later caller. ``close``/``reset``
+    release resources (calling ``close()`` where available) so tests and
+    shutdown hooks can start from a clean slate.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._items: Dict[Hashable, Any] = {}
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the resource stored under ``key``, creating it if needed."""
+        try:
+            return self._items[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = factory()
+            return self._items[key]
+
+    def keys(self) -> list[Hashable]:
+        with self._lock:
+            return list(self._items)
+
+    def close(self, key: Hashable) -> None:
+        """Close and forget a single resource."""
+        with self._lock:
+            item = self._items.pop(key, None)
+        _close_quietly(item)
+
+    def reset(self) -> None:
+        """Close and forget every resource."""
+        with self._lock:
+            items = list(self._items.values())
+            self._items.clear()
+        for item in items:
+            _close_quietly(item)
+
+
+def _close_quietly(item: Any) -> None:
+    close = getattr(item, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception:  # pragma: no cover - best effort on shutdown
+        logging.debug("failed to close %r", item, exc_info=True)
+
+
+registry = ResourceRegistry()
+atexit.register(registry.reset)
+
+
+def shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Return the process-wide resource for ``key`` from the registry."""
+    return registry.get(key, factory)
+
+
+def reset_resources() -> None:
+    """Close all shared clients; intended for tests and shutdown."""
+    registry.reset()
+
+
+# --- Common backends ---------------------------------------------------------
+
+
+def qdrant_url() -> str:
+    return os.environ.get("QDRANT_URL", "http://localhost:6333")
+
+
+def shared_embeddings(name: str, factory: Callable[[], Any]) -> Any:
+    """Return the shared LangChain embeddings for ``name``.
+
+    The model is wrapped with the request batcher when
+    ``EMBED_BATCH_WINDOW_MS`` is set and with the on-disk embedding cache
+    when ``EMBED_CACHE_DIR`` is set, so only cache misses get batched.
+    """
+    from .llm_providers.batching import batched_embeddings
+    from .llm_providers.embedding_cache import cached_embeddings
+
+    return shared(
+        ("embeddings", name), lambda: cached_embeddings(batched_embeddings(factory()))
+    )
+
+
+def neo4j_auth() -> Tuple[str, str]:
+    """Return ``(user, password)`` from ``NEO4J_AUTH`` or ``NEO4J_PASSWORD``."""
+    auth_str = os.environ.get("NEO4J_AUTH")
+    if auth_str:
+        user, pwd = auth_str.split("/", 1)
+        return user, pwd
+    return "neo4j", os.environ.get("NEO4J_PASSWORD", "password")
+
+
+def neo4j_driver() -> Any:
+    """Return the shared Neo4j driver; the driver pools bolt connections."""
+    url = os.environ.get("NEO4J_URL", "bolt://localhost:7687")
+    auth = neo4j_auth()
+    return shared(("neo4j", url, auth[0]), lambda: GraphDatabase.driver(url, auth=auth))
+
+
+__all__ = [
+    "ResourceRegistry",
+    "registry",
+    "shared",
+    "reset_resources",
+    "qdrant_url",
+    "shared_embeddings",
+    "neo4j_auth",
+    "neo4j_driver",
+]
@@ -2,54 +2,186 @@ from __future__ import annotations
 
 """Helper functions for PKG-aware retrieval."""
 
-from typing import Tuple, List
+from collections import OrderedDict
+from typing import Dict, Tuple, List
 import os
 import logging
+import re
+import threading
 
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
 from langchain_core.documents import Document
 from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
+
+from ingestion.gazetteer import gazetteer
+from ingestion.trigram_index import trigram_index
+from ingestion.pkg_config import ALLOWED_NODE_TYPES, ENTITY_NAME_INDEX, graph_version
+
+from .resources import neo4j_driver, qdrant_url, shared, shared_embeddings
 
 
 # --- PKG Query --------------------------------------------------------------
 
+PKG_CACHE_SIZE = int(os.environ.get("PKG_CACHE_SIZE", 1024))
+MAX_QUERY_TERMS = 16
 
-def query_pkg(query: str) -> Tuple[List[str], List[dict]]:
-    """Return related document IDs and metadata from the graph."""
-    auth_str = os.environ.get("NEO4J_AUTH")
-    if auth_str:
-        user, pwd = auth_str.split("/", 1)
-    else:
-        user = "neo4j"
-        pwd = os.environ.get("NEO4J_PASSWORD", "password")
+_TERM = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    """a an and are as at be but by can could do does for from have how i in is it
+    me my of on or our please should so that the their them then there these this
+    to us was we what when where which who will with would you your""".split()
+)
+
+_pkg_cache: "OrderedDict[str, Tuple[tuple, List[str], List[dict]]]" = OrderedDict()
+_pkg_lock = threading.Lock()
+pkg_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+# Graph version at which the full-text index was found missing.
+_fulltext_missing: tuple | None = None
 
-    driver = GraphDatabase.driver(
-        os.environ.get("NEO4J_URL", "bolt://localhost:7687"),
-        auth=(user, pwd),
+
+def clear_pkg_cache() -> None:
+    global _fulltext_missing
+    with _pkg_lock:
+        _pkg_cache.clear()
+        pkg_cache_stats.update(hits=0, misses=0)
+        _fulltext_missing = None
+
+
+def query_pkg(query: str) -> Tuple[List[str], List[dict]]:
+    """Return related document IDs and metadata from the graph.
+
+    Results are cached process-wide (LRU, ``PKG_CACHE_SIZE`` queries) and
+    stay valid until ``ingestion.build_pkg`` bumps the graph version, so
+    between builds repeated questions skip Neo4j entirely.
+    """
+    version = graph_version()
+    with _pkg_lock:
+        entry = _pkg_cache.get(query)
+        if entry is not None and entry[0] == version:
+            _pkg_cache.move_to_end(query)
+            pkg_cache_stats["hits"] += 1
+            return list(entry[1]), [dict(m) for m in entry[2]]
+        pkg_cache_stats["misses"] += 1
+    doc_ids, data = _run_pkg_query(query)
+    with _pkg_lock:
+        _pkg_cache[query] = (version, doc_ids, data)
+        _pkg_cache.move_to_end(query)
+        while len(_pkg_cache) > PKG_CACHE_SIZE:
+            _pkg_cache.popitem(last=False)
+    return list(doc_ids), [dict(m) for m in data]
+
+
+def query_terms(query: str) -> List[str]:
+    """Candidate entity-name terms from a free-text prompt.
+
+    Stop words and single characters are dropped; Lucene syntax cannot leak
+    in because terms are plain ``\\w+`` tokens.
+    """
+    terms: List[str] = []
+    for tok in _TERM.findall(query.lower()):
+        if len(tok) > 1 and tok not in _STOPWORDS and tok not in terms:
+            terms.append(tok)
+    return terms[:MAX_QUERY_TERMS]
+
+
+_FULLTEXT_QUERY = """
+CALL db.index.fulltext.queryNodes($index, $terms) YIELD node AS e, score
+MATCH (d:Document)-[r]->(e)
+RETURN d.id AS id, e.name AS entity, e.email AS email
+ORDER BY score DESC
+LIMIT 10
+"""
+
+# Substring scan used before the full-text index existed; only run while a
+# graph built by an older ``build_pkg`` lacks ``ENTITY_NAME_INDEX``.
+_CONTAINS_QUERY = """
+MATCH (d:Document)-[r]->(e)
+WHERE toLower(e.name) CONTAINS toLower($q)
+RETURN d.id AS id, e.name AS entity, e.email AS email
+LIMIT 10
+"""
+
+# One labelled branch per node type so each lookup uses the name index.
+_EXACT_QUERY = (
+    "UNWIND $names AS name CALL { "
+    + " UNION ".join(
+        f"WITH name MATCH (e:{label} {{name: name}}) RETURN e"
+        for label in sorted(ALLOWED_NODE_TYPES)
     )
+    + """ }
+MATCH (d:Document)-[r]->(e)
+RETURN d.id AS id, e.name AS entity, e.email AS email
+LIMIT 10
+"""
+)
+
+
+def mentioned_entities(query: str) -> List[str]:
+    """Entity names ``query`` mentions, from the local PKG indexes.
+
+    Exact gazetteer matches come first, then fuzzy trigram candidates
+    (typos, "Acme corp" for "Acme Corporation") above
+    ``PKG_FUZZY_THRESHOLD``, searched only in the parts of the prompt the
+    gazetteer did not match. Empty when ``ingestion.build_pkg`` has not
+    built the indexes yet.
+    """
+    gaz, index = gazetteer(), trigram_index()
+    found, rest = gaz.scan(query) if gaz is not None else ([], [query])
+    names = [m["entity"] for m in found]
+    if index is not None and rest:
+        names += [c["entity"] for c in index.candidates(rest) if c["entity"] not in names]
+    return names
+
+
+def _run_pkg_query(query: str) -> Tuple[List[str], List[dict]]:
+    """Query Neo4j for the entities ``query`` mentions.
+
+    Mentions found in-process by the local indexes built by
+    ``ingestion.build_pkg`` are looked up by exact name. Prompts without
+    one (partial names such as "acme" for "Acme Corporation", or no indexes
+    yet) go through the full-text index on the query terms instead, or
+    through the old ``CONTAINS`` scan while that index does not exist.
+    """
+    global _fulltext_missing
+    names = mentioned_entities(query)
+    if names:
+        cypher, params = _EXACT_QUERY, {"names": names}
+    elif _fulltext_missing == graph_version():
+        cypher, params = _CONTAINS_QUERY, {"q": query}
+    else:
+        terms = query_terms(query)
+        if not terms:
+            return [], []
+        cypher, params = _FULLTEXT_QUERY, {"index": ENTITY_NAME_INDEX, "terms": " OR ".join(terms)}
+    driver = neo4j_driver()
     with driver.session() as session:
-        result = session.run(
-            """
-            MATCH (d:Document)-[r]->(e)
-            WHERE toLower(e.name) CONTAINS toLower($q)
-            RETURN d.id AS id, e.name AS entity, e.email AS email
-            LIMIT 10
-            """,
-            q=query,
-        )
-        data = []
-        for record in result:
-            entity = record.get("entity")
-            doc_id = record.get("id")
-            email = record.get("email")
-            item = {"entity": entity}
-            if doc_id is not None:
-                item["doc_id"] = doc_id
-            if email is not None:
-                item["email"] = email
-            data.append(item)
+        try:
+            records = list(session.run(cypher, **params))
+        except ClientError as exc:
+            missing_index = "no such fulltext schema index" in str(exc).lower()
+            if cypher is not _FULLTEXT_QUERY or not missing_index:
+                raise
+            # Graph built before the index existed: rerun ingestion.build_pkg
+            # (or install_constraints) to create it. Retried after the next build.
+            logging.warning(
+                "full-text index %r is missing; falling back to a CONTAINS scan", ENTITY_NAME_INDEX
+            )
+            _fulltext_missing = graph_version()
+            records = list(session.run(_CONTAINS_QUERY, q=query))
+    data = []
+    for record in records:
+        entity = record.get("entity")
+        doc_id = record.get("id")
+        email = record.get("email")
+        item = {"entity": entity}
+        if doc_id is not None:
+            item["doc_id"] = doc_id
+        if email is not None:
+            item["email"] = email
+        data.append(item)
     doc_ids = [d["doc_id"] for d in data if "doc_id" in d]
     return doc_ids, data
 
@@ -59,11 +191,12 @@ def query_pkg(query: str) -> Tuple[List[str], List[dict]]:
 
 def _build_retriever() -> any:
     collection = os.environ.get("QDRANT_COLLECTION", "ingestion")
-    client = QdrantClient(url=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    url = qdrant_url()
+    client = shared(("qdrant", url), lambda: QdrantClient(url=url))
     vectorstore = Qdrant(
         client=client,
         collection_name=collection,
-        embeddings=OllamaEmbeddings(),
+        embeddings=shared_embeddings("ollama", OllamaEmbeddings),
     )
     return vectorstore.as_retriever()
 
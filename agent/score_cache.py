@@ -0,0 +1,132 @@
+"""Persistent cache of LLM urgency scores for task objectives."""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+from .resources import shared
+
+DEFAULT_PATH = "data/score_cache.db"
+DEFAULT_MAX_ENTRIES = 100_000
+
+_PUNCT = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_objective(text: str) -> str:
+    """Case-fold and strip punctuation so trivially different objectives share a score."""
+    return _SPACE.sub(" ", _PUNCT.sub(" ", text.casefold())).strip()
+
+
+class ScoreCache:
+    """SQLite map of ``(normalized objective, rules version) -> score``.
+
+    Entries from an older rules version are simply never looked up again
+    and age out through LRU eviction once ``max_entries`` is exceeded.
+    """
+
+    def __init__(self, path: str, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                objective TEXT,
+                rules_version TEXT,
+                score REAL,
+                last_access REAL,
+                PRIMARY KEY (objective, rules_version)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_lru ON scores (last_access)")
+        self._conn.commit()
+
+    def get_many(self, objectives: List[str], version: str) -> List[float | None]:
+        """Return the cached score of each objective, ``None`` on a miss."""
+        keys = [normalize_objective(o) for o in objectives]
+        found: Dict[str, float] = {}
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                chunk = unique[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT objective, score FROM scores"
+                    f" WHERE rules_version=? AND objective IN ({marks})",
+                    (version, *chunk),
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE scores SET last_access=? WHERE objective=? AND rules_version=?",
+                    [(now, k, version) for k in found],
+                )
+                self._conn.commit()
+            out = [found.get(k) for k in keys]
+            hits = sum(s is not None for s in out)
+            self.hits += hits
+            self.misses += len(out) - hits
+        return out
+
+    def get(self, objective: str, version: str) -> float | None:
+        return self.get_many([objective], version)[0]
+
+    def put_many(self, scores: Dict[str, float], version: str) -> None:
+        """Store ``objective -> score`` pairs for ``version``."""
+        now = time.time()
+        rows = [(normalize_objective(o), version, float(s), now) for o, s in scores.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (objective, rules_version, score, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM scores WHERE rowid IN ("
+                    "SELECT rowid FROM scores ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+            self._conn.commit()
+
+    def put(self, objective: str, version: str, score: float) -> None:
+        self.put_many({objective: score}, version)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def score_cache() -> ScoreCache:
+    """Shared cache at ``SCORE_CACHE_PATH`` (default ``data/score_cache.db``)."""
+    path = os.environ.get("SCORE_CACHE_PATH", DEFAULT_PATH)
+    return shared(
+        ("score-cache", path),
+        lambda: ScoreCache(
+            path, max_entries=int(os.environ.get("SCORE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        ),
+    )
+
+
+__all__ = ["ScoreCache", "score_cache", "normalize_objective"]
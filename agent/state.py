@@ -14,6 +14,10 @@ class AgentState:
     current_task: Optional[Dict[str, Any]] = None
     tool_output: Optional[str] = None
     context_docs: List[str] = field(default_factory=list)
+    graph_metadata: List[Dict[str, Any]] = field(default_factory=list)
+    retrieval_meta: Dict[str, Any] = field(default_factory=dict)
+    # query -> {"doc_ids": [...], "meta": [...]}; one PKG lookup per query per run.
+    pkg_cache: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     def __getitem__(self, key: str) -> Any:
         return getattr(self, key)
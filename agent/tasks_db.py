@@ -10,6 +10,8 @@ from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
 
+from .resources import qdrant_url, shared, shared_embeddings
+
 DB_PATH = "data/tasks.db"
 COLLECTION = "task_snippets"
 
@@ -33,6 +35,16 @@ def init_db() -> None:
 init_db()
 
 
+def _qdrant_client() -> QdrantClient:
+    url = qdrant_url()
+    return shared(("qdrant", url), lambda: QdrantClient(url=url))
+
+
+def _vectorstore() -> Qdrant:
+    embeddings = shared_embeddings("ollama", OllamaEmbeddings)
+    return Qdrant(client=_qdrant_client(), collection_name=COLLECTION, embeddings=embeddings)
+
+
 def add_task(task: Dict[str, Any]) -> None:
     conn = sqlite3.connect(DB_PATH)
     conn.execute(
@@ -42,14 +54,11 @@ def add_task(task: Dict[str, Any]) -> None:
     conn.commit()
     conn.close()
 
-    client = QdrantClient(url="http://localhost:6333")
-    vs = Qdrant(client=client, collection_name=COLLECTION, embeddings=OllamaEmbeddings())
-    vs.add_texts([task["objective"]], ids=[task["task_id"]])
+    _vectorstore().add_texts([task["objective"]], ids=[task["task_id"]])
 
 
 def _qdrant_delete(task_id: str):
-    client = QdrantClient(url="http://localhost:6333")
-    client.delete(
+    _qdrant_client().delete(
         collection_name=COLLECTION,
         filter={"must": [{"key": "task_id", "match": {"value": task_id}}]},
     )
@@ -75,9 +84,7 @@ def update_task(task: dict):
     conn.commit()
     conn.close()
     _qdrant_delete(task["task_id"])
-    client = QdrantClient(url="http://localhost:6333")
-    vs = Qdrant(client=client, collection_name=COLLECTION, embeddings=OllamaEmbeddings())
-    vs.add_texts([task["objective"]], ids=[task["task_id"]])
+    _vectorstore().add_texts([task["objective"]], ids=[task["task_id"]])
 
 
 def get_task(task_id: str) -> dict | None:
@@ -98,13 +105,7 @@ def list_tasks() -> list[dict]:
 
 def search_tasks(query: str, k: int = 5) -> List[dict]:
     """Return tasks ordered by vector similarity."""
-    client = QdrantClient(url="http://localhost:6333")
-    store = Qdrant(
-        client=client,
-        collection_name=COLLECTION,
-        embeddings=OllamaEmbeddings(),
-    )
-    results = store.similarity_search_with_score(query, k=k)
+    results = _vectorstore().similarity_search_with_score(query, k=k)
     conn = sqlite3.connect(DB_PATH)
     ordered: List[dict] = []
     for doc, score in results:
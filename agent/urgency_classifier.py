@@ -0,0 +1,257 @@
+"""Small CPU classifier that predicts task priority before asking the LLM.
+
+Objectives are turned into hashed word and character n-gram features and
+scored by a multinomial logistic regression written in NumPy. The model is
+trained offline from the task store and the HITL log (see
+``scripts/train_urgency_classifier.py``) and saved as an ``.npz`` file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .score_cache import normalize_objective
+
+DEFAULT_PATH = "data/urgency_model.npz"
+DEFAULT_MIN_CONFIDENCE = 0.85
+DEFAULT_DIM = 2**16
+
+
+def _tokens(text: str) -> List[str]:
+    words = normalize_objective(text).split()
+    feats = ["\0bias"]
+    feats += [f"w:{w}" for w in words]
+    feats += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        feats += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return feats
+
+
+def featurize(texts: Sequence[str], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hash ``texts`` into a sparse matrix given as ``(indptr, cols, vals)``.
+
+    Each row is L2-normalized. A signed hash keeps collisions unbiased, and
+    ``crc32`` keeps feature ids stable across processes.
+    """
+    indptr = [0]
+    cols: List[int] = []
+    vals: List[float] = []
+    for text in texts:
+        row: Dict[int, float] = {}
+        for tok in _tokens(text):
+            h = zlib.crc32(tok.encode("utf-8"))
+            idx = h % dim
+            row[idx] = row.get(idx, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        norm = np.sqrt(sum(v * v for v in row.values())) or 1.0
+        cols.extend(row)
+        vals.extend(v / norm for v in row.values())
+        indptr.append(len(cols))
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(vals, dtype=np.float64),
+    )
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class UrgencyClassifier:
+    """Multinomial logistic regression over hashed n-grams."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: Sequence[str]) -> None:
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+        self.dim = weights.shape[0]
+
+    def _logits(self, indptr: np.ndarray, cols: np.ndarray, vals: np.ndarray) -> np.ndarray:
+        contrib = vals[:, None] * self.weights[cols]
+        # Every row has the bias token, so no row is empty for reduceat.
+        return np.add.reduceat(contrib, indptr[:-1], axis=0) + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, len(self.labels)))
+        return _softmax(self._logits(*featurize(texts, self.dim)))
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Return ``(priority, confidence)`` for each objective."""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(self.labels[k], float(probs[i, k])) for i, k in enumerate(best)]
+
+    @classmethod
+    def fit(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        weights: Sequence[float] | None = None,
+        *,
+        dim: int = DEFAULT_DIM,
+        epochs: int = 300,
+        lr: float = 0.5,
+        l2: float = 1e-4,
+    ) -> "UrgencyClassifier":
+        """Train with full-batch Adam on the weighted cross-entropy.
+
+        Raises ``ValueError`` with fewer than two distinct labels: such a
+        model would give its one label with full confidence to any text.
+        """
+        classes = sorted(set(labels))
+        if len(classes) < 2:
+            raise ValueError(f"need at least two distinct labels to train, got {classes}")
+        y = np.array([classes.index(label) for label in labels])
+        sample_w = np.ones(len(y)) if weights is None else np.asarray(weights, dtype=np.float64)
+        sample_w = sample_w / sample_w.sum()
+        indptr, cols, vals = featurize(texts, dim)
+        rows = np.repeat(np.arange(len(y)), np.diff(indptr))
+        onehot = np.eye(len(classes))[y]
+
+        model = cls(np.zeros((dim, len(classes))), np.zeros(len(classes)), classes)
+        params = [model.weights, model.bias]
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        b1, b2, eps = 0.9, 0.999, 1e-8
+        for t in range(1, epochs + 1):
+            grad_z = (_softmax(model._logits(indptr, cols, vals)) - onehot) * sample_w[:, None]
+            grad_w = np.stack(
+                [
+                    np.bincount(cols, weights=vals * grad_z[rows, k], minlength=dim)
+                    for k in range(len(classes))
+                ],
+                axis=1,
+            ) + l2 * model.weights
+            grads = [grad_w, grad_z.sum(axis=0)]
+            for p, g, mi, vi in zip(params, grads, m, v):
+                mi *= b1
+                mi += (1 - b1) * g
+                vi *= b2
+                vi += (1 - b2) * g * g
+                p -= lr * (mi / (1 - b1**t)) / (np.sqrt(vi / (1 - b2**t)) + eps)
+        return model
+
+    def save(self, path: str) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh, weights=self.weights, bias=self.bias, labels=np.array(self.labels)
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "UrgencyClassifier":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], [str(x) for x in data["labels"]])
+
+
+# Priorities the classifier may learn from without a review: ones the LLM
+# scorer produced. Rule and classifier decisions would only teach it to
+# copy the rules or itself.
+TRAINING_SOURCES = {"llm", "cache"}
+
+
+def load_training_records(
+    db_path: str = "data/tasks.db", hitl_log: str = "logs/hitl_log.jsonl"
+) -> List[Tuple[str, str, str, float]]:
+    """Return ``(task_id, objective, priority, weight)`` examples.
+
+    Priorities come from the task store and are used when the LLM scorer
+    decided them (``decided_by`` in ``TRAINING_SOURCES``) or a reviewer
+    approved the task; approved tasks count double. Tasks a reviewer
+    rejected are left out because their stored priority is suspect.
+    """
+    reviews: Dict[str, str] = {}
+    if os.path.exists(hitl_log):
+        with open(hitl_log) as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("task_id"):
+                    reviews[entry["task_id"]] = entry.get("result", "")
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT task_id, data FROM tasks").fetchall()
+    finally:
+        conn.close()
+    records = []
+    for task_id, data in rows:
+        task = json.loads(data)
+        objective, priority = task.get("objective"), task.get("priority")
+        review = reviews.get(task_id)
+        if not objective or not priority:
+            continue
+        if review == "approved":
+            records.append((task_id, objective, priority, 2.0))
+        elif review != "rejected" and task.get("decided_by") in TRAINING_SOURCES:
+            records.append((task_id, objective, priority, 1.0))
+    return records
+
+
+_models: Dict[str, Tuple[Tuple[int, int], UrgencyClassifier]] = {}
+_lock = threading.Lock()
+
+
+def urgency_classifier(path: str | None = None) -> UrgencyClassifier | None:
+    """Return the trained model at ``URGENCY_MODEL_PATH``, ``None`` if absent.
+
+    The file is reloaded when it changes, so retraining needs no restart.
+    """
+    path = path or os.environ.get("URGENCY_MODEL_PATH", DEFAULT_PATH)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _models.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    model = UrgencyClassifier.load(path)
+    with _lock:
+        _models[path] = (stamp, model)
+    return model
+
+
+def min_confidence() -> float:
+    return float(os.environ.get("URGENCY_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+
+
+def confident_predictions(
+    objectives: Iterable[str], threshold: float | None = None
+) -> List[str | None]:
+    """Predicted priority per objective, ``None`` when unsure or untrained.
+
+    A model with a single class (saved before ``fit`` refused those) counts
+    as untrained.
+    """
+    objectives = list(objectives)
+    model = urgency_classifier()
+    if model is None or len(model.labels) < 2 or not objectives:
+        return [None] * len(objectives)
+    threshold = min_confidence() if threshold is None else threshold
+    return [label if conf >= threshold else None for label, conf in model.predict(objectives)]
+
+
+__all__ = [
+    "UrgencyClassifier",
+    "featurize",
+    "load_training_records",
+    "urgency_classifier",
+    "confident_predictions",
+    "min_confidence",
+]
@@ -16,14 +16,20 @@ if __package__:
     from .pkg_config import (
         ALLOWED_NODE_TYPES,
         ALLOWED_EDGE_TYPES,
+        bump_graph_version,
         install_constraints,
     )
+    from .gazetteer import Gazetteer, gazetteer_path, update_gazetteer
+    from .trigram_index import TrigramIndex, trigram_index_path
 else:  # pragma: no cover - direct script execution
     from pkg_config import (  # type: ignore
         ALLOWED_NODE_TYPES,
         ALLOWED_EDGE_TYPES,
+        bump_graph_version,
         install_constraints,
     )
+    from gazetteer import Gazetteer, gazetteer_path, update_gazetteer  # type: ignore
+    from trigram_index import TrigramIndex, trigram_index_path  # type: ignore
 
     from loaders import load_gmail, load_files  # type: ignore
 
@@ -100,8 +106,34 @@ def _convert_filter(
     return triples
 
 
+def _graph_entities(session) -> List[Tuple[str, str | None, str | None]]:
+    """Return ``(name, type, email)`` for every entity already in the graph."""
+    labels = " OR ".join(f"e:{t}" for t in sorted(ALLOWED_NODE_TYPES))
+    result = session.run(
+        f"MATCH (e) WHERE {labels} RETURN e.name AS name, labels(e) AS labels, e.email AS email"
+    )
+    entities = []
+    for record in result:
+        types = [t for t in record.get("labels") or [] if t in ALLOWED_NODE_TYPES]
+        entities.append((record.get("name"), types[0] if types else None, record.get("email")))
+    return entities
+
+
+def _build_trigram_index() -> None:
+    """Rebuild the fuzzy entity index from the names in the gazetteer."""
+    try:
+        gaz = Gazetteer.load()
+    except OSError:
+        return
+    TrigramIndex.build((e["entity"], e.get("type")) for e in gaz.entries.values()).save()
+
+
 def _store_triples(triples: List[Tuple[str, str, str, str, str]]) -> None:
-    """Persist triples in Neo4j.
+    """Persist triples in Neo4j and add their entities to the local indexes.
+
+    The first build without a gazetteer file seeds it with every entity in
+    the graph; later builds only add the entities of the new triples. The
+    trigram index is rebuilt from the gazetteer whenever that changes.
 
     Parameters
     ----------
@@ -132,6 +164,14 @@ def _store_triples(triples: List[Tuple[str, str, str, str, str]]) -> None:
                 """,
                 {"s": s, "o": t},
             )
+        if os.path.exists(gazetteer_path()):
+            entities = [(s, stype, None) for s, stype, _, _, _ in triples]
+            entities += [(t, ttype, None) for _, _, _, t, ttype in triples]
+        else:
+            entities = _graph_entities(session)
+    if update_gazetteer(entities) or not os.path.exists(trigram_index_path()):
+        _build_trigram_index()
+    bump_graph_version()
 
 
 def build_pkg(gmail_query: str | None = None, directory: str | None = None) -> int:
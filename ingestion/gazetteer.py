@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+"""In-process gazetteer of PKG entity names and emails.
+
+An Aho-Corasick automaton over every known surface form finds all entity
+mentions in a prompt in one pass over its characters, so the agent only goes
+to Neo4j for the details of entities the prompt actually names.
+
+``ingestion.build_pkg`` keeps the gazetteer file (``PKG_GAZETTEER_PATH``)
+up to date as it writes the graph. The file holds the compiled automaton, so
+readers load it through :func:`gazetteer` without rebuilding anything, and
+reload it when it changes.
+"""
+
+import json
+import logging
+import os
+import threading
+import zipfile
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+DEFAULT_PATH = "data/pkg_gazetteer.npz"
+FORMAT_VERSION = 1
+MIN_SURFACE_LEN = 2
+
+_SHIFT = 21  # every code point fits in 21 bits
+_MASK = (1 << _SHIFT) - 1
+
+
+def gazetteer_path() -> str:
+    return os.environ.get("PKG_GAZETTEER_PATH", DEFAULT_PATH)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class Gazetteer:
+    """Aho-Corasick automaton mapping surface forms to PKG entities.
+
+    Every entity is found by its name and, for people, by its email. Matches
+    must start and end on word boundaries, and overlapping matches resolve
+    to the leftmost, then longest one, so "Acme Labs" wins over "Acme".
+    Entries can be added at any time; failure links are rebuilt lazily on
+    the next :meth:`find` or :meth:`save`.
+
+    Transitions live in one flat ``dict`` keyed by ``node << 21 | ord(ch)``
+    so the compiled automaton saves to and loads from plain arrays.
+    """
+
+    def __init__(self, entries: Iterable[dict] = ()) -> None:
+        self.entries: Dict[str, dict] = {}
+        self._goto: Dict[int, int] = {}
+        self._depth: List[int] = [0]
+        self._out: List[str | None] = [None]
+        self._fail: List[int] = [0]
+        self._link: List[int] = [0]
+        self._linked = True
+        for entry in entries:
+            self.add(entry["entity"], entry.get("type"), entry.get("email"))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, name: str, type: str | None = None, email: str | None = None) -> bool:
+        """Add or update an entity; returns ``True`` if anything changed."""
+        if not name:
+            return False
+        entry = {"entity": name}
+        if type:
+            entry["type"] = type
+        if email:
+            entry["email"] = email
+        changed = False
+        for surface in (name, email):
+            surface = _normalize(surface or "")
+            if len(surface) < MIN_SURFACE_LEN:
+                continue
+            old = self.entries.get(surface)
+            merged = {**old, **entry} if old and old["entity"] == name else entry
+            if merged != old:
+                self.entries[surface] = merged
+                changed = True
+            if old is None:
+                self._insert(surface)
+        return changed
+
+    def _insert(self, surface: str) -> None:
+        node = 0
+        for ch in surface:
+            key = node << _SHIFT | ord(ch)
+            child = self._goto.get(key)
+            if child is None:
+                child = self._goto[key] = len(self._out)
+                self._depth.append(self._depth[node] + 1)
+                self._out.append(None)
+            node = child
+        self._out[node] = surface
+        self._linked = False
+
+    def _build_links(self) -> None:
+        goto, out = self._goto, self._out
+        fail = [0] * len(out)
+        # Nearest proper suffix node that ends a surface (0 when none).
+        link = [0] * len(out)
+        depth = self._depth
+        # Shallower nodes first, so every failure target is already linked.
+        for key, child in sorted(goto.items(), key=lambda kv: depth[kv[1]]):
+            parent, code = key >> _SHIFT, key & _MASK
+            if not parent:
+                continue
+            f = fail[parent]
+            while f and (f << _SHIFT | code) not in goto:
+                f = fail[f]
+            target = goto.get(f << _SHIFT | code, 0)
+            fail[child] = target
+            link[child] = target if out[target] else link[target]
+        self._fail, self._link, self._linked = fail, link, True
+
+    def find(self, text: str) -> List[dict]:
+        """Return the entities mentioned in ``text``, in order of appearance."""
+        return self.scan(text)[0]
+
+    def scan(self, text: str) -> Tuple[List[dict], List[str]]:
+        """Return the entities mentioned in ``text`` and the unmatched rest.
+
+        The rest is the normalized text split around the matched spans, e.g.
+        for fuzzy matching only what the gazetteer did not recognise.
+        """
+        if not self._linked:
+            self._build_links()
+        text = _normalize(text)
+        goto, fail, out, link = self._goto, self._fail, self._out, self._link
+        hits: List[Tuple[int, int, str]] = []
+        node = 0
+        for i, ch in enumerate(text):
+            code = ord(ch)
+            while node and (node << _SHIFT | code) not in goto:
+                node = fail[node]
+            node = goto.get(node << _SHIFT | code, 0)
+            k = node if out[node] else link[node]
+            while k:
+                surface = out[k]
+                start, end = i + 1 - len(surface), i + 1
+                if not (
+                    (start and _is_word(surface[0]) and _is_word(text[start - 1]))
+                    or (end < len(text) and _is_word(surface[-1]) and _is_word(text[end]))
+                ):
+                    hits.append((start, end, surface))
+                k = link[k]
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        found: List[dict] = []
+        rest: List[str] = []
+        seen = set()
+        last_end = 0
+        for start, end, surface in hits:
+            if start < last_end:
+                continue
+            if text[last_end:start].strip():
+                rest.append(text[last_end:start].strip())
+            last_end = end
+            entry = self.entries[surface]
+            if entry["entity"] not in seen:
+                seen.add(entry["entity"])
+                found.append(dict(entry))
+        if text[last_end:].strip():
+            rest.append(text[last_end:].strip())
+        return found, rest
+
+    def save(self, path: str | None = None) -> None:
+        """Write the compiled automaton to ``path`` atomically."""
+        if not self._linked:
+            self._build_links()
+        path = path or gazetteer_path()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        surfaces = {s: i for i, s in enumerate(self.entries)}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                format=np.array(FORMAT_VERSION),
+                entries=np.array(json.dumps(list(self.entries.items()))),
+                keys=np.fromiter(self._goto.keys(), dtype=np.int64, count=len(self._goto)),
+                children=np.fromiter(self._goto.values(), dtype=np.int64, count=len(self._goto)),
+                depth=np.asarray(self._depth, dtype=np.int64),
+                out=np.asarray([surfaces[s] if s else -1 for s in self._out], dtype=np.int64),
+                fail=np.asarray(self._fail, dtype=np.int64),
+                link=np.asarray(self._link, dtype=np.int64),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "Gazetteer":
+        """Load a saved automaton without rebuilding it."""
+        with np.load(path or gazetteer_path()) as data:
+            if int(data["format"]) != FORMAT_VERSION:
+                raise ValueError(f"unsupported gazetteer format: {int(data['format'])}")
+            gaz = cls()
+            gaz.entries = dict(json.loads(str(data["entries"])))
+            surfaces = list(gaz.entries)
+            gaz._goto = dict(zip(data["keys"].tolist(), data["children"].tolist()))
+            gaz._depth = data["depth"].tolist()
+            gaz._out = [surfaces[i] if i >= 0 else None for i in data["out"].tolist()]
+            gaz._fail = data["fail"].tolist()
+            gaz._link = data["link"].tolist()
+        return gaz
+
+
+def update_gazetteer(
+    entities: Iterable[Tuple[str, str | None, str | None]], path: str | None = None
+) -> int:
+    """Add ``(name, type, email)`` tuples to the gazetteer file.
+
+    Returns the number of entities that changed; the file is only rewritten
+    when that is non-zero.
+    """
+    path = path or gazetteer_path()
+    try:
+        gaz = Gazetteer.load(path)
+    except (OSError, ValueError):
+        gaz = Gazetteer()
+    changed = sum(gaz.add(name, type, email) for name, type, email in entities)
+    if changed:
+        gaz.save(path)
+    return changed
+
+
+_cached: Dict[str, Tuple[Tuple[int, int, int], Gazetteer | None]] = {}
+_lock = threading.Lock()
+
+
+def gazetteer(path: str | None = None) -> Gazetteer | None:
+    """Return the gazetteer at ``PKG_GAZETTEER_PATH``, ``None`` if not built
+    or unreadable (logged as a warning).
+
+    The file is reloaded only when it changes.
+    """
+    path = path or gazetteer_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _cached.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        gaz = Gazetteer.load(path)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        # Unreadable until the next build rewrites it; warn once per version.
+        logging.warning("ignoring unreadable gazetteer %s: %s", path, exc)
+        gaz = None
+    with _lock:
+        _cached[path] = (stamp, gaz)
+    return gaz
+
+
+__all__ = ["Gazetteer", "gazetteer", "gazetteer_path", "update_gazetteer"]
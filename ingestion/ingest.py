@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+import sys
 from typing import Iterable, List
 
 from langchain_community.embeddings import OllamaEmbeddings
@@ -16,6 +17,10 @@ else:  # pragma: no cover - direct script execution
     from embedding_pipeline import split_documents  # type: ignore
     from loaders import load_gmail, load_files  # type: ignore
 
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.resources import qdrant_url, shared, shared_embeddings
+
 
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
@@ -43,8 +48,10 @@ def ingest(gmail_query: str | None = None, directory: str | None = None) -> None
     texts = [d.page_content for d in chunks]
     metas = [d.metadata for d in chunks]
 
-    embeddings = OllamaEmbeddings()
-    client = QdrantClient(url=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    # Unchanged chunks are served from the embedding cache when enabled.
+    embeddings = shared_embeddings("ollama", OllamaEmbeddings)
+    url = qdrant_url()
+    client = shared(("qdrant", url), lambda: QdrantClient(url=url))
     collection = os.environ.get("QDRANT_COLLECTION", "ingestion")
     vectorstore = Qdrant(client=client, collection_name=collection, embeddings=embeddings)
 
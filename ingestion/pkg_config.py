@@ -1,3 +1,6 @@
+import os
+import time
+
 ALLOWED_NODE_TYPES = {"Person", "Company", "Project"}
 ALLOWED_EDGE_TYPES = {"MENTIONS", "WORKS_ON", "EMPLOYED_AT"}
 
@@ -8,6 +11,59 @@ SCHEMA_CONSTRAINTS = [
     "CREATE CONSTRAINT IF NOT EXISTS FOR (pr:Project) REQUIRE pr.name IS UNIQUE",
 ]
 
+# Full-text index used by agent.retrieve_context.query_pkg to look up
+# entities by name instead of scanning every node with CONTAINS.
+ENTITY_NAME_INDEX = "entity_names"
+FULLTEXT_INDEXES = [
+    f"CREATE FULLTEXT INDEX {ENTITY_NAME_INDEX} IF NOT EXISTS "
+    f"FOR (n:{'|'.join(sorted(ALLOWED_NODE_TYPES))}) ON EACH [n.name]",
+]
+
+# Range indexes for exact-name lookups of gazetteer matches. Project names
+# are already indexed by their uniqueness constraint.
+NAME_INDEXES = [
+    "CREATE INDEX person_name IF NOT EXISTS FOR (p:Person) ON (p.name)",
+    "CREATE INDEX company_name IF NOT EXISTS FOR (c:Company) ON (c.name)",
+]
+
 def install_constraints(tx):
-    for stmt in SCHEMA_CONSTRAINTS:
+    for stmt in SCHEMA_CONSTRAINTS + FULLTEXT_INDEXES + NAME_INDEXES:
         tx.run(stmt)
+
+
+# --- Graph version ----------------------------------------------------------
+# Readers cache PKG query results and compare this version instead of using a
+# TTL. A file works across processes: the graph is written by the build_pkg
+# CLI while the agent reads it from a long-lived server.
+
+
+def graph_version_path() -> str:
+    return os.environ.get("PKG_VERSION_FILE", "data/pkg_version")
+
+
+def graph_version() -> tuple:
+    """Cheap token that changes on every bump (one ``stat`` call)."""
+    try:
+        st = os.stat(graph_version_path())
+    except OSError:
+        return (0, 0)
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def bump_graph_version() -> int:
+    """Record a graph write; returns the new write counter."""
+    path = graph_version_path()
+    try:
+        with open(path) as fh:
+            counter = int(fh.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        counter = 0
+    counter += 1
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(f"{counter} {time.time():.6f}\n")
+    # A fresh inode per write changes the version even within one mtime tick.
+    os.replace(tmp, path)
+    return counter
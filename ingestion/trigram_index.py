@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+"""Character-trigram index for typo-tolerant PKG entity linking.
+
+Names are split into words and each word into padded trigrams (as in
+PostgreSQL's ``pg_trgm``). A prompt is linked to names in two steps: one
+``bincount`` over the posting lists of the prompt's trigrams screens out
+every name that cannot reach the threshold, then the survivors are scored
+by Jaccard similarity against the prompt's word windows of about the
+name's length.
+
+``ingestion.build_pkg`` rebuilds the index (``PKG_TRIGRAM_PATH``) from the
+gazetteer whenever that changes; readers load it through
+:func:`trigram_index`, which reloads the file when it changes.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_PATH = "data/pkg_trigrams.npz"
+DEFAULT_THRESHOLD = 0.4
+FORMAT_VERSION = 1
+# Names passing the screen that are scored exactly, best screen score first.
+MAX_CANDIDATES = 32
+# A name with n trigrams must score threshold * (1 + LENGTH_SCALE / n), so
+# short names, which reach the base threshold on a shared prefix alone
+# ("Plan" in "Planning"), need a closer match.
+LENGTH_SCALE = 4
+# Single-word names shorter than this are only matched exactly.
+MIN_FUZZY_WORD = 5
+
+_PUNCT = re.compile(r"[^\w\s]+")
+
+
+def trigram_index_path() -> str:
+    return os.environ.get("PKG_TRIGRAM_PATH", DEFAULT_PATH)
+
+
+def fuzzy_threshold() -> float:
+    return float(os.environ.get("PKG_FUZZY_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def _words(text: str) -> List[str]:
+    return _PUNCT.sub(" ", text.casefold()).split()
+
+
+def _word_grams(word: str) -> FrozenSet[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _grams(words: Sequence[str]) -> FrozenSet[str]:
+    return frozenset().union(*map(_word_grams, words))
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to entity names.
+
+    :meth:`candidates` returns ``{"entity", "type", "score"}`` dicts for the
+    names whose similarity to some stretch of the text reaches the
+    length-scaled threshold (see ``LENGTH_SCALE``), best first. "Acme corp"
+    finds "Acme Corporation" (0.5) and "Jon Smith" finds "John Smith"
+    (0.62), while "the market report" does not find "Mark".
+
+    The screen never drops a name that could reach the threshold, but only
+    the ``MAX_CANDIDATES`` survivors sharing the largest fraction of their
+    trigrams with the whole text are scored; when more names survive, a
+    true match can be cut there.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        types: Sequence[str | None],
+        postings: Dict[str, np.ndarray],
+        sizes: np.ndarray,
+    ) -> None:
+        self.names = list(names)
+        self.types = list(types)
+        self._postings = postings
+        self._sizes = sizes
+        self._grams: Dict[int, Tuple[int, FrozenSet[str]]] = {}
+        self._required_cache: Tuple[float, np.ndarray] | None = None
+        words = [_words(n) for n in self.names]
+        self._fuzzy = np.array(
+            [len(w) > 1 or len(w[0]) >= MIN_FUZZY_WORD for w in words], dtype=bool
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _name_grams(self, i: int) -> Tuple[int, FrozenSet[str]]:
+        """Word count and trigram set of name ``i``, computed once."""
+        cached = self._grams.get(i)
+        if cached is None:
+            words = _words(self.names[i])
+            cached = self._grams[i] = (len(words), _grams(words))
+        return cached
+
+    def _required(self, threshold: float) -> np.ndarray:
+        """Per-name score needed at ``threshold``, cached for the last value."""
+        cached = self._required_cache
+        if cached is None or cached[0] != threshold:
+            scale = 1 + LENGTH_SCALE / np.maximum(self._sizes, 1)
+            cached = self._required_cache = (threshold, np.minimum(1.0, threshold * scale))
+        return cached[1]
+
+    @classmethod
+    def build(cls, entities: Iterable[Tuple[str, str | None]]) -> "TrigramIndex":
+        """Index ``(name, type)`` pairs; later duplicates of a name are ignored."""
+        unique: Dict[str, str | None] = {}
+        for name, type in entities:
+            if name and _words(name):
+                unique.setdefault(name, type)
+        names = list(unique)
+        lists: Dict[str, List[int]] = {}
+        sizes = np.zeros(len(names), dtype=np.int32)
+        for i, name in enumerate(names):
+            grams = _grams(_words(name))
+            sizes[i] = len(grams)
+            for gram in grams:
+                lists.setdefault(gram, []).append(i)
+        postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in lists.items()}
+        return cls(names, [unique[n] for n in names], postings, sizes)
+
+    def candidates(
+        self, text: str | Sequence[str], threshold: float | None = None, limit: int = 5
+    ) -> List[dict]:
+        """Rank the names fuzzily mentioned in ``text``.
+
+        ``text`` may also be a list of separate segments (e.g. what is left
+        after exact matches are cut out); no window spans two segments.
+        """
+        threshold = fuzzy_threshold() if threshold is None else threshold
+        segments = [text] if isinstance(text, str) else list(text)
+        words: List[str] = []
+        # Index one past the last word of each word's segment.
+        seg_end: List[int] = []
+        for segment in segments:
+            seg = _words(segment)
+            words += seg
+            seg_end += [len(words)] * len(seg)
+        if not words or not self.names:
+            return []
+        word_grams = [_word_grams(w) for w in words]
+        positions: Dict[str, List[int]] = {}
+        for j, grams in enumerate(word_grams):
+            for gram in grams:
+                positions.setdefault(gram, []).append(j)
+        lists = [self._postings[g] for g in positions if g in self._postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        # A window with Jaccard >= t shares at least t / (1 + t) of a name's
+        # trigrams, and the whole text shares at least as many as any window.
+        required = self._required(threshold)
+        reachable = shared * (1 + required) >= required * self._sizes - 1e-9
+        ids = np.flatnonzero(reachable & self._fuzzy)
+        ids = ids[shared[ids] > 0]
+        if len(ids) > MAX_CANDIDATES:
+            ratio = shared[ids] / self._sizes[ids]
+            ids = ids[np.argsort(-ratio, kind="stable")[:MAX_CANDIDATES]]
+        windows: Dict[Tuple[int, int], FrozenSet[str]] = {}
+        found = []
+        for i in ids.tolist():
+            length, grams = self._name_grams(i)
+            # Only windows that start and end on a word sharing a trigram with
+            # the name; trimming a word that shares none can only help.
+            hits = sorted({j for g in grams if g in positions for j in positions[g]})
+            best = 0.0
+            for size in range(max(1, length - 1), length + 2):
+                for start in hits:
+                    end = start + size - 1
+                    if end >= seg_end[start] or word_grams[end].isdisjoint(grams):
+                        continue
+                    window = windows.get((start, size))
+                    if window is None:
+                        window = frozenset().union(*word_grams[start : end + 1])
+                        windows[(start, size)] = window
+                    common = len(window & grams)
+                    best = max(best, common / (len(window) + len(grams) - common))
+            if best >= required[i] - 1e-9:
+                entry = {"entity": self.names[i], "score": round(best, 4)}
+                if self.types[i]:
+                    entry["type"] = self.types[i]
+                found.append(entry)
+        found.sort(key=lambda e: -e["score"])
+        return found[:limit]
+
+    def save(self, path: str | None = None) -> None:
+        """Write the index to ``path`` atomically."""
+        path = path or trigram_index_path()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        keys = list(self._postings)
+        lengths = [len(self._postings[k]) for k in keys]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                format=np.array(FORMAT_VERSION),
+                names=np.array(json.dumps([self.names, self.types])),
+                keys=np.array(keys, dtype=str),
+                indptr=np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]),
+                ids=(
+                    np.concatenate([self._postings[k] for k in keys])
+                    if keys
+                    else np.zeros(0, np.int32)
+                ),
+                sizes=self._sizes,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "TrigramIndex":
+        with np.load(path or trigram_index_path()) as data:
+            if int(data["format"]) != FORMAT_VERSION:
+                raise ValueError(f"unsupported trigram index format: {int(data['format'])}")
+            names, types = json.loads(str(data["names"]))
+            indptr, ids = data["indptr"], data["ids"]
+            postings = {
+                k: ids[indptr[j] : indptr[j + 1]] for j, k in enumerate(data["keys"].tolist())
+            }
+            return cls(names, types, postings, data["sizes"])
+
+
+_cached: Dict[str, Tuple[Tuple[int, int, int], TrigramIndex | None]] = {}
+_lock = threading.Lock()
+
+
+def trigram_index(path: str | None = None) -> TrigramIndex | None:
+    """Return the index at ``PKG_TRIGRAM_PATH``, ``None`` if not built or
+    unreadable (logged as a warning).
+
+    Nothing is read until the first call; the file is reloaded only when it
+    changes.
+    """
+    path = path or trigram_index_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _cached.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        index = TrigramIndex.load(path)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        # Unreadable until the next build rewrites it; warn once per version.
+        logging.warning("ignoring unreadable trigram index %s: %s", path, exc)
+        index = None
+    with _lock:
+        _cached[path] = (stamp, index)
+    return index
+
+
+__all__ = ["TrigramIndex", "trigram_index", "trigram_index_path", "fuzzy_threshold"]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Compare the old CONTAINS scan with the full-text entity lookup.
+
+Loads a synthetic graph into the Neo4j at ``NEO4J_URL`` (use a scratch
+database: existing ``Bench*`` nodes are deleted first), creates the
+``entity_names`` index and times both queries on prompts that mention
+existing entities.
+
+    python scripts/bench_pkg_fulltext.py --entities 1000000 --docs 200000
+    python scripts/bench_pkg_fulltext.py --skip-load   # reuse the last graph
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from neo4j import GraphDatabase  # noqa: E402
+
+from agent.resources import neo4j_auth  # noqa: E402
+from agent.retrieve_context import query_terms  # noqa: E402
+from ingestion.pkg_config import ENTITY_NAME_INDEX, install_constraints  # noqa: E402
+
+LABELS = ["Person", "Company", "Project"]
+BATCH = 10_000
+
+OLD_QUERY = """
+MATCH (d:Document)-[r]->(e)
+WHERE toLower(e.name) CONTAINS toLower($q)
+RETURN d.id AS id, e.name AS entity, e.email AS email
+LIMIT 10
+"""
+NEW_QUERY = """
+CALL db.index.fulltext.queryNodes($index, $terms) YIELD node AS e, score
+MATCH (d:Document)-[r]->(e)
+RETURN d.id AS id, e.name AS entity, e.email AS email
+ORDER BY score DESC
+LIMIT 10
+"""
+
+
+def _name(i: int) -> str:
+    return f"ent{i} bench{i % 9973}"
+
+
+def load(session, entities: int, docs: int, seed: int) -> None:
+    session.run(
+        "MATCH (n:Bench) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+    )
+    session.execute_write(install_constraints)
+    # Linking documents matches targets on :Bench, which the per-label name
+    # indexes do not cover; without this every target scans every entity.
+    session.run("CREATE INDEX bench_name IF NOT EXISTS FOR (n:Bench) ON (n.name)")
+    for start in range(0, entities, BATCH):
+        ids = range(start, min(start + BATCH, entities))
+        for k, label in enumerate(LABELS):
+            rows = [{"name": _name(i)} for i in ids if i % len(LABELS) == k]
+            session.run(
+                f"UNWIND $rows AS row CREATE (:{label}:Bench {{name: row.name}})", rows=rows
+            )
+    session.run("CALL db.awaitIndexes(600)")
+    rnd = random.Random(seed)
+    for start in range(0, docs, BATCH):
+        rows = [
+            {"id": f"doc{i}", "targets": [_name(rnd.randrange(entities)) for _ in range(3)]}
+            for i in range(start, min(start + BATCH, docs))
+        ]
+        session.run(
+            """
+            UNWIND $rows AS row
+            CREATE (d:Document:Bench {id: row.id})
+            WITH d, row UNWIND row.targets AS name
+            MATCH (e:Bench {name: name})
+            CREATE (d)-[:MENTIONS]->(e)
+            """,
+            rows=rows,
+        )
+    session.run("CALL db.awaitIndexes(600)")
+
+
+def _time(session, cypher: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(session.run(cypher, **params))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args: argparse.Namespace) -> None:
+    url = os.environ.get("NEO4J_URL", "bolt://localhost:7687")
+    driver = GraphDatabase.driver(url, auth=neo4j_auth())
+    with driver.session() as session:
+        if not args.skip_load:
+            start = time.perf_counter()
+            load(session, args.entities, args.docs, args.seed)
+            elapsed = time.perf_counter() - start
+            print(f"loaded {args.entities} entities / {args.docs} docs in {elapsed:.1f}s")
+        rnd = random.Random(args.seed + 1)
+        prompts = [
+            f"Plan a call with ent{rnd.randrange(args.entities)} next week"
+            for _ in range(args.queries)
+        ]
+        old, new = [], []
+        for prompt in prompts:
+            old.append(_time(session, OLD_QUERY, {"q": prompt}, args.repeat))
+            new.append(
+                _time(
+                    session,
+                    NEW_QUERY,
+                    {"index": ENTITY_NAME_INDEX, "terms": " OR ".join(query_terms(prompt))},
+                    args.repeat,
+                )
+            )
+        for name, samples in (("CONTAINS scan", old), ("full-text index", new)):
+            print(
+                f"{name:16} median {statistics.median(samples) * 1000:9.2f} ms"
+                f"  max {max(samples) * 1000:9.2f} ms"
+            )
+        print(f"speed-up (median) {statistics.median(old) / statistics.median(new):.1f}x")
+    driver.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PKG entity lookup")
+    parser.add_argument("--entities", type=int, default=1_000_000)
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-load", action="store_true")
+    main(parser.parse_args())
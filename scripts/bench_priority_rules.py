@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark deterministic priority rules on many objectives.
+
+Compares the previous path (re-read ``rules/priority.yml`` and run every
+regex with ``re.search``) with ``RuleEngine.classify_many``.
+
+    python scripts/bench_priority_rules.py --objectives 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import yaml  # noqa: E402
+
+from agent.priority_rules import PRIORITY_RULES_FILE, rule_engine  # noqa: E402
+
+WORDS = "review draft call email plants report budget team lunch notes travel slides".split()
+KEYWORDS = ["invoice", "Meeting", "payment due", "security alert", "fraud", "calendar"]
+DOMAINS = ["trustedbank.com", "example.org", "mail.com", "securebank.com", "corp.net"]
+
+
+def _workload(n: int, hit_rate: float, seed: int = 0) -> tuple[list, list]:
+    rnd = random.Random(seed)
+    objectives = []
+    for _ in range(n):
+        words = rnd.choices(WORDS, k=8)
+        if rnd.random() < hit_rate:
+            words.insert(rnd.randrange(len(words)), rnd.choice(KEYWORDS))
+        objectives.append(" ".join(words) + f" #{rnd.randrange(n)}")
+    senders = [f"user{i}@{rnd.choice(DOMAINS)}" if i % 3 else None for i in range(n)]
+    return objectives, senders
+
+
+def _baseline(objectives: list, senders: list, path: str) -> list:
+    """The original path: load the YAML, then one re.search per pattern."""
+    with open(path) as fh:
+        rules = yaml.safe_load(fh)
+    out = []
+    for obj, sender in zip(objectives, senders):
+        domain = sender.split("@")[-1] if sender else None
+        if domain and domain in rules.get("bank_whitelist", []):
+            out.append("high")
+            continue
+        for pat in rules.get("patterns", []):
+            if pat.get("regex") and re.search(pat["regex"], obj, re.IGNORECASE):
+                out.append(pat.get("priority"))
+                break
+        else:
+            out.append(None)
+    return out
+
+
+def main(n: int, hit_rate: float, path: str) -> None:
+    objectives, senders = _workload(n, hit_rate)
+    start = time.perf_counter()
+    expected = _baseline(objectives, senders, path)
+    base = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = rule_engine(path).classify_many(objectives, senders)
+    engine_t = time.perf_counter() - start
+    assert got == expected, "rule engine disagrees with the baseline"
+
+    print(f"objectives={n} hit_rate={hit_rate} rules={path}")
+    print(f"baseline      {base * 1000:9.2f} ms")
+    print(f"rule engine   {engine_t * 1000:9.2f} ms  ({base / engine_t:5.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark priority rules")
+    parser.add_argument("--objectives", type=int, default=100_000)
+    parser.add_argument(
+        "--hit-rate", type=float, default=0.2, help="share of objectives with a keyword"
+    )
+    parser.add_argument("--rules", default=PRIORITY_RULES_FILE)
+    args = parser.parse_args()
+    main(args.objectives, args.hit_rate, args.rules)
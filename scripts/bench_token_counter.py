@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Microbenchmark for utils.token_counter on long message histories.
+
+Compares the previous count/pop(0)/count sequence used by the graph nodes
+with ``trim_messages_with_delta`` (cold and with a warm token memo).
+
+    python scripts/bench_token_counter.py --messages 10000 --max-tokens 8192
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+import utils.token_counter as tc  # noqa: E402
+
+
+def _history(n: int) -> list:
+    msgs = []
+    for i in range(n):
+        text = f"turn {i}: " + " ".join(f"word{i % 97}_{j}" for j in range(20 + i % 30))
+        msgs.append(HumanMessage(content=text) if i % 2 == 0 else AIMessage(content=text))
+    return msgs
+
+
+def _baseline(messages: list, max_tokens: int) -> tuple[list, int]:
+    """The original algorithm: full recount, pop(0) loop, recount."""
+    count = lambda text: len(tc._encoder.encode(text)) if tc._encoder else len(text.split())  # noqa: E731
+    before = sum(count(m.content) for m in messages)
+    trimmed = list(messages)
+    total = before
+    while trimmed and total > max_tokens:
+        total -= count(trimmed.pop(0).content)
+    after = sum(count(m.content) for m in trimmed)
+    return trimmed, before - after
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n: int, max_tokens: int, repeat: int) -> None:
+    messages = _history(n)
+    expected = _baseline(messages, max_tokens)
+    tc._count_cached.cache_clear()
+    result = tc.trim_messages_with_delta(messages, max_tokens)
+    assert len(result[0]) == len(expected[0]) and result[1] == expected[1]
+
+    base = _time(lambda: _baseline(messages, max_tokens), repeat)
+
+    def cold():
+        tc._count_cached.cache_clear()
+        tc.trim_messages_with_delta(messages, max_tokens)
+
+    cold_t = _time(cold, repeat)
+    warm_t = _time(lambda: tc.trim_messages_with_delta(messages, max_tokens), repeat)
+    print(f"messages={n} max_tokens={max_tokens} kept={len(result[0])} delta={result[1]}")
+    print(f"encoder={'tiktoken' if tc._encoder else 'whitespace'}")
+    print(f"baseline          {base * 1000:9.2f} ms")
+    print(f"single pass cold  {cold_t * 1000:9.2f} ms  ({base / cold_t:5.1f}x)")
+    print(f"single pass warm  {warm_t * 1000:9.2f} ms  ({base / warm_t:5.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark message trimming")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.messages, args.max_tokens, args.repeat)
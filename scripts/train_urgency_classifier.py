@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Train and evaluate the local urgency classifier.
+
+    python scripts/train_urgency_classifier.py train
+    python scripts/train_urgency_classifier.py eval --limit 200
+    python scripts/train_urgency_classifier.py eval --no-llm
+
+``train`` fits the model on the LLM-scored and reviewer-approved tasks of
+the task store, leaving out the ``--holdout`` slice chosen by a hash of the
+task id (pass ``--holdout 0`` to use every task), and saves it to
+``URGENCY_MODEL_PATH``. ``eval`` compares the classifier with
+the LLM scorer (or with the stored priorities when ``--no-llm`` is given)
+on a held-out slice and prints agreement and coverage per confidence
+threshold plus latency per item, to help choose
+``URGENCY_MIN_CONFIDENCE``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.urgency_classifier import (  # noqa: E402
+    DEFAULT_PATH,
+    UrgencyClassifier,
+    load_training_records,
+)
+
+THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+def _held_out(task_id: str, holdout: float, seed: int) -> bool:
+    digest = hashlib.sha256(f"{seed}:{task_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") < holdout * 2**64
+
+
+def _split(records: list, holdout: float, seed: int) -> tuple[list, list]:
+    """Split on a hash of the task id, so a task stays on its side as the store grows."""
+    fit, held = [], []
+    for record in records:
+        (held if _held_out(record[0], holdout, seed) else fit).append(record)
+    return fit, held
+
+
+def train(args: argparse.Namespace) -> None:
+    records = load_training_records(args.db, args.hitl_log)
+    if len(records) < 2:
+        sys.exit("not enough labelled tasks to train on")
+    fit, held = _split(records, args.holdout, args.seed)
+    if len({r[2] for r in fit}) < 2:
+        sys.exit("training tasks need at least two distinct priorities; no model written")
+    start = time.perf_counter()
+    model = UrgencyClassifier.fit(
+        [r[1] for r in fit],
+        [r[2] for r in fit],
+        [r[3] for r in fit],
+        dim=args.dim,
+        epochs=args.epochs,
+    )
+    elapsed = time.perf_counter() - start
+    if held:
+        preds = model.predict([r[1] for r in held])
+        acc = sum(p == r[2] for (p, _), r in zip(preds, held)) / len(held)
+        print(f"holdout accuracy {acc:.3f} on {len(held)} tasks")
+    model.save(args.model)
+    print(f"trained on {len(fit)} tasks in {elapsed:.2f}s, labels={model.labels} -> {args.model}")
+
+
+def _llm_priorities(objectives: list) -> tuple[list, float]:
+    from agent.llm_providers import CachedLLMClient, get_default_client
+    from agent.nodes import _priority_from_score, _score_with_llm, load_priority_rules
+
+    llm = get_default_client()
+    # Time real calls; the response cache would answer repeated objectives.
+    while isinstance(llm, CachedLLMClient):
+        llm = llm.inner
+    rules = load_priority_rules()
+    start = time.perf_counter()
+    out = [_priority_from_score(_score_with_llm(llm, obj) or 0.0, rules) for obj in objectives]
+    return out, (time.perf_counter() - start) / max(len(objectives), 1)
+
+
+def evaluate(args: argparse.Namespace) -> None:
+    model = UrgencyClassifier.load(args.model)
+    records = load_training_records(args.db, args.hitl_log)
+    _, held = _split(records, args.holdout, args.seed)
+    held = held[: args.limit] if args.limit else held
+    if not held:
+        sys.exit("no held-out tasks to evaluate")
+    objectives = [r[1] for r in held]
+
+    start = time.perf_counter()
+    preds = model.predict(objectives)
+    clf_latency = (time.perf_counter() - start) / len(objectives)
+
+    if args.no_llm:
+        reference, ref_name, ref_latency = [r[2] for r in held], "stored priority", None
+    else:
+        reference, ref_latency = _llm_priorities(objectives)
+        ref_name = "LLM"
+
+    print(f"{len(objectives)} held-out tasks, reference: {ref_name}")
+    print(f"classifier latency {clf_latency * 1e3:.3f} ms/item")
+    if ref_latency is not None:
+        print(f"LLM latency        {ref_latency * 1e3:.1f} ms/item")
+    print("threshold  coverage  agreement")
+    for t in THRESHOLDS:
+        kept = [(p, ref) for (p, conf), ref in zip(preds, reference) if conf >= t]
+        agree = sum(p == ref for p, ref in kept) / len(kept) if kept else float("nan")
+        print(f"{t:9.2f}  {len(kept) / len(preds):8.1%}  {agree:9.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local urgency classifier")
+    parser.add_argument("command", choices=["train", "eval"])
+    parser.add_argument("--db", default="data/tasks.db")
+    parser.add_argument("--hitl-log", default="logs/hitl_log.jsonl")
+    parser.add_argument("--model", default=os.environ.get("URGENCY_MODEL_PATH", DEFAULT_PATH))
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dim", type=int, default=2**16)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=0, help="evaluate at most this many tasks")
+    parser.add_argument("--no-llm", action="store_true", help="compare with stored priorities")
+    args = parser.parse_args()
+    if args.command == "train":
+        train(args)
+    else:
+        evaluate(args)
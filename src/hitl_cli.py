@@ -6,6 +6,7 @@ import argparse
 import glob
 import json
 import os
+import sys
 import time
 from datetime import datetime
 
@@ -14,6 +15,11 @@ from langchain_community.embeddings import OllamaEmbeddings
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
 
+if not __package__:  # pragma: no cover - direct script execution
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.resources import qdrant_url, shared, shared_embeddings
+
 QUEUE_DIR = "data/hitl_queue"
 REFLECT_DIR = "logs"
 COLLECTION = "reflections_log"
@@ -53,8 +59,12 @@ def process_queue(action: str = "approved") -> None:
             json.dumps({"task_id": task.get("task_id"), "result": action, "ts": datetime.utcnow().isoformat()})
             + "\n"
         )
-    client = QdrantClient(url="http://localhost:6333")
-    store = Qdrant(client=client, collection_name=COLLECTION, embeddings=OllamaEmbeddings())
+    url = qdrant_url()
+    store = Qdrant(
+        client=shared(("qdrant", url), lambda: QdrantClient(url=url)),
+        collection_name=COLLECTION,
+        embeddings=shared_embeddings("ollama", OllamaEmbeddings),
+    )
     store.add_texts(
         [json.dumps({"task_id": task.get("task_id"), "result": action})],
         ids=[task.get("task_id", "")],
@@ -16,6 +16,8 @@ from langfuse.langchain import CallbackHandler
 from langfuse import Langfuse
 from langgraph.graph import StateGraph, END
 
+from agent.resources import qdrant_url, shared, shared_embeddings
+
 
 @dataclass
 class AgentState:
@@ -38,12 +40,12 @@ class AgentState:
 
 def _build_retriever() -> any:
     """Create a Qdrant hybrid retriever."""
-    client = QdrantClient(url=os.environ.get("QDRANT_URL", "http://localhost:6333"))
+    url = qdrant_url()
     collection = os.environ.get("QDRANT_COLLECTION", "ingestion")
     vectorstore = Qdrant(
-        client=client,
+        client=shared(("qdrant", url), lambda: QdrantClient(url=url)),
         collection_name=collection,
-        embeddings=OllamaEmbeddings(),
+        embeddings=shared_embeddings("ollama", OllamaEmbeddings),
     )
     return vectorstore.as_retriever()
 
@@ -67,7 +69,7 @@ def answer_step(state: AgentState) -> Dict[str, List[BaseMessage]]:
     if state.get("context_docs"):
         context = "\n".join(state["context_docs"])
         prompt = f"Context:\n{context}\n---\n{prompt}"
-    ai: AIMessage = llm.chat([HumanMessage(content=prompt)])
+    ai: AIMessage = llm.chat([HumanMessage(content=prompt)], profile="respond")
     return {"messages": state["messages"] + [ai]}
 
 
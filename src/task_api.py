@@ -1,7 +1,40 @@
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from agent import tasks_db
+from agent.llm_providers.ollama_residency import residency_manager, warm_default_models
+
+
+def _warm_models() -> None:
+    try:
+        logging.info("Ollama preload: %s", warm_default_models())
+    except Exception:
+        logging.warning("Ollama preload failed", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Preload Ollama models in the background so startup is not blocked."""
+    if os.environ.get("OLLAMA_PRELOAD", "true").lower() in {"1", "true", "yes"}:
+        threading.Thread(target=_warm_models, name="ollama-preload", daemon=True).start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
 
-app = FastAPI()
+@app.get("/models/resident")
+def resident_models():
+    """Report loaded Ollama models and cold-load counters."""
+    manager = residency_manager()
+    try:
+        resident = manager.resident()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"Ollama unavailable: {exc}")
+    return {"resident": resident, **manager.stats()}
 
 
 @app.get("/tasks")
@@ -3,12 +3,21 @@ from unittest.mock import MagicMock
 
 
 @pytest.fixture(autouse=True)
-def _mock_clients(monkeypatch):
+def _mock_clients(monkeypatch, tmp_path):
     import importlib
+    from agent.resources import reset_resources
+
     rc = importlib.import_module("agent.retrieve_context")
     dummy = MagicMock()
     monkeypatch.setattr(rc.GraphDatabase, "driver", lambda *a, **k: dummy)
     monkeypatch.setattr("ingestion.build_pkg.GraphDatabase.driver", lambda *a, **k: dummy)
     monkeypatch.setattr("qdrant_client.QdrantClient", lambda *a, **k: dummy)
+    monkeypatch.setenv("SCORE_CACHE_PATH", str(tmp_path / "score_cache.db"))
+    monkeypatch.setenv("URGENCY_MODEL_PATH", str(tmp_path / "urgency_model.npz"))
+    monkeypatch.setenv("PKG_VERSION_FILE", str(tmp_path / "pkg_version"))
+    monkeypatch.setenv("PKG_GAZETTEER_PATH", str(tmp_path / "pkg_gazetteer.npz"))
+    monkeypatch.setenv("PKG_TRIGRAM_PATH", str(tmp_path / "pkg_trigrams.npz"))
+    rc.clear_pkg_cache()
+    reset_resources()
     yield
-
+    reset_resources()
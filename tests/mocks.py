@@ -14,6 +14,13 @@ class DummyChatModel:
         yield AIMessage(content="ok1")
         yield AIMessage(content="ok2")
 
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+    async def astream(self, messages, **kwargs):
+        for chunk in self.stream(messages, **kwargs):
+            yield chunk
+
 
 class DummyEmbeddingModel:
     def __init__(self, *_, **__):
@@ -22,6 +29,9 @@ class DummyEmbeddingModel:
     def embed_documents(self, texts):
         return [[1.0, 0.0, 0.0] for _ in texts]
 
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
 
 class DummyGenerativeModel:
     def __init__(self, *_, **__):
@@ -37,6 +47,16 @@ class DummyGenerativeModel:
             return _gen()
         return type("Resp", (), {"text": "ok"})
 
+    async def generate_content_async(self, content, stream=False):
+        if stream:
+
+            async def _agen():
+                for t in ["ok1", "ok2"]:
+                    yield type("Resp", (), {"text": t})
+
+            return _agen()
+        return type("Resp", (), {"text": "ok"})
+
 
 class DummyResponse:
     def __init__(self, json_data=None, lines=None):
@@ -49,7 +69,7 @@ class DummyResponse:
     def json(self):
         return self._json
 
-    def iter_lines(self):
+    def iter_lines(self, chunk_size=512):
         for line in self._lines:
             yield line.encode()
 
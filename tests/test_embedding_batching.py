@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from agent.llm_providers.batching import EmbeddingBatcher
+
+
+class SlowEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [0.0]
+
+
+def test_concurrent_callers_share_one_batch():
+    inner = SlowEmbeddings()
+    batcher = EmbeddingBatcher(inner, max_batch=64, window=0.2)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def call(i):
+        barrier.wait()
+        results[i] = batcher.embed_documents(["x" * i, "shared"])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(1, 9)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert len(inner.calls) == 1
+    assert sorted(inner.calls[0]) == sorted(["x" * i for i in range(1, 9)] + ["shared"])
+    for i, vecs in results.items():
+        assert vecs == [[float(i)], [6.0]]
+    assert batcher.stats()["requests"] == 8
+
+
+def test_batch_flushes_at_max_size():
+    inner = SlowEmbeddings()
+    batcher = EmbeddingBatcher(inner, max_batch=2, window=5)
+    futs = [batcher.submit([f"t{i}"]) for i in range(4)]
+    assert [f.result(timeout=2) for f in futs] == [[[2.0]]] * 4
+    batcher.close()
+    assert all(len(c) <= 2 for c in inner.calls)
+
+
+def test_errors_propagate_to_every_caller():
+    class Broken(SlowEmbeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("ollama down")
+
+    batcher = EmbeddingBatcher(Broken(), window=0.05)
+    futs = [batcher.submit(["a"]), batcher.submit(["b"])]
+    for fut in futs:
+        with pytest.raises(RuntimeError):
+            fut.result(timeout=2)
+    batcher.close()
+
+
+def test_async_callers_are_coalesced():
+    inner = SlowEmbeddings()
+    batcher = EmbeddingBatcher(inner, window=0.1)
+
+    async def run():
+        return await asyncio.gather(*(batcher.aembed_documents([str(i)]) for i in range(5)))
+
+    assert asyncio.run(run()) == [[[1.0]]] * 5
+    batcher.close()
+    assert len(inner.calls) == 1
+
+
+def test_cancelled_async_caller_does_not_stop_worker():
+    inner = SlowEmbeddings()
+    batcher = EmbeddingBatcher(inner, window=0.1)
+
+    async def run():
+        task = asyncio.ensure_future(batcher.aembed_documents(["gone"]))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await batcher.aembed_documents(["kept"])
+
+    assert asyncio.run(run()) == [[4.0]]
+    assert batcher.embed_documents(["again"]) == [[5.0]]
+    assert batcher._worker.is_alive()
+    batcher.close()
+    assert all("gone" not in c for c in inner.calls)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from agent.llm_providers.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    model = "nomic"
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.batches.append([text])
+        return [float(len(text)), 0.5, -1.0]
+
+
+def test_bulk_lookup_only_embeds_misses(tmp_path):
+    inner = CountingEmbeddings()
+    emb = CachedEmbeddings(inner, EmbeddingCache(str(tmp_path)))
+    assert emb.embed_documents(["a", "bb"]) == [[1.0, 0.5, -1.0], [2.0, 0.5, -1.0]]
+    out = emb.embed_documents(["bb", "ccc", "ccc", "a"])
+    assert out[1] == out[2] == [3.0, 0.5, -1.0]
+    assert inner.batches == [["a", "bb"], ["ccc"]]
+    assert emb.cache.stats()["size"] == 3
+
+
+def test_query_embeddings_are_cached(tmp_path):
+    inner = CountingEmbeddings()
+    emb = CachedEmbeddings(inner, EmbeddingCache(str(tmp_path)))
+    emb.embed_query("hello")
+    assert emb.embed_query("hello") == [5.0, 0.5, -1.0]
+    assert emb.embed_documents(["hello"]) == [[5.0, 0.5, -1.0]]
+    assert inner.batches == [["hello"]]
+
+
+def test_vectors_stored_as_float16_and_persist(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many("m", ["x", "y"], [[0.1, 0.2], [0.3, 0.4]])
+    cache.put_many("m", ["z"], [[1.0, 2.0, 3.0]])
+    cache.close()
+    assert (tmp_path / "vectors_2.f16").stat().st_size == 2 * 2 * 2
+
+    reopened = EmbeddingCache(str(tmp_path))
+    x, missing, z = reopened.get_many("m", ["x", "nope", "z"])
+    assert missing is None
+    assert np.allclose(x, [0.1, 0.2], atol=1e-3)
+    assert z == [1.0, 2.0, 3.0]
+    # a different model is a different key
+    assert reopened.get_many("other", ["x"]) == [None]
+
+
+def test_large_batches_and_hits_match_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    texts = [f"t{i}" for i in range(1200)]
+    fresh = cache.embed_many("m", texts, lambda ts: [[0.1, len(t) / 3] for t in ts])
+    assert cache.stats()["size"] == 1200
+    # More keys than SQLite allows bound variables in one statement.
+    cache.put_many("m", texts + [f"u{i}" for i in range(40000)], [[0.1, 0.2]] * 41200)
+    assert cache.embed_many("m", texts, lambda ts: []) == fresh
+    assert fresh[0] == [float(np.float16(0.1)), float(np.float16(2 / 3))]
+
+
+def test_ollama_client_uses_cache_when_configured(monkeypatch, tmp_path):
+    from unittest.mock import patch
+    from agent.llm_providers import OllamaClient
+    from tests.mocks import DummyChatModel
+
+    monkeypatch.setenv("EMBED_CACHE_DIR", str(tmp_path))
+    inner = CountingEmbeddings()
+    with patch("agent.llm_providers.ollama_client.ChatOllama", DummyChatModel), patch(
+        "agent.llm_providers.ollama_client.OllamaEmbeddings", return_value=inner
+    ):
+        client = OllamaClient()
+    client.embed(["t1", "t2"])
+    client.embed(["t2", "t3"])
+    assert inner.batches == [["t1", "t2"], ["t3"]]
@@ -0,0 +1,113 @@
+import importlib
+from unittest.mock import MagicMock, patch
+
+from ingestion.gazetteer import Gazetteer, gazetteer, update_gazetteer
+
+
+def _sample():
+    gaz = Gazetteer()
+    gaz.add("Acme", "Company")
+    gaz.add("Acme Labs", "Company")
+    gaz.add("Jane Doe", "Person", "jane.d@example.com")
+    gaz.add("Al", "Person")
+    return gaz
+
+
+def test_find_prefers_longest_match_on_word_boundaries():
+    found = _sample().find("Ask jane.d@example.com whether ACME   labs also beat Acme, cc Al.")
+    assert [m["entity"] for m in found] == ["Jane Doe", "Acme Labs", "Acme", "Al"]
+    assert found[0] == {"entity": "Jane Doe", "type": "Person", "email": "jane.d@example.com"}
+    assert _sample().find("Alice acmes the realm") == []
+
+
+def test_scan_returns_unmatched_segments():
+    found, rest = _sample().scan("Ask Acme Labs and  AL about it")
+    assert [m["entity"] for m in found] == ["Acme Labs", "Al"]
+    assert rest == ["ask", "and", "about it"]
+
+
+def test_incremental_add_and_roundtrip(tmp_path):
+    gaz = _sample()
+    assert gaz.find("ping Bob") == []
+    assert gaz.add("Bob", "Person")
+    assert not gaz.add("Bob", "Person")
+    assert [m["entity"] for m in gaz.find("ping Bob")] == ["Bob"]
+    path = str(tmp_path / "g.npz")
+    gaz.save(path)
+    loaded = Gazetteer.load(path)
+    text = "Jane Doe and bob met at Acme Labs"
+    assert loaded.find(text) == gaz.find(text)
+    loaded.add("Labs", "Project")
+    assert [m["entity"] for m in loaded.find("labs and acme")] == ["Labs", "Acme"]
+
+
+def test_update_gazetteer_rewrites_file_only_on_change(tmp_path):
+    path = str(tmp_path / "g.npz")
+    assert update_gazetteer([("Alice", "Person", None)], path) == 1
+    first = gazetteer(path)
+    assert update_gazetteer([("Alice", "Person", None)], path) == 0
+    assert gazetteer(path) is first
+    assert update_gazetteer([("Alice", "Person", "alice@example.com")], path) == 1
+    assert gazetteer(path).find("mail alice@example.com")[0]["entity"] == "Alice"
+
+
+def test_store_triples_seeds_then_extends_gazetteer():
+    from ingestion import build_pkg
+
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = [
+        {"name": "Jane Doe", "labels": ["Person"], "email": "jd@example.com"}
+    ]
+    with patch("ingestion.build_pkg.GraphDatabase.driver", return_value=fake_driver):
+        build_pkg._store_triples([("Jane Doe", "Person", "WORKS_ON", "ProjectX", "Project")])
+        assert [m["entity"] for m in gazetteer().find("jd@example.com on ProjectX")] == ["Jane Doe"]
+        fake_session.run.reset_mock()
+        build_pkg._store_triples([("Bob", "Person", "WORKS_ON", "ProjectX", "Project")])
+    assert all("labels(e)" not in c.args[0] for c in fake_session.run.call_args_list)
+    found = gazetteer().find("Jane Doe, Bob and ProjectX")
+    assert [m["entity"] for m in found] == ["Jane Doe", "Bob", "ProjectX"]
+
+
+def test_query_pkg_uses_gazetteer_matches_and_falls_back_to_fulltext():
+    rc = importlib.import_module("agent.retrieve_context")
+    update_gazetteer(
+        [
+            ("Jane Doe", "Person", None),
+            ("ProjectX", "Project", None),
+            ("Acme Corporation", "Company", None),
+        ]
+    )
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = [{"id": "7", "entity": "Jane Doe"}]
+    with patch.object(rc.GraphDatabase, "driver", return_value=fake_driver):
+        assert rc.query_pkg("what is it?") == ([], [])
+        assert not fake_session.run.called
+        assert rc.query_pkg("status of projectx for jane doe") == (
+            ["7"],
+            [{"doc_id": "7", "entity": "Jane Doe"}],
+        )
+        cypher, params = fake_session.run.call_args[0][0], fake_session.run.call_args.kwargs
+        assert "fulltext" not in cypher
+        assert params == {"names": ["ProjectX", "Jane Doe"]}
+        rc.query_pkg("what did acme send")
+    cypher, params = fake_session.run.call_args[0][0], fake_session.run.call_args.kwargs
+    assert "db.index.fulltext.queryNodes" in cypher
+    assert params["terms"] == "did OR acme OR send"
+
+
+def test_unreadable_gazetteer_is_ignored(tmp_path, caplog):
+    import numpy as np
+
+    from ingestion.gazetteer import gazetteer_path
+
+    rc = importlib.import_module("agent.retrieve_context")
+    with open(gazetteer_path(), "wb") as fh:
+        np.savez(fh, format=np.array(99))
+    assert gazetteer() is None
+    assert "unreadable gazetteer" in caplog.text
+    assert rc.mentioned_entities("ask Jane Doe") == []
+    with open(gazetteer_path(), "wb") as fh:
+        fh.write(b"not a zip")
+    assert gazetteer() is None
@@ -0,0 +1,90 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agent.llm_providers import LLMClient
+from agent.llm_providers.cache import CachedLLMClient, ResponseCache, cache_key
+
+
+class CountingClient(LLMClient):
+    backend = "fake"
+    model = "m1"
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages, **kwargs):
+        self.calls += 1
+        return AIMessage(content=f"answer {self.calls}")
+
+    def stream_chat(self, messages, **kwargs):
+        yield self.chat(messages)
+
+    def embed(self, texts):
+        return [[0.0] for _ in texts]
+
+    def count_tokens(self, messages):
+        return 0
+
+
+def test_cache_hits_identical_prompts(tmp_path):
+    inner = CountingClient()
+    client = CachedLLMClient(inner, ResponseCache(str(tmp_path / "c.db")))
+    msgs = [SystemMessage(content="rules"), HumanMessage(content="urgent?")]
+    assert client.chat(msgs).content == "answer 1"
+    assert client.chat(list(msgs)).content == "answer 1"
+    # trailing whitespace and tracing metadata do not change the key
+    again = [SystemMessage(content="rules\n"), HumanMessage(content="urgent?")]
+    assert client.chat(again, metadata={"trimmed": True}).content == "answer 1"
+    assert inner.calls == 1
+    assert client.cache.stats()["hits"] == 2
+    assert client.cache.stats()["misses"] == 1
+    # generation kwargs are part of the key
+    assert client.chat(msgs, temperature=0).content == "answer 2"
+
+
+def test_cache_bypass_and_ttl(tmp_path):
+    inner = CountingClient()
+    client = CachedLLMClient(inner, ResponseCache(str(tmp_path / "c.db")))
+    msgs = [HumanMessage(content="hi")]
+    client.chat(msgs)
+    assert client.chat(msgs, cache=False).content == "answer 2"
+    client.chat([HumanMessage(content="expiring")], cache_ttl=-1)
+    assert client.chat([HumanMessage(content="expiring")]).content == "answer 4"
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.db"), max_entries=2)
+    keys = [cache_key("b", "m", [HumanMessage(content=str(i))], {}) for i in range(3)]
+    cache.put(keys[0], AIMessage(content="0"))
+    cache.put(keys[1], AIMessage(content="1"))
+    assert cache.get(keys[0]).content == "0"  # touch 0 so 1 is least recent
+    cache.put(keys[2], AIMessage(content="2"))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).content == "0"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_cache_async_and_persistence(tmp_path):
+    path = str(tmp_path / "c.db")
+    inner = CountingClient()
+    client = CachedLLMClient(inner, ResponseCache(path))
+    msgs = [HumanMessage(content="hi")]
+    assert asyncio.run(client.achat(msgs)).content == "answer 1"
+    client.close()
+    reopened = CachedLLMClient(CountingClient(), ResponseCache(path))
+    assert reopened.chat(msgs).content == "answer 1"
+    assert reopened.backend == "fake"
+
+
+def test_default_client_wraps_when_configured(monkeypatch, tmp_path):
+    from unittest.mock import patch
+    from agent.llm_providers import OllamaClient, get_default_client
+
+    monkeypatch.setenv("LLM_BACKEND", "ollama")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.db"))
+    with patch.object(OllamaClient, "__init__", return_value=None):
+        client = get_default_client()
+    assert isinstance(client, CachedLLMClient)
+    assert client.backend == "ollama"
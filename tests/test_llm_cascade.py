@@ -0,0 +1,78 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agent.nodes as nodes
+from agent.llm_providers.cascade import CascadeClient, cascade, cascade_stats, stats
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    stats.reset()
+    yield
+    stats.reset()
+
+
+def _llm(content=None, error=None):
+    llm = MagicMock()
+    llm.chat.return_value = AIMessage(content=content or "")
+    if error:
+        llm.chat.side_effect = error
+    return llm
+
+
+def test_cascade_prefers_small_model_and_escalates():
+    small, large = _llm("0.2"), _llm("0.8")
+    client = CascadeClient(large, small, lambda ai: ai.content != "bad", "t")
+    out = client.chat([HumanMessage(content="x")], profile="score")
+    assert out.content == "0.2" and out.response_metadata["cascade"] == "small"
+    assert small.chat.call_args.kwargs == {"profile": "score"}
+    assert not large.chat.called
+
+    small.chat.return_value = AIMessage(content="bad")
+    assert client.chat([HumanMessage(content="x")]).response_metadata["cascade"] == "large"
+    small.chat.side_effect = RuntimeError("model not pulled")
+    assert client.chat([HumanMessage(content="x")]).content == "0.8"
+    snap = cascade_stats()["t"]
+    assert snap["calls"] == 3 and snap["accepted"] == 1
+    assert snap["rejected"] == 1 and snap["error"] == 1
+    assert snap["escalation_rate"] == pytest.approx(2 / 3)
+
+
+def test_cascade_async_and_disabled():
+    large = _llm("big")
+    assert cascade(large, None, lambda ai: True, "t") is large
+
+    class Small:
+        async def achat(self, messages, **kwargs):
+            return AIMessage(content="tiny")
+
+    large.achat = MagicMock()
+    client = cascade(large, Small(), lambda ai: True, "t")
+    assert asyncio.run(client.achat([])).content == "tiny"
+
+
+def test_score_acceptor_rejects_ambiguous_scores():
+    accept = nodes._score_acceptor({"llm_thresholds": {"critical": 0.9, "high": 0.75, "med": 0.5}})
+    assert accept(AIMessage(content="0.2"))
+    assert accept(AIMessage(content="0.62"))
+    assert not accept(AIMessage(content="0.73"))
+    assert not accept(AIMessage(content="0.5"))
+    assert not accept(AIMessage(content="urgent!"))
+    assert nodes._plan_acceptor(AIMessage(content="- a\n- b"))
+    assert nodes._plan_acceptor(AIMessage(content="1. a\n2) b"))
+    assert not nodes._plan_acceptor(AIMessage(content="Sure! Here is a plan:\n- a"))
+
+
+def test_prioritise_uses_small_model_when_configured():
+    small, large = _llm("0.1"), _llm("0.95")
+    state = {"tasks": ["water plants"]}
+    with patch("agent.nodes.add_task"), patch(
+        "agent.nodes.get_default_client", return_value=large
+    ), patch("agent.nodes.get_small_client", return_value=small):
+        out = nodes.prioritise(state)
+    assert out["tasks"][0]["priority"] == "low"
+    assert not large.chat.called
+    assert cascade_stats()["score"]["accepted"] == 1
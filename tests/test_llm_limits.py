@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.llm_providers import LLMClient
+from agent.llm_providers.deepseek_client import DeepSeekError
+from agent.llm_providers.limits import (
+    AIMDLimiter,
+    LimitTimeout,
+    RateLimitedClient,
+    TokenBucket,
+    is_overload_error,
+    limits_from_env,
+)
+
+
+class Busy(LLMClient):
+    def __init__(self, delay=0.02, error=None):
+        self.delay = delay
+        self.error = error
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return AIMessage(content="ok")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def stream_chat(self, messages, **kwargs):
+        yield AIMessage(content="a")
+        yield AIMessage(content="b")
+
+    def embed(self, texts):
+        return [[0.0] for _ in texts]
+
+    def count_tokens(self, messages):
+        return 0
+
+
+def test_token_bucket_enforces_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
+    empty = TokenBucket(rate=0.1, capacity=1)
+    empty.acquire()
+    with pytest.raises(LimitTimeout):
+        empty.acquire(timeout=0.01)
+
+
+def test_aimd_grows_when_stable_and_backs_off_on_overload():
+    window = AIMDLimiter(initial=2, maximum=5)
+    for _ in range(10):
+        window.acquire()
+        window.release(latency=0.1)
+    assert window.limit > 2
+    grown = window.limit
+    window.acquire()
+    window.release(overloaded=True)
+    assert window.limit == max(1, grown * 0.5)
+
+
+def test_window_caps_concurrency_and_reports_metrics():
+    inner = Busy(delay=0.05)
+    client = RateLimitedClient(inner, window=AIMDLimiter(initial=2, maximum=2))
+    seen = []
+
+    def call():
+        client.chat([HumanMessage(content="x")])
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    seen.append(client.metrics())
+    for t in threads:
+        t.join()
+    assert inner.peak == 2
+    assert seen[0]["in_flight"] == 2
+    assert seen[0]["queue_depth"] >= 1
+    assert client.metrics()["in_flight"] == 0
+
+
+def test_429_shrinks_window():
+    inner = Busy(delay=0, error=DeepSeekError("DeepSeek API error 429", status_code=429))
+    window = AIMDLimiter(initial=8, maximum=8)
+    client = RateLimitedClient(inner, window=window)
+    with pytest.raises(DeepSeekError):
+        client.chat([HumanMessage(content="x")])
+    assert window.limit == 4
+    assert window.in_flight == 0
+
+
+def test_abandoned_stream_releases_slot():
+    window = AIMDLimiter(initial=1, maximum=1)
+    client = RateLimitedClient(Busy(), window=window)
+    stream = client.stream_chat([])
+    next(iter(stream))
+    stream.close()
+    assert window.in_flight == 0
+
+
+def test_overload_classification():
+    import requests
+
+    assert is_overload_error(DeepSeekError("x", status_code=429))
+    assert is_overload_error(DeepSeekError("DeepSeek request timed out"))
+    assert is_overload_error(requests.Timeout())
+    assert not is_overload_error(DeepSeekError("bad", status_code=400))
+
+
+def test_limits_from_env(monkeypatch):
+    inner = Busy()
+    assert isinstance(limits_from_env("ollama", inner), RateLimitedClient)
+    assert limits_from_env("openai", inner) is inner
+    monkeypatch.setenv("OPENAI_RPS", "5")
+    limited = limits_from_env("openai", inner)
+    assert limited.metrics()["rate_limit"] == 5.0
+    assert limited.window is None
+
+
+def test_async_paths_respect_window():
+    import asyncio
+
+    window = AIMDLimiter(initial=1, maximum=1)
+    client = RateLimitedClient(Busy(delay=0.01), window=window)
+
+    async def run():
+        return await asyncio.gather(*(client.achat([]) for _ in range(3)))
+
+    assert [m.content for m in asyncio.run(run())] == ["ok"] * 3
+    assert window.in_flight == 0
+
+
+def test_cancelled_async_waiter_does_not_leak_slot():
+    import asyncio
+
+    window = AIMDLimiter(initial=1, maximum=1)
+    client = RateLimitedClient(Busy(delay=0.01), window=window)
+    window.acquire()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.achat([]), timeout=0.05)
+        window.release()
+        return await asyncio.wait_for(client.achat([]), timeout=2)
+
+    assert asyncio.run(run()).content == "ok"
+    deadline = time.monotonic() + 1
+    while window.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert window.in_flight == 0
@@ -0,0 +1,83 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.llm_providers import DeepSeekClient, GeminiClient, OllamaClient
+from agent.llm_providers.profiles import (
+    PROFILES,
+    GenerationProfile,
+    gemini_config,
+    get_profile,
+    ollama_options,
+    openai_options,
+)
+from tests.mocks import DummyEmbeddingModel, DummyResponse
+
+JSON_PROFILE = GenerationProfile(
+    "extract", max_tokens=64, stop=("END",), temperature=0.0, json=True
+)
+
+
+def test_profiles_translate_to_native_options():
+    assert openai_options(JSON_PROFILE) == {
+        "max_tokens": 64,
+        "stop": ["END"],
+        "temperature": 0.0,
+        "response_format": {"type": "json_object"},
+    }
+    assert ollama_options(JSON_PROFILE) == {
+        "num_predict": 64,
+        "stop": ["END"],
+        "temperature": 0.0,
+        "format": "json",
+    }
+    assert gemini_config(JSON_PROFILE) == {
+        "max_output_tokens": 64,
+        "stop_sequences": ["END"],
+        "temperature": 0.0,
+        "response_mime_type": "application/json",
+    }
+    assert openai_options(None) == {}
+    assert get_profile("score") is PROFILES["score"]
+    with pytest.raises(KeyError):
+        get_profile("missing")
+
+
+def test_ollama_client_applies_profile():
+    chat_model = MagicMock()
+    chat_model.invoke.return_value = AIMessage(content="0.7")
+    with patch("agent.llm_providers.ollama_client.ChatOllama", return_value=chat_model), patch(
+        "agent.llm_providers.ollama_client.OllamaEmbeddings", return_value=DummyEmbeddingModel()
+    ):
+        client = OllamaClient()
+    client.chat([HumanMessage(content="hi")], profile="score", temperature=0.5)
+    kwargs = chat_model.invoke.call_args.kwargs
+    assert kwargs["num_predict"] == PROFILES["score"].max_tokens
+    assert kwargs["temperature"] == 0.5
+    assert "profile" not in kwargs
+
+
+def test_deepseek_payload_includes_profile():
+    sent = []
+
+    def fake_post(url, headers=None, json=None, stream=False, timeout=None):
+        sent.append(json)
+        return DummyResponse(json_data={"choices": [{"message": {"content": "{}"}}]})
+
+    with patch("agent.llm_providers.deepseek_client.requests.Session.post", side_effect=fake_post):
+        DeepSeekClient().chat([HumanMessage(content="hi")], profile=JSON_PROFILE)
+    assert sent[0]["max_tokens"] == 64
+    assert sent[0]["response_format"] == {"type": "json_object"}
+
+
+def test_gemini_passes_generation_config():
+    model = MagicMock()
+    model.generate_content.return_value = type("Resp", (), {"text": "ok"})
+    module = type(
+        "M", (), {"GenerativeModel": lambda *a, **k: model, "configure": lambda **_: None}
+    )
+    with patch("agent.llm_providers.gemini_client.genai", module):
+        GeminiClient().chat([HumanMessage(content="hi")], profile="plan")
+    config = model.generate_content.call_args.kwargs["generation_config"]
+    assert config["max_output_tokens"] == PROFILES["plan"].max_tokens
@@ -2,7 +2,7 @@ import os, sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from langchain_core.messages import HumanMessage, AIMessage
 
@@ -14,6 +14,7 @@ from agent.llm_providers import (
     DeepSeekClient,
 )
 
+from agent.llm_providers.metrics import metrics, stream_metrics
 from tests.mocks import (
     DummyChatModel,
     DummyEmbeddingModel,
@@ -48,6 +49,13 @@ def test_openai_chat_invokes_sdk(monkeypatch):
     assert client.embed(["a", "b"]) == [[1.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
 
 
+@pytest.fixture(autouse=True)
+def _reset_stream_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
 def test_ollama_client(monkeypatch):
     fake_model = DummyChatModel()
     fake_embed = DummyEmbeddingModel()
@@ -80,10 +88,28 @@ def test_gemini_client(monkeypatch):
         client.embed(["x"])
 
 
+SSE_LINES = [
+    ": keep-alive",
+    "",
+    'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+    "",
+    'data: {"choices": [{"delta": {"content": "ok1"}}]}',
+    "",
+    'data: {"choices": [{"delta": {"content": "ok2"}}]}',
+    "",
+    'data: {"choices": [], '
+    '"usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}',
+    "",
+    "data: [DONE]",
+    "",
+    'data: {"choices": [{"delta": {"content": "ignored"}}]}',
+]
+
+
 def test_deepseek_client(monkeypatch):
     def fake_post(url, headers=None, json=None, stream=False, timeout=None):
         if stream:
-            return DummyResponse(lines=["ok1", "ok2"])
+            return DummyResponse(lines=SSE_LINES)
         if "embeddings" in url:
             data = {"data": [{"embedding": [1.0, 0.0, 0.0]}]}
         else:
@@ -91,17 +117,43 @@ def test_deepseek_client(monkeypatch):
         return DummyResponse(json_data=data)
 
     with patch(
-        "agent.llm_providers.deepseek_client.requests.post", side_effect=fake_post
+        "agent.llm_providers.deepseek_client.requests.Session.post", side_effect=fake_post
     ):
         client = DeepSeekClient()
         assert client.chat([HumanMessage(content="hi")]).content == "ok"
-        assert [
-            m.content for m in client.stream_chat([HumanMessage(content="hi")])
-        ] == [
-            "ok1",
-            "ok2",
-        ]
+        chunks = list(client.stream_chat([HumanMessage(content="hi")]))
+        assert [m.content for m in chunks] == ["ok1", "ok2", ""]
+        assert sum(chunks[1:], chunks[0]).usage_metadata["output_tokens"] == 2
         assert client.embed(["t1"]) == [[1.0, 0.0, 0.0]]
+    stats = stream_metrics()["deepseek"]
+    assert stats["streams"] == 1 and stats["tokens"] == 2
+    assert stats["ttft_last"] is not None
+
+
+def test_ttft_avg_ignores_streams_without_first_token():
+    from agent.llm_providers.metrics import StreamMetrics
+
+    m = StreamMetrics()
+    m.record("x", 0.2, 4, 1.2)
+    m.record("x", None, 0, 0.5)
+    m.record("x", 0.4, 2, 0.9)
+    stats = m.snapshot()["x"]
+    assert stats["streams"] == 3 and stats["ttft_streams"] == 2
+    assert stats["ttft_avg"] == pytest.approx(0.3)
+    m.record("y", None, 0, 0.1)
+    assert m.snapshot()["y"]["ttft_avg"] is None
+
+
+def test_sse_parser_handles_multiline_events_and_done():
+    from agent.llm_providers.deepseek_client import SSEParser
+
+    parser = SSEParser()
+    out = []
+    lines = [b"data: a", b"data:b", b"", b": ping", b"event: x", b"data: c", b"", b"data: [DONE]"]
+    for line in lines + [b""]:
+        out.extend(parser.feed(line))
+    assert out == ["a\nb", "c"]
+    assert parser.done
 
 
 def test_deepseek_timeout(monkeypatch):
@@ -113,7 +165,7 @@ def test_deepseek_timeout(monkeypatch):
         raise requests.Timeout()
 
     with patch(
-        "agent.llm_providers.deepseek_client.requests.post", side_effect=fake_post
+        "agent.llm_providers.deepseek_client.requests.Session.post", side_effect=fake_post
     ):
         client = DeepSeekClient()
         with pytest.raises(DeepSeekError):
@@ -124,9 +176,216 @@ def test_deepseek_non_200(monkeypatch):
     from agent.llm_providers.deepseek_client import DeepSeekError
 
     with patch(
-        "agent.llm_providers.deepseek_client.requests.post",
+        "agent.llm_providers.deepseek_client.requests.Session.post",
         return_value=ErrorResponse(status_code=500, text="fail"),
     ):
         client = DeepSeekClient()
         with pytest.raises(DeepSeekError):
             client.chat([HumanMessage(content="hi")])
+
+
+async def _collect(agen):
+    return [m.content async for m in agen]
+
+
+def test_async_api_native_clients():
+    import asyncio
+
+    fake_model = DummyChatModel()
+    with patch(
+        "agent.llm_providers.ollama_client.ChatOllama", return_value=fake_model
+    ), patch(
+        "agent.llm_providers.ollama_client.OllamaEmbeddings",
+        return_value=DummyEmbeddingModel(),
+    ):
+        ollama = OllamaClient()
+    dummy_module = type(
+        "M",
+        (),
+        {"GenerativeModel": DummyGenerativeModel, "configure": lambda **_: None},
+    )
+    with patch("agent.llm_providers.gemini_client.genai", dummy_module):
+        gemini = GeminiClient()
+
+    async def run():
+        msgs = [HumanMessage(content="hi")]
+        out = await asyncio.gather(ollama.achat(msgs), gemini.achat(msgs))
+        assert [m.content for m in out] == ["ok", "ok"]
+        assert await _collect(ollama.astream_chat(msgs)) == ["ok1", "ok2"]
+        assert await _collect(gemini.astream_chat(msgs)) == ["ok1", "ok2"]
+        assert await ollama.aembed(["t"]) == [[1.0, 0.0, 0.0]]
+
+    asyncio.run(run())
+    stats = stream_metrics()
+    assert stats["ollama"]["streams"] == 1 and stats["ollama"]["tokens"] == 2
+    assert stats["gemini"]["streams"] == 1
+
+
+def test_deepseek_async_uses_pooled_client():
+    import asyncio
+    import httpx
+
+    def handler(request):
+        if request.url.path.endswith("embeddings"):
+            return httpx.Response(200, json={"data": [{"embedding": [1.0, 0.0, 0.0]}]})
+        if b'"stream"' in request.content:
+            return httpx.Response(200, text="\n".join(SSE_LINES))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    created = []
+    real_client = httpx.AsyncClient
+
+    def make_client(**kwargs):
+        created.append(kwargs)
+        return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    client = DeepSeekClient()
+    with patch("agent.llm_providers.deepseek_client.httpx.AsyncClient", make_client):
+
+        async def run():
+            msgs = [HumanMessage(content="hi")]
+            out = await asyncio.gather(client.achat(msgs), client.achat(msgs))
+            assert [m.content for m in out] == ["ok", "ok"]
+            assert await _collect(client.astream_chat(msgs)) == ["ok1", "ok2", ""]
+            assert await client.aembed(["t1"]) == [[1.0, 0.0, 0.0]]
+
+        asyncio.run(run())
+    assert len(created) == 1
+
+
+def test_deepseek_close_inside_running_loop_closes_pool():
+    import asyncio
+
+    client = DeepSeekClient()
+
+    async def run():
+        pool = client._async_client()
+        client.close()
+        assert not client._async_clients
+        await asyncio.sleep(0)
+        return pool
+
+    assert asyncio.run(run()).is_closed
+    # Outside a loop the pool of a stopped loop is closed synchronously.
+    loop = asyncio.new_event_loop()
+    client._async_clients[loop] = pool = MagicMock(aclose=AsyncMock())
+    client.close()
+    loop.close()
+    pool.aclose.assert_awaited_once()
+
+
+def test_deepseek_async_error():
+    import asyncio
+    import httpx
+    from agent.llm_providers.deepseek_client import DeepSeekError
+
+    real_client = httpx.AsyncClient
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, text="slow down"))
+    with patch(
+        "agent.llm_providers.deepseek_client.httpx.AsyncClient",
+        lambda **kw: real_client(transport=transport, **kw),
+    ):
+        client = DeepSeekClient()
+        with pytest.raises(DeepSeekError):
+            asyncio.run(client.achat([HumanMessage(content="hi")]))
+
+
+def test_base_async_defaults_offload_sync_methods():
+    import asyncio
+    from agent.llm_providers import LLMClient
+
+    class SyncOnly(LLMClient):
+        def chat(self, messages, **kwargs):
+            return AIMessage(content="sync")
+
+        def stream_chat(self, messages, **kwargs):
+            yield AIMessage(content="a")
+            yield AIMessage(content="b")
+
+        def embed(self, texts):
+            return [[0.5] for _ in texts]
+
+        def count_tokens(self, messages):
+            return 0
+
+    client = SyncOnly()
+
+    async def run():
+        assert (await client.achat([])).content == "sync"
+        assert await _collect(client.astream_chat([])) == ["a", "b"]
+        assert await client.aembed(["x", "y"]) == [[0.5], [0.5]]
+
+    asyncio.run(run())
+
+
+def test_deepseek_maps_roles_and_reports_cached_tokens():
+    from langchain_core.messages import SystemMessage
+
+    sent = []
+
+    def fake_post(url, headers=None, json=None, stream=False, timeout=None):
+        sent.append(json)
+        usage = {
+            "prompt_tokens": 40,
+            "completion_tokens": 2,
+            "total_tokens": 42,
+            "prompt_cache_hit_tokens": 32,
+            "prompt_cache_miss_tokens": 8,
+        }
+        return DummyResponse(
+            json_data={"choices": [{"message": {"content": "ok"}}], "usage": usage}
+        )
+
+    msgs = [
+        SystemMessage(content="Be brief."),
+        HumanMessage(content="hi"),
+        AIMessage(content="hello"),
+        HumanMessage(content="plan"),
+    ]
+    with patch(
+        "agent.llm_providers.deepseek_client.requests.Session.post", side_effect=fake_post
+    ):
+        ai = DeepSeekClient().chat(msgs)
+    assert [m["role"] for m in sent[0]["messages"]] == ["system", "user", "assistant", "user"]
+    assert sent[0]["messages"][0]["content"] == "Be brief."
+    assert ai.response_metadata["cached_tokens"] == 32
+    assert ai.usage_metadata["input_token_details"]["cache_read"] == 32
+
+
+def test_gemini_uses_system_instruction_and_reports_cached_tokens():
+    from langchain_core.messages import SystemMessage
+
+    created = []
+
+    class Model(DummyGenerativeModel):
+        def __init__(self, name, system_instruction=None):
+            created.append(system_instruction)
+            self.calls = []
+
+        def generate_content(self, content, stream=False):
+            self.calls.append(content)
+            usage = type(
+                "U",
+                (),
+                {
+                    "prompt_token_count": 10,
+                    "candidates_token_count": 1,
+                    "cached_content_token_count": 8,
+                },
+            )
+            return type("Resp", (), {"text": "ok", "usage_metadata": usage})
+
+    dummy_module = type("M", (), {"GenerativeModel": Model, "configure": lambda **_: None})
+    with patch("agent.llm_providers.gemini_client.genai", dummy_module):
+        client = GeminiClient()
+        msgs = [
+            SystemMessage(content="Rules"),
+            HumanMessage(content="a"),
+            HumanMessage(content="b"),
+        ]
+        ai = client.chat(msgs)
+        client.chat(msgs)
+    assert created == [None, "Rules"]
+    model = client._system_models["Rules"]
+    assert model.calls[0] == [{"role": "user", "parts": ["a", "b"]}]
+    assert ai.response_metadata["cached_tokens"] == 8
@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.llm_providers import LLMClient
+from agent.llm_providers.router import RouterClient, RouterError
+
+
+class StandIn(LLMClient):
+    """Local stand-in for a provider with configurable latency and failures."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def chat(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return AIMessage(content=self.name)
+
+    async def achat(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return AIMessage(content=self.name)
+
+    def stream_chat(self, messages, **kwargs):
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        yield AIMessage(content=self.name)
+
+    def embed(self, texts):
+        return [[1.0] for _ in texts]
+
+    def count_tokens(self, messages):
+        return 1
+
+
+MSGS = [HumanMessage(content="hi")]
+
+
+def test_routes_to_fastest_provider():
+    slow, fast = StandIn("slow", delay=0.03), StandIn("fast", delay=0.0)
+    router = RouterClient({"slow": slow, "fast": fast})
+    for _ in range(4):
+        router.chat(MSGS)
+    assert router.chat(MSGS).content == "fast"
+    assert router.candidates()[0] == "fast"
+    assert router.stats()["providers"]["slow"]["latency"] > 0.02
+
+
+def test_failover_and_circuit_breaker():
+    broken, backup = StandIn("broken", fail=True), StandIn("backup")
+    router = RouterClient({"broken": broken, "backup": backup}, failure_threshold=2, cooldown=60)
+    router.health["backup"].latency = 1.0  # broken looks faster until it fails
+    for _ in range(3):
+        assert router.chat(MSGS).content == "backup"
+    assert router.health["broken"].state == "open"
+    calls = broken.calls
+    router.chat(MSGS)
+    assert broken.calls == calls  # open breaker skips the provider
+
+
+def test_half_open_trial_closes_breaker():
+    flaky = StandIn("flaky", fail=True)
+    router = RouterClient({"flaky": flaky}, failure_threshold=1, cooldown=0.01)
+    with pytest.raises(RuntimeError):
+        router.chat(MSGS)
+    with pytest.raises(RouterError):
+        router.chat(MSGS)
+    time.sleep(0.02)
+    flaky.fail = False
+    assert router.chat(MSGS).content == "flaky"
+    assert router.health["flaky"].state == "closed"
+
+
+def test_half_open_admits_one_trial_call():
+    from concurrent.futures import ThreadPoolExecutor
+
+    flaky, backup = StandIn("flaky", fail=True), StandIn("backup", delay=0.01)
+    router = RouterClient({"flaky": flaky, "backup": backup}, failure_threshold=1, cooldown=0.01)
+    router.health["backup"].latency = 1.0
+    router.chat(MSGS)
+    time.sleep(0.02)
+    flaky.fail, flaky.delay, flaky.calls = False, 0.2, 0
+    with ThreadPoolExecutor(4) as pool:
+        answers = [f.result().content for f in [pool.submit(router.chat, MSGS) for _ in range(4)]]
+    assert flaky.calls == 1
+    assert sorted(answers) == ["backup"] * 3 + ["flaky"]
+    assert router.health["flaky"].state == "closed"
+
+
+def test_hedges_after_p95_deadline():
+    primary, secondary = StandIn("primary", delay=0.01), StandIn("secondary", delay=0.2)
+    router = RouterClient({"primary": primary, "secondary": secondary}, hedge=True)
+    router.health["secondary"].latency = 10.0
+    for _ in range(6):
+        router.chat(MSGS)
+    primary.delay = 0.5  # primary stalls; the hedge should win
+    start = time.perf_counter()
+    assert router.chat(MSGS).content == "secondary"
+    assert time.perf_counter() - start < 0.45
+    assert router.stats()["hedges"] == 1
+
+
+def test_cancelled_async_caller_cancels_provider_calls():
+    primary, secondary = StandIn("primary", delay=0.01), StandIn("secondary", delay=5)
+    router = RouterClient({"primary": primary, "secondary": secondary}, hedge=True)
+    router.health["secondary"].latency = 10.0
+    for _ in range(6):
+        asyncio.run(router.achat(MSGS))
+    primary.delay = 5
+
+    async def run():
+        caller = asyncio.ensure_future(router.achat(MSGS))
+        await asyncio.sleep(0.2)  # past the p95 deadline: both calls are running
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return router.stats()["hedges"], pending
+
+    assert asyncio.run(run()) == (1, [])
+
+
+def test_stream_first_token_times_stay_out_of_p95():
+    fast = StandIn("fast")
+    router = RouterClient({"fast": fast})
+    for _ in range(6):
+        assert [m.content for m in router.stream_chat(MSGS)] == ["fast"]
+    assert router.health["fast"].p95() is None
+    assert router.health["fast"].calls == 6
+
+
+def test_async_hedge_and_stream_failover():
+    primary, secondary = StandIn("primary", delay=0.01), StandIn("secondary")
+    router = RouterClient({"primary": primary, "secondary": secondary}, hedge=True)
+    router.health["secondary"].latency = 10.0
+    for _ in range(6):
+        asyncio.run(router.achat(MSGS))
+    primary.delay = 0.5
+    assert asyncio.run(router.achat(MSGS)).content == "secondary"
+
+    primary.fail = True
+    assert [m.content for m in router.stream_chat(MSGS)] == ["secondary"]
+    assert router.embed(["a"]) == [[1.0]]
+
+
+def test_default_client_builds_router(monkeypatch):
+    from unittest.mock import patch
+    from agent.llm_providers import OllamaClient, DeepSeekClient, get_default_client
+
+    monkeypatch.setenv("LLM_BACKEND", "router")
+    monkeypatch.setenv("LLM_ROUTER_BACKENDS", "ollama,deepseek")
+    with patch.object(OllamaClient, "__init__", return_value=None):
+        client = get_default_client()
+    assert isinstance(client, RouterClient)
+    assert list(client.clients) == ["ollama", "deepseek"]
+    assert isinstance(client.clients["deepseek"], DeepSeekClient)
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.llm_providers import LLMClient
+from agent.llm_providers.scheduler import (
+    PriorityScheduler,
+    ScheduledClient,
+    SchedulerFull,
+    current_priority,
+    llm_priority,
+    scheduler_from_env,
+)
+
+
+class Recorder(LLMClient):
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, messages, **kwargs):
+        self.calls.append((messages[0].content, current_priority(), kwargs))
+        return AIMessage(content="ok")
+
+    def stream_chat(self, messages, **kwargs):
+        yield AIMessage(content="a")
+
+    def embed(self, texts):
+        return [[0.0] for _ in texts]
+
+    def count_tokens(self, messages):
+        return 0
+
+
+def _queue(sched, cls, order):
+    def run():
+        with sched.slot(cls):
+            order.append(cls)
+
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def _wait_depth(sched, n):
+    deadline = time.monotonic() + 1
+    while sum(v["queue_depth"] for v in sched.stats().values()) < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_interactive_preempts_queued_background():
+    sched = PriorityScheduler(1, aging=60)
+    order = []
+    sched.acquire("background")
+    threads = [_queue(sched, "background", order)]
+    _wait_depth(sched, 1)
+    threads.append(_queue(sched, "task", order))
+    _wait_depth(sched, 2)
+    threads.append(_queue(sched, "interactive", order))
+    _wait_depth(sched, 3)
+    sched.release()
+    for t in threads:
+        t.join()
+    assert order == ["interactive", "task", "background"]
+    stats = sched.stats()
+    assert stats["background"]["calls"] == 2
+    assert stats["background"]["wait_max"] >= stats["interactive"]["wait_max"]
+
+
+def test_aging_lets_old_background_requests_through():
+    sched = PriorityScheduler(1, aging=0.01)
+    order = []
+    sched.acquire("task")
+    first = _queue(sched, "background", order)
+    _wait_depth(sched, 1)
+    time.sleep(0.05)
+    second = _queue(sched, "interactive", order)
+    _wait_depth(sched, 2)
+    sched.release()
+    first.join()
+    second.join()
+    assert order == ["background", "interactive"]
+
+
+def test_bounded_queue_rejects_overflow():
+    sched = PriorityScheduler(1, queue_limits={"background": 1})
+    sched.acquire("task")
+    waiter = _queue(sched, "background", [])
+    _wait_depth(sched, 1)
+    with pytest.raises(SchedulerFull):
+        sched.acquire("background")
+    assert sched.stats()["background"]["rejected"] == 1
+    sched.release()
+    waiter.join()
+
+
+def test_scheduled_client_uses_context_and_kwarg():
+    inner = Recorder()
+    client = ScheduledClient(inner, PriorityScheduler(2))
+    with llm_priority("background"):
+        client.chat([HumanMessage(content="a")])
+    client.chat([HumanMessage(content="b")], priority_class="interactive", temperature=0)
+    assert inner.calls[0][:2] == ("a", "background")
+    assert inner.calls[1][2] == {"temperature": 0}
+    stats = client.scheduler.stats()
+    assert stats["background"]["calls"] == 1
+    assert stats["interactive"]["calls"] == 1
+    assert client.scheduler.busy == 0
+    assert asyncio.run(client.achat([HumanMessage(content="c")])).content == "ok"
+    assert client.scheduler.busy == 0
+    with pytest.raises(ValueError):
+        with llm_priority("urgent"):
+            pass
+
+
+def test_scheduler_from_env(monkeypatch):
+    monkeypatch.delenv("LLM_SCHEDULER_SLOTS", raising=False)
+    assert scheduler_from_env() is None
+    monkeypatch.setenv("LLM_SCHEDULER_SLOTS", "3")
+    monkeypatch.setenv("LLM_SCHEDULER_AGING", "5")
+    sched = scheduler_from_env()
+    assert sched.slots == 3 and sched.aging == 5
+
+
+def test_cancelled_async_waiter_does_not_leak_slot():
+    sched = PriorityScheduler(1)
+    client = ScheduledClient(Recorder(), sched)
+    sched.acquire()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.achat([HumanMessage(content="x")]), timeout=0.05)
+        sched.release()
+        return await asyncio.wait_for(client.achat([HumanMessage(content="y")]), timeout=2)
+
+    assert asyncio.run(run()).content == "ok"
+    deadline = time.monotonic() + 1
+    while sched.busy and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sched.busy == 0
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.memory import SUMMARY_PREFIX, SummaryMemory, range_key
+
+
+def _history(n):
+    return [
+        HumanMessage(content=f"question {i} " + "word " * 20)
+        if i % 2 == 0
+        else AIMessage(content=f"answer {i} " + "word " * 20)
+        for i in range(n)
+    ]
+
+
+def _llm():
+    llm = MagicMock()
+    llm.chat.side_effect = lambda msgs, **kw: AIMessage(content=f"summary {llm.chat.call_count}")
+    return llm
+
+
+def test_short_history_is_returned_unchanged():
+    memory = SummaryMemory(threshold=10_000, background=False)
+    llm = _llm()
+    msgs = _history(4)
+    assert memory.context(msgs, llm) == msgs
+    llm.chat.assert_not_called()
+    memory.close()
+
+
+def test_range_key_depends_on_role_and_content():
+    a = [HumanMessage(content="hi")]
+    assert range_key(a) == range_key([HumanMessage(content="hi")])
+    assert range_key(a) != range_key([AIMessage(content="hi")])
+
+
+def test_summary_replaces_old_turns_and_is_reused():
+    memory = SummaryMemory(threshold=50, keep_recent=4, step=4, background=False)
+    llm = _llm()
+    msgs = _history(12)
+    out = memory.context(msgs, llm)
+    assert isinstance(out[0], HumanMessage) and out[0].content.startswith(SUMMARY_PREFIX)
+    assert out[1:] == msgs[8:]
+    assert llm.chat.call_count == 2  # one call per block of ``step`` messages
+    assert llm.chat.call_args.kwargs["profile"] == "summary"
+
+    # One more turn stays within the same block: summary comes from cache.
+    out = memory.context(msgs + _history(1), llm)
+    assert llm.chat.call_count == 2
+    assert memory.stats()["hits"] == 1
+
+    # Crossing the next boundary only summarizes the new block.
+    memory.context(msgs + _history(4), llm)
+    assert llm.chat.call_count == 3
+    memory.close()
+
+
+def test_background_compaction_falls_back_to_raw_history():
+    memory = SummaryMemory(threshold=50, keep_recent=4, step=4, max_tokens=100_000)
+    llm = _llm()
+    msgs = _history(12)
+    first = memory.context(msgs, llm)
+    assert not first[0].content.startswith(SUMMARY_PREFIX)
+    assert first == msgs
+    memory._pool.shutdown(wait=True)
+    out = memory.context(msgs, llm)
+    assert out[0].content.startswith(SUMMARY_PREFIX)
+    assert out[1:] == msgs[8:]
+
+
+def test_failed_summary_keeps_history():
+    memory = SummaryMemory(threshold=50, keep_recent=4, step=4, background=False)
+    llm = MagicMock()
+    llm.chat.side_effect = RuntimeError("down")
+    msgs = _history(12)
+    assert memory.context(msgs, llm) == msgs
+    memory.close()
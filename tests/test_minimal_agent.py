@@ -27,3 +27,16 @@ def test_main_print(capsys):
         main("hi")
     captured = capsys.readouterr()
     assert "pong" in captured.out
+
+
+def test_ollama_step_sends_only_latest_message():
+    history = [
+        HumanMessage(content="old " * 2000),
+        AIMessage(content="reply"),
+        HumanMessage(content="hi"),
+    ]
+    fake_llm = MagicMock()
+    fake_llm.chat.return_value = AIMessage(content="pong")
+    with patch("minimal_agent.get_default_client", return_value=fake_llm):
+        ollama_step({"messages": history})
+    assert fake_llm.chat.call_args[0][0] == [history[-1]]
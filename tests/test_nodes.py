@@ -70,7 +70,31 @@ def test_retrieve_context_returns_metadata():
         out = nodes.retrieve_context(state)
     assert out["context_docs"] == ["hi"]
     assert out["graph_metadata"] == [{"doc_id": "1", "entity": "Alice"}]
-    assert out["retrieval_meta"] == {"pkg_match_count": 1, "doc_count": 1}
+    assert out["retrieval_meta"] == {"pkg_match_count": 1, "doc_count": 1, "pkg_cache_hit": False}
+
+
+def test_plan_and_retrieve_share_pkg_lookup():
+    state = {"messages": [HumanMessage(content="hello")]}
+    fake_llm = MagicMock()
+    fake_llm.chat.return_value = AIMessage(content="- step1")
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = [{"id": "1", "entity": "Alice"}]
+    fake_doc = MagicMock()
+    fake_doc.page_content = "hi"
+    fake_retriever = MagicMock()
+    fake_retriever.invoke.return_value = [fake_doc]
+    import importlib
+    rc = importlib.import_module("agent.retrieve_context")
+    with patch("agent.nodes.get_default_client", return_value=fake_llm), patch.object(
+        rc.GraphDatabase, "driver", return_value=fake_driver
+    ), patch("agent.retrieve_context.retriever", fake_retriever):
+        state.update(nodes.plan_step(state))
+        out = nodes.retrieve_context(state)
+    assert fake_session.run.call_count == 1
+    assert out["graph_metadata"] == [{"doc_id": "1", "entity": "Alice"}]
+    assert out["retrieval_meta"]["pkg_cache_hit"] is True
+    assert out["pkg_cache"]["hello"]["doc_ids"] == ["1"]
 
 
 def test_retrieve_context_filters_entities():
@@ -101,7 +125,7 @@ def test_retrieve_context_filters_entities():
         out = nodes.retrieve_context(state)
 
     assert out["context_docs"] == ["alice"]
-    assert out["retrieval_meta"] == {"pkg_match_count": 1, "doc_count": 1}
+    assert out["retrieval_meta"] == {"pkg_match_count": 1, "doc_count": 1, "pkg_cache_hit": False}
 
 
 def test_filter_qdrant_fallback():
@@ -167,13 +191,14 @@ def test_score_with_llm_parses_number():
     fake_llm.chat.return_value = AIMessage(content="0.42")
     score = nodes._score_with_llm(fake_llm, "do it")
     assert score == 0.42
+    assert fake_llm.chat.call_args.kwargs["profile"] == "score"
 
 
 def test_score_with_llm_handles_bad_output():
     fake_llm = MagicMock()
     fake_llm.chat.return_value = AIMessage(content="none")
     score = nodes._score_with_llm(fake_llm, "oops")
-    assert score == 0.0
+    assert score is None
 
 
 def test_priority_from_score_thresholds():
@@ -186,3 +211,123 @@ def test_priority_from_score_thresholds():
     assert nodes._priority_from_score(0.5, rules) == "med"
     assert nodes._priority_from_score(0.1, rules) == "low"
 
+
+
+def test_load_guidelines_rereads_only_on_change(tmp_path, monkeypatch):
+    path = tmp_path / "guidelines.txt"
+    path.write_text("Be concise.\n")
+    monkeypatch.setattr(nodes, "GUIDELINES_FILE", str(path))
+    first = nodes._load_guidelines()
+    assert first == "Be concise."
+    with patch("builtins.open", side_effect=AssertionError("re-read")):
+        assert nodes._load_guidelines() is first
+    path.write_text("Be thorough and kind.\n")
+    assert nodes._load_guidelines() == "Be thorough and kind."
+    path.unlink()
+    assert nodes._load_guidelines() == ""
+
+
+def test_prioritise_scores_tasks_in_one_batch():
+    llm = MagicMock()
+    llm.chat.return_value = AIMessage(content="1: 0.1\n2: 0.8\n3: 0.55")
+    state = {"tasks": ["water plants", "call bob", "book flight"]}
+    with patch("agent.nodes.load_priority_rules", return_value={}), patch(
+        "agent.nodes.get_default_client", return_value=llm
+    ), patch("agent.nodes.get_small_client", return_value=None), patch("agent.nodes.add_task"):
+        out = nodes.prioritise(state)
+    assert [t["priority"] for t in out["tasks"]] == ["low", "high", "med"]
+    assert llm.chat.call_count == 1
+    assert llm.chat.call_args.kwargs["profile"].name == "score_batch"
+
+
+def test_score_many_falls_back_per_item_and_respects_batch_max():
+    llm = MagicMock()
+    llm.chat.side_effect = [
+        AIMessage(content="1: 0.9\n2: ???"),  # batch of two, item 2 unparsed
+        AIMessage(content="0.4"),  # per-item retry for item 2
+        AIMessage(content="0.7"),  # trailing single item
+    ]
+    scores = nodes._score_many(llm, ["a", "b", "c"], batch_max=2)
+    assert scores == [0.9, 0.4, 0.7]
+    assert llm.chat.call_count == 3
+
+
+def test_parse_batch_scores():
+    assert nodes._parse_batch_scores("1: 0.2\n2) 1.0\nnoise\n3 - 0.75") == {1: 0.2, 2: 1.0, 3: 0.75}
+
+
+def test_query_pkg_cache_invalidated_by_graph_version():
+    import importlib
+    from ingestion.pkg_config import bump_graph_version
+
+    rc = importlib.import_module("agent.retrieve_context")
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = [{"id": "1", "entity": "Alice"}]
+    with patch.object(rc.GraphDatabase, "driver", return_value=fake_driver):
+        first = rc.query_pkg("alice")
+        first[1][0]["entity"] = "mutated"
+        assert rc.query_pkg("alice") == (["1"], [{"doc_id": "1", "entity": "Alice"}])
+        assert fake_session.run.call_count == 1
+        assert bump_graph_version() == 1
+        rc.query_pkg("alice")
+        assert fake_session.run.call_count == 2
+    assert rc.pkg_cache_stats == {"hits": 1, "misses": 2}
+
+
+def test_query_pkg_uses_fulltext_terms_and_skips_empty_queries():
+    import importlib
+
+    rc = importlib.import_module("agent.retrieve_context")
+    assert rc.query_terms("Email Jane about the ProjectX budget, please!") == [
+        "email",
+        "jane",
+        "about",
+        "projectx",
+        "budget",
+    ]
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = []
+    with patch.object(rc.GraphDatabase, "driver", return_value=fake_driver):
+        assert rc.query_pkg("what is it?") == ([], [])
+        assert not fake_session.run.called
+        rc.query_pkg("Jane's project")
+    cypher, params = fake_session.run.call_args[0][0], fake_session.run.call_args.kwargs
+    assert "db.index.fulltext.queryNodes" in cypher and "CONTAINS" not in cypher
+    assert params["terms"] == "jane OR project"
+
+
+def test_query_pkg_falls_back_to_contains_without_fulltext_index(caplog):
+    import importlib
+
+    from neo4j.exceptions import ClientError
+
+    rc = importlib.import_module("agent.retrieve_context")
+    missing = ClientError("There is no such fulltext schema index: entity_names")
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.side_effect = [missing, [{"id": "9", "entity": "Jane Doe"}], []]
+    with patch.object(rc.GraphDatabase, "driver", return_value=fake_driver):
+        assert rc.query_pkg("Jane") == (["9"], [{"doc_id": "9", "entity": "Jane Doe"}])
+        rc.query_pkg("ProjectX")
+    assert "entity_names" in caplog.text
+    cyphers = [c.args[0] for c in fake_session.run.call_args_list]
+    assert "fulltext" in cyphers[0]
+    assert all("CONTAINS" in c for c in cyphers[1:])
+    assert fake_session.run.call_args.kwargs == {"q": "ProjectX"}
+
+
+def test_generate_response_sends_guidelines_and_task_prompt_only():
+    llm = MagicMock()
+    llm.chat.return_value = AIMessage(content="done")
+    history = [HumanMessage(content="old " * 2000), AIMessage(content="reply")]
+    state = {"messages": history, "current_task": {"objective": "report"}, "tool_output": "42"}
+    with patch("agent.nodes.get_default_client", return_value=llm), patch(
+        "agent.nodes._load_guidelines", return_value="Be brief."
+    ):
+        out = nodes.generate_response(state)
+    sent = llm.chat.call_args[0][0]
+    assert [type(m).__name__ for m in sent] == ["SystemMessage", "HumanMessage"]
+    assert sent[1].content == "Task report: 42"
+    assert out["messages"] == history + [llm.chat.return_value]
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+
+import requests
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.llm_providers import OllamaClient
+from agent.llm_providers.ollama_residency import ResidencyManager, residency_manager
+from tests.mocks import DummyEmbeddingModel
+
+GIB = 2**30
+
+
+class FakeResp:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+def _manager(ram_gib=8):
+    manager = ResidencyManager("http://ollama:11434/", ram_bytes=ram_gib * GIB, ram_fraction=0.5)
+    session = MagicMock()
+    session.get.side_effect = lambda url, timeout=None: FakeResp(
+        {
+            "models": [
+                {"name": "llama3.2:3b", "size": 2 * GIB},
+                {"name": "nomic-embed-text:latest", "size": GIB // 4},
+                {"name": "gemma3:4b", "size": 3 * GIB},
+            ]
+        }
+        if url.endswith("/api/tags")
+        else {"models": [{"name": "llama3.2:3b", "size": 2 * GIB, "expires_at": "soon"}]}
+    )
+    session.post.side_effect = lambda url, json=None, timeout=None: FakeResp(
+        {"load_duration": 3_000_000_000}
+    )
+    manager._session = session
+    return manager
+
+
+def test_warm_preloads_models_that_fit_with_keep_alive():
+    manager = _manager()
+    manager.register("llama3.2:3b", "chat")
+    manager.register("nomic-embed-text", "embed", keep_alive="-1")
+    manager.register("gemma3:4b", "chat")
+    result = manager.warm()
+    assert result == {
+        "loaded": ["llama3.2:3b", "nomic-embed-text"],
+        "skipped": ["gemma3:4b"],
+        "failed": [],
+    }
+    calls = [(c.args[0], c.kwargs["json"]) for c in manager._session.post.call_args_list]
+    assert calls[0][0].endswith("/api/generate")
+    assert calls[0][1]["keep_alive"] == "30m"
+    assert calls[1][0].endswith("/api/embed")
+    assert calls[1][1]["keep_alive"] == "-1"
+    assert manager.stats()["cold_loads"] == {"llama3.2:3b": 1, "nomic-embed-text": 1}
+
+
+def test_warm_reports_failures_and_resident_models():
+    manager = _manager()
+    manager.register("llama3.2:3b")
+    manager._session.post.side_effect = requests.ConnectionError("down")
+    assert manager.warm()["failed"] == ["llama3.2:3b"]
+    assert manager.resident()[0]["name"] == "llama3.2:3b"
+
+
+def test_observe_distinguishes_cold_and_warm_calls():
+    manager = _manager()
+    assert manager.observe("m", {"load_duration": 2_500_000_000})
+    assert not manager.observe("m", {"load_duration": 5_000_000})
+    assert not manager.observe("m", {})
+    stats = manager.stats()
+    assert stats["calls"] == {"m": 2}
+    assert stats["cold_loads"] == {"m": 1}
+    assert stats["last_load_seconds"]["m"] == 2.5
+
+
+def test_ollama_client_registers_models_and_tracks_loads(monkeypatch):
+    monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "1h")
+    chat_model = MagicMock()
+    chat_model.model = "llama3.2:3b"
+    chat_model.invoke.return_value = AIMessage(
+        content="hi", response_metadata={"load_duration": 4_000_000_000}
+    )
+    embed = DummyEmbeddingModel()
+    embed.model = "nomic-embed-text"
+    with patch("agent.llm_providers.ollama_client.ChatOllama", return_value=chat_model), patch(
+        "agent.llm_providers.ollama_client.OllamaEmbeddings", return_value=embed
+    ):
+        client = OllamaClient()
+    assert chat_model.keep_alive == "1h"
+    client.chat([HumanMessage(content="hi")])
+    manager = residency_manager()
+    assert manager.models() == [("llama3.2:3b", "chat"), ("nomic-embed-text", "embed")]
+    assert manager.stats()["cold_loads"] == {"llama3.2:3b": 1}
+
+
+def test_ollama_client_and_residency_share_base_url(monkeypatch):
+    monkeypatch.setenv("OLLAMA_BASE_URL", "http://gpu-box:11434")
+    with patch("agent.llm_providers.ollama_client.ChatOllama") as chat, patch(
+        "agent.llm_providers.ollama_client.OllamaEmbeddings", return_value=DummyEmbeddingModel()
+    ) as embed:
+        client = OllamaClient(model="phi3:mini")
+    assert chat.call_args.kwargs == {"base_url": "http://gpu-box:11434", "model": "phi3:mini"}
+    assert embed.call_args.kwargs == chat.call_args.kwargs
+    assert client.residency is residency_manager("http://gpu-box:11434")
@@ -16,3 +16,74 @@ def test_prioritise_rules():
         new_state = prioritise(state)
     assert new_state["current_task"]["priority"] == "high"
     assert new_state["current_task"]["status"] == "READY"
+
+
+def test_critical_rule_skips_llm_and_cache_reuses_scores():
+    from unittest.mock import MagicMock, patch
+
+    from langchain_core.messages import AIMessage
+
+    from agent.nodes import prioritise
+
+    llm = MagicMock()
+    llm.chat.return_value = AIMessage(content="1: 0.8\n2: 0.1")
+    rules = {"patterns": [{"regex": "fraud", "priority": "critical"}]}
+    state = {"tasks": ["Report FRAUD now", "Call Bob", "water plants"]}
+    with (
+        patch("agent.nodes.add_task"),
+        patch("agent.nodes.load_priority_rules", return_value=rules),
+        patch("agent.nodes.get_default_client", return_value=llm),
+        patch("agent.nodes.get_small_client", return_value=None),
+    ):
+        first = prioritise(state)["tasks"]
+        again = prioritise({"tasks": ["call bob!", "Report fraud"]})["tasks"]
+
+    assert [(t["priority"], t["decided_by"]) for t in first] == [
+        ("critical", "rule"),
+        ("high", "llm"),
+        ("low", "llm"),
+    ]
+    assert [(t["priority"], t["decided_by"]) for t in again] == [
+        ("high", "cache"),
+        ("critical", "rule"),
+    ]
+    assert llm.chat.call_count == 1
+
+
+def test_score_cache_is_keyed_by_rules_version(tmp_path):
+    from agent.score_cache import ScoreCache, normalize_objective
+
+    cache = ScoreCache(str(tmp_path / "s.db"), max_entries=2)
+    cache.put_many({"Pay  the invoice!": 0.6, "b": 0.1}, "v1")
+    assert normalize_objective("Pay  the invoice!") == "pay the invoice"
+    assert cache.get_many(["pay the invoice", "b", "c"], "v1") == [0.6, 0.1, None]
+    assert cache.get("b", "v2") is None
+    cache.put("c", "v1", 0.3)
+    assert cache.stats()["size"] == 2
+    cache.close()
+
+
+def test_unparsed_scores_are_not_cached_and_cache_is_keyed_by_model():
+    from unittest.mock import MagicMock, patch
+
+    from langchain_core.messages import AIMessage
+
+    from agent.nodes import prioritise
+
+    llm = MagicMock(model="m1")
+    llm.chat.return_value = AIMessage(content="no idea")
+    state = {"tasks": ["Call Bob"]}
+    with (
+        patch("agent.nodes.add_task"),
+        patch("agent.nodes.load_priority_rules", return_value={}),
+        patch("agent.nodes.get_default_client", return_value=llm),
+        patch("agent.nodes.get_small_client", return_value=None),
+    ):
+        assert prioritise(state)["tasks"][0]["priority"] == "low"
+        llm.chat.return_value = AIMessage(content="0.8")
+        tasks = prioritise(state)["tasks"]
+        assert [(t["priority"], t["decided_by"]) for t in tasks] == [("high", "llm")]
+        assert prioritise(state)["tasks"][0]["decided_by"] == "cache"
+        llm.model = "m2"
+        assert prioritise(state)["tasks"][0]["decided_by"] == "llm"
+    assert llm.chat.call_count == 3
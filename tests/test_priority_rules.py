@@ -0,0 +1,94 @@
+import os
+import time
+
+from agent.priority_rules import RuleEngine, engine_for, rule_engine
+
+RULES = {
+    "bank_whitelist": ["trustedbank.com", ".corp.example"],
+    "patterns": [
+        {"regex": "(?i)fraud|security alert", "priority": "critical"},
+        {"regex": "invoice|payment due", "priority": "med"},
+        {"regex": "(?i)meeting|schedule", "priority": "high"},
+    ],
+}
+
+
+def _reference(objective, sender, rules):
+    """The original per-pattern implementation."""
+    import re
+
+    domain = sender.split("@")[-1] if sender else None
+    if domain and domain in rules.get("bank_whitelist", []):
+        return "high"
+    for pat in rules.get("patterns", []):
+        if re.search(pat["regex"], objective, re.IGNORECASE):
+            return pat["priority"]
+    return None
+
+
+def test_first_rule_in_file_order_wins():
+    engine = RuleEngine(RULES)
+    # "meeting" appears before "fraud" in the text, but the fraud rule is first.
+    assert engine.classify("meeting about FRAUD") == "critical"
+    assert engine.classify("Schedule the INVOICE review") == "med"
+    assert engine.classify("water the plants") is None
+
+
+def test_matches_reference_implementation():
+    engine = RuleEngine(RULES)
+    cases = [
+        ("pay invoice", None),
+        ("security alert on schedule", "a@b.com"),
+        ("lunch", "x@trustedbank.com"),
+        ("Meeting", None),
+        ("nothing", None),
+    ]
+    for obj, sender in cases:
+        assert engine.classify(obj, sender) == _reference(obj, sender, RULES)
+    objs, senders = zip(*cases)
+    assert engine.classify_many(objs, senders) == [_reference(o, s, RULES) for o, s in cases]
+
+
+def test_domain_whitelist_and_suffixes():
+    engine = RuleEngine(RULES)
+    assert engine.classify("x", "bob@TrustedBank.com") == "high"
+    assert engine.classify("x", "bob@mail.corp.example") == "high"
+    assert engine.classify("x", "bob@evil-trustedbank.com") is None
+
+
+def test_backreferences_fall_back_to_individual_patterns():
+    engine = RuleEngine({"patterns": [{"regex": r"(\w+) \1", "priority": "low"}]})
+    assert engine.classify("bye bye") == "low"
+
+
+def test_rule_engine_reloads_on_change(tmp_path):
+    path = tmp_path / "priority.yml"
+    path.write_text("patterns:\n  - regex: foo\n    priority: low\n")
+    first = rule_engine(str(path))
+    assert rule_engine(str(path)) is first
+    path.write_text("patterns:\n  - regex: foo\n    priority: critical\n")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    assert rule_engine(str(path)).classify("foo") == "critical"
+    assert rule_engine(str(tmp_path / "missing.yml")).rules == {}
+
+
+def test_loaded_rules_are_copies_and_edits_get_a_fresh_engine(tmp_path):
+    from agent.nodes import load_priority_rules
+
+    path = tmp_path / "priority.yml"
+    path.write_text("patterns:\n  - regex: foo\n    priority: low\n")
+    rules = load_priority_rules(str(path))
+    assert engine_for(rules) is rule_engine(str(path))
+    rules["patterns"][0]["priority"] = "critical"
+    assert engine_for(rules).classify("foo") == "critical"
+    assert load_priority_rules(str(path))["patterns"][0]["priority"] == "low"
+    assert rule_engine(str(path)).classify("foo") == "low"
+
+
+def test_classify_many_handles_unicode_and_cross_item_matches():
+    engine = RuleEngine(
+        {"patterns": [{"regex": r"a\sb", "priority": "med"}, {"regex": "café", "priority": "low"}]}
+    )
+    objs = ["xa", "b", "A B", "CAFÉ order"]
+    assert engine.classify_many(objs) == [None, None, "med", "low"]
+    assert [engine.classify(o) for o in objs] == [None, None, "med", "low"]
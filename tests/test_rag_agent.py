@@ -21,9 +21,12 @@ def test_retrieve_context():
 
 def test_answer_step():
     from rag_agent import AgentState
-    state = AgentState(messages=[HumanMessage(content="hi")], context_docs=["ctx"])
+    history = [HumanMessage(content="earlier"), AIMessage(content="reply")]
+    state = AgentState(messages=history + [HumanMessage(content="hi")], context_docs=["ctx"])
     fake_llm = MagicMock()
     fake_llm.chat.return_value = AIMessage(content="pong")
     with patch("rag_agent.get_default_client", return_value=fake_llm):
         out = rag_agent.answer_step(state)
     assert out["messages"][-1].content == "pong"
+    sent = fake_llm.chat.call_args[0][0]
+    assert [m.content for m in sent] == ["Context:\nctx\n---\nhi"]
@@ -0,0 +1,84 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from agent.resources import ResourceRegistry, neo4j_driver, reset_resources, shared
+
+
+def test_registry_reuses_instances():
+    reg = ResourceRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+    first = reg.get(("qdrant", "http://x"), factory)
+    assert reg.get(("qdrant", "http://x"), factory) is first
+    assert reg.get(("qdrant", "http://y"), factory) is not first
+    assert factory.call_count == 2
+
+
+def test_registry_builds_once_across_threads():
+    reg = ResourceRegistry()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(reg.get("k", factory)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_registry_reset_closes_resources():
+    reg = ResourceRegistry()
+    res = MagicMock()
+    reg.get("k", lambda: res)
+    reg.reset()
+    res.close.assert_called_once()
+    assert reg.keys() == []
+
+
+def test_neo4j_driver_is_shared(monkeypatch):
+    monkeypatch.setenv("NEO4J_AUTH", "neo4j/secret")
+    with patch("agent.resources.GraphDatabase.driver", return_value=MagicMock()) as drv:
+        assert neo4j_driver() is neo4j_driver()
+    drv.assert_called_once()
+    assert drv.call_args.kwargs["auth"] == ("neo4j", "secret")
+
+
+def test_default_client_is_shared(monkeypatch):
+    from agent.llm_providers import OllamaClient, get_default_client
+
+    monkeypatch.setenv("LLM_BACKEND", "ollama")
+    with patch.object(OllamaClient, "__init__", return_value=None) as init:
+        assert get_default_client() is get_default_client()
+    init.assert_called_once()
+    reset_resources()
+    with patch.object(OllamaClient, "__init__", return_value=None) as init:
+        get_default_client()
+    init.assert_called_once()
+
+
+def test_small_client_shares_limits_scheduler_and_cache(monkeypatch, tmp_path):
+    from agent.llm_providers import (
+        CachedLLMClient,
+        OllamaClient,
+        get_default_client,
+        get_small_client,
+    )
+
+    monkeypatch.setenv("LLM_BACKEND", "ollama")
+    monkeypatch.setenv("LLM_CASCADE_MODEL", "phi3:mini")
+    monkeypatch.setenv("LLM_SCHEDULER_SLOTS", "2")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.db"))
+    with patch.object(OllamaClient, "__init__", return_value=None) as init:
+        large, small = get_default_client(), get_small_client()
+    assert init.call_args_list[-1].kwargs == {"model": "phi3:mini"}
+    assert isinstance(small, CachedLLMClient) and small is not large
+    assert small.inner.scheduler is large.inner.scheduler
+    assert small.inner.inner.window is large.inner.inner.window
@@ -27,3 +27,45 @@ def test_count_tokens_fallback(monkeypatch):
     assert tc.count_tokens(text) == 2
 
 
+
+
+def test_trim_messages_with_delta_matches_pop_loop(monkeypatch):
+    monkeypatch.setattr(tc, "_encoder", None)
+    msgs = [HumanMessage(content="w " * n) for n in (5, 0, 3, 7, 2)]
+    trimmed, delta = tc.trim_messages_with_delta(msgs, max_tokens=9)
+    assert trimmed == msgs[3:]
+    assert delta == 8
+    assert tc.trim_messages_with_delta(msgs, max_tokens=100) == (msgs, 0)
+    assert tc.trim_messages_with_delta(msgs, max_tokens=0) == ([], 17)
+
+
+def test_count_tokens_is_memoized(monkeypatch):
+    class Encoder:
+        calls = 0
+
+        def encode(self, text):
+            Encoder.calls += 1
+            return text.split()
+
+    monkeypatch.setattr(tc, "_encoder", Encoder())
+    msgs = [HumanMessage(content="one two three")] * 3
+    assert tc.count_message_tokens(msgs) == 9
+    assert Encoder.calls == 1
+
+
+def test_model_aware_counts_use_calibration(monkeypatch):
+    monkeypatch.setattr(tc, "get_encoding", lambda name: None)
+    assert tc.tokenizer_for("gpt-4o-mini").encoding == "o200k_base"
+    assert tc.tokenizer_for("models/gemini-1.5-pro") is tc.TOKENIZERS["gemini"]
+    assert tc.tokenizer_for("unknown-model") is tc.DEFAULT_SPEC
+    text = "x" * 400
+    assert tc.count_tokens(text, "gpt-4") == 100
+    assert tc.count_tokens(text, "llama2") == 125
+    msgs = [HumanMessage(content=text)] * 2
+    assert tc.count_message_tokens(msgs, model="deepseek-chat") == 2 * (105 + 4)
+    tc.register_tokenizer("custom", tc.TokenizerSpec(ratio=2.0, per_message=0))
+    try:
+        assert tc.count_tokens(text, "custom-7b") == 200
+    finally:
+        del tc.TOKENIZERS["custom"]
+        tc.tokenizer_for.cache_clear()
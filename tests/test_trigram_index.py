@@ -0,0 +1,100 @@
+import importlib
+from unittest.mock import MagicMock, patch
+
+from ingestion.trigram_index import TrigramIndex, trigram_index
+
+ENTITIES = [
+    ("Acme Corporation", "Company"),
+    ("AcmeCorp Labs", "Company"),
+    ("John Smith", "Person"),
+    ("Jane Doe", "Person"),
+]
+
+
+def test_candidates_rank_fuzzy_matches_above_threshold():
+    index = TrigramIndex.build(ENTITIES)
+    found = index.candidates("what did Acme corp send?", threshold=0.4)
+    assert [c["entity"] for c in found] == ["Acme Corporation"]
+    assert found[0] == {"entity": "Acme Corporation", "type": "Company", "score": 0.5}
+    assert [c["entity"] for c in index.candidates("ask Jon Smith", threshold=0.4)] == ["John Smith"]
+    assert index.candidates("ask Jon Smith", threshold=0.7) == []
+    assert index.candidates("the weather today", threshold=0.4) == []
+    assert index.candidates("jane doe", threshold=0.4, limit=1)[0]["score"] == 1.0
+
+
+def test_short_names_need_closer_matches():
+    index = TrigramIndex.build(
+        [("Mark", "Person"), ("Dan", "Person"), ("Planning", "Project"), ("Marketing Team", None)]
+    )
+    for prompt in (
+        "check the market report",
+        "remind me about the dance class",
+        "send the plan to the team",
+    ):
+        assert index.candidates(prompt, threshold=0.4) == []
+    assert [c["entity"] for c in index.candidates("the planing doc", threshold=0.4)] == ["Planning"]
+    teem = index.candidates("ask the marketing teem", threshold=0.4)
+    assert [c["entity"] for c in teem] == ["Marketing Team"]
+    # Windows never join words from separate segments.
+    assert index.candidates(["ask the marketing", "teem"], threshold=0.6) == []
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = TrigramIndex.build(ENTITIES)
+    path = str(tmp_path / "t.npz")
+    index.save(path)
+    loaded = trigram_index(path)
+    assert loaded is trigram_index(path)
+    assert loaded.candidates("Acme Corp Labs") == index.candidates("Acme Corp Labs")
+
+
+def test_store_triples_builds_trigram_index():
+    from ingestion import build_pkg
+
+    fake_driver = MagicMock()
+    fake_driver.session.return_value.__enter__.return_value.run.return_value = [
+        {"name": "John Smith", "labels": ["Person"], "email": None}
+    ]
+    with patch("ingestion.build_pkg.GraphDatabase.driver", return_value=fake_driver):
+        build_pkg._store_triples([])
+        assert [c["entity"] for c in trigram_index().candidates("Jon Smith")] == ["John Smith"]
+        build_pkg._store_triples(
+            [("John Smith", "Person", "EMPLOYED_AT", "Acme Corporation", "Company")]
+        )
+    assert [c["entity"] for c in trigram_index().candidates("Jon Smith at acme corp")] == [
+        "John Smith",
+        "Acme Corporation",
+    ]
+
+
+def test_query_pkg_links_misspelled_names():
+    rc = importlib.import_module("agent.retrieve_context")
+    TrigramIndex.build(ENTITIES).save()
+    fake_driver = MagicMock()
+    fake_session = fake_driver.session.return_value.__enter__.return_value
+    fake_session.run.return_value = [{"id": "3", "entity": "John Smith"}]
+    with patch.object(rc.GraphDatabase, "driver", return_value=fake_driver):
+        assert rc.query_pkg("notes from Jon Smith") == (
+            ["3"],
+            [{"doc_id": "3", "entity": "John Smith"}],
+        )
+    assert fake_session.run.call_args.kwargs == {"names": ["John Smith"]}
+
+
+def test_fuzzy_matching_skips_exact_gazetteer_spans():
+    from ingestion.gazetteer import update_gazetteer
+
+    rc = importlib.import_module("agent.retrieve_context")
+    update_gazetteer([("John Smith", "Person", None)])
+    TrigramIndex.build(ENTITIES + [("John Smyth", "Person")]).save()
+    assert rc.mentioned_entities("John Smith said hi") == ["John Smith"]
+    assert rc.mentioned_entities("John Smith and Jane Doh") == ["John Smith", "Jane Doe"]
+
+
+def test_unreadable_trigram_index_is_ignored(caplog):
+    from ingestion.trigram_index import trigram_index_path
+
+    with open(trigram_index_path(), "wb") as fh:
+        fh.write(b"not a zip")
+    assert trigram_index() is None
+    assert "unreadable trigram index" in caplog.text
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from langchain_core.messages import AIMessage
+
+import agent.nodes as nodes
+from agent.urgency_classifier import UrgencyClassifier, featurize, load_training_records
+
+TEXTS = [
+    ("urgent server outage in production", "critical"),
+    ("production database is down", "critical"),
+    ("outage reported by customers", "critical"),
+    ("water the office plants", "low"),
+    ("tidy up the shared drive", "low"),
+    ("order new plants for the office", "low"),
+]
+
+
+def _trained() -> UrgencyClassifier:
+    return UrgencyClassifier.fit([t for t, _ in TEXTS], [p for _, p in TEXTS], dim=4096, epochs=200)
+
+
+def test_featurize_is_stable_and_normalized():
+    indptr, cols, vals = featurize(["Hello, world!", "hello world"], 1024)
+    assert list(indptr) == [0, len(cols) // 2, len(cols)]
+    assert list(cols[: indptr[1]]) == list(cols[indptr[1]:])
+    assert abs(sum(v * v for v in vals[: indptr[1]]) - 1.0) < 1e-9
+
+
+def test_fit_predict_and_roundtrip(tmp_path):
+    model = _trained()
+    preds = model.predict(["database outage", "water plants"])
+    assert [p for p, _ in preds] == ["critical", "low"]
+    assert all(0.5 < conf <= 1.0 for _, conf in preds)
+    path = tmp_path / "m.npz"
+    model.save(str(path))
+    loaded = UrgencyClassifier.load(str(path))
+    assert loaded.labels == model.labels
+    assert loaded.predict(["database outage"])[0][0] == "critical"
+
+
+def test_training_records_join_hitl_log(tmp_path):
+    db = tmp_path / "tasks.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE tasks (task_id TEXT PRIMARY KEY, data TEXT, updated_at TEXT)")
+    for tid, obj, pr, by in [
+        ("1", "a", "low", "rule"),
+        ("2", "b", "high", "llm"),
+        ("3", "c", "med", "cache"),
+        ("4", "d", "low", "classifier"),
+        ("5", "e", "high", "rule"),
+    ]:
+        task = {"objective": obj, "priority": pr, "decided_by": by}
+        conn.execute("INSERT INTO tasks VALUES (?, ?, '')", (tid, json.dumps(task)))
+    conn.commit()
+    conn.close()
+    log = tmp_path / "hitl_log.jsonl"
+    log.write_text(
+        json.dumps({"task_id": "1", "result": "approved"})
+        + "\n"
+        + json.dumps({"task_id": "2", "result": "rejected"})
+        + "\n"
+    )
+    assert sorted(load_training_records(str(db), str(log))) == [
+        ("1", "a", "low", 2.0),
+        ("3", "c", "med", 1.0),
+    ]
+
+
+def test_prioritise_uses_confident_classifier_before_llm():
+    llm = MagicMock()
+    llm.chat.return_value = AIMessage(content="0.6")
+    state = {"tasks": ["production outage", "write quarterly report"]}
+    with (
+        patch("agent.nodes.add_task"),
+        patch("agent.nodes.load_priority_rules", return_value={}),
+        patch("agent.nodes.get_default_client", return_value=llm),
+        patch("agent.nodes.get_small_client", return_value=None),
+        patch("agent.nodes.confident_predictions", return_value=["critical", None]) as guess,
+    ):
+        out = nodes.prioritise(state)["tasks"]
+    assert guess.call_args[0][0] == ["production outage", "write quarterly report"]
+    assert [(t["priority"], t["decided_by"]) for t in out] == [
+        ("critical", "classifier"),
+        ("med", "llm"),
+    ]
+    assert llm.chat.call_count == 1
+
+
+def test_confident_predictions_respects_threshold(tmp_path, monkeypatch):
+    from agent.urgency_classifier import confident_predictions
+
+    assert confident_predictions(["anything"]) == [None]  # no model trained yet
+    model = _trained()
+    model.save(str(tmp_path / "urgency_model.npz"))
+    monkeypatch.setenv("URGENCY_MODEL_PATH", str(tmp_path / "urgency_model.npz"))
+    assert confident_predictions(["server outage"], threshold=0.0) == ["critical"]
+    assert confident_predictions(["server outage"], threshold=1.01) == [None]
+
+
+def test_single_class_models_are_refused(tmp_path, monkeypatch):
+    import pytest
+
+    from agent.urgency_classifier import confident_predictions
+
+    with pytest.raises(ValueError):
+        UrgencyClassifier.fit(["a b", "c d"], ["low", "low"])
+    # A one-class model saved by an older version is treated as untrained.
+    path = tmp_path / "urgency_model.npz"
+    UrgencyClassifier(np.zeros((64, 1)), np.zeros(1), ["low"]).save(str(path))
+    monkeypatch.setenv("URGENCY_MODEL_PATH", str(path))
+    assert confident_predictions(["production outage, fraud alert"], threshold=0.0) == [None]
+
+
+def test_holdout_split_is_stable_per_task():
+    import scripts.train_urgency_classifier as train
+
+    records = [(str(i), f"task {i}", "low", 1.0) for i in range(200)]
+    fit, held = train._split(records, 0.2, 0)
+    assert 20 < len(held) < 60 and len(fit) + len(held) == 200
+    grown = records + [(str(i), f"task {i}", "low", 1.0) for i in range(200, 400)]
+    _, held_grown = train._split(grown[::-1], 0.2, 0)
+    assert set(held) <= set(held_grown)
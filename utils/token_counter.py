@@ -1,35 +1,141 @@
 from __future__ import annotations
 
 """Utility to approximate token counts and trim message history."""
-from typing import List
+import math
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Tuple
 
 try:
     import tiktoken
 
     _encoder = tiktoken.get_encoding("cl100k_base")
 except Exception:  # pragma: no cover - tiktoken optional
+    tiktoken = None
     _encoder = None
 
 from langchain_core.messages import BaseMessage
 
 
-def count_tokens(text: str) -> int:
-    """Return the token count using tiktoken if available."""
-    if _encoder:
-        return len(_encoder.encode(text))
+@dataclass(frozen=True)
+class TokenizerSpec:
+    """How to approximate one model family's tokenizer with tiktoken.
+
+    ``ratio`` scales the tiktoken count to the provider's own tokenizer and
+    ``per_message`` adds the chat-template overhead of each message.
+    """
+
+    encoding: str = "cl100k_base"
+    ratio: float = 1.0
+    per_message: int = 3
+
+
+# Calibration table: model-name prefix -> spec, longest prefix wins. Ratios
+# approximate provider token counts divided by the tiktoken count on English
+# prose; adjust them with register_tokenizer() from measured usage.
+TOKENIZERS: dict[str, TokenizerSpec] = {
+    "gpt-4o": TokenizerSpec("o200k_base"),
+    "gpt-4.1": TokenizerSpec("o200k_base"),
+    "o1": TokenizerSpec("o200k_base"),
+    "o3": TokenizerSpec("o200k_base"),
+    "o4": TokenizerSpec("o200k_base"),
+    "gpt-4": TokenizerSpec("cl100k_base"),
+    "gpt-3.5": TokenizerSpec("cl100k_base"),
+    "deepseek": TokenizerSpec("cl100k_base", ratio=1.05, per_message=4),
+    "gemini": TokenizerSpec("o200k_base", ratio=1.1, per_message=4),
+    "llama3": TokenizerSpec("cl100k_base", ratio=1.0, per_message=5),
+    "llama2": TokenizerSpec("cl100k_base", ratio=1.25, per_message=5),
+    "phi3": TokenizerSpec("cl100k_base", ratio=1.25, per_message=4),
+    "mistral": TokenizerSpec("cl100k_base", ratio=1.2, per_message=4),
+    "gemma": TokenizerSpec("o200k_base", ratio=1.05, per_message=4),
+    "qwen": TokenizerSpec("cl100k_base", ratio=1.0, per_message=4),
+}
+DEFAULT_SPEC = TokenizerSpec()
+
+
+@lru_cache(maxsize=256)
+def tokenizer_for(model: str | None) -> TokenizerSpec:
+    """Return the calibration entry whose prefix matches ``model``."""
+    if not model:
+        return DEFAULT_SPEC
+    name = model.lower().rsplit("/", 1)[-1]
+    matches = [prefix for prefix in TOKENIZERS if name.startswith(prefix)]
+    return TOKENIZERS[max(matches, key=len)] if matches else DEFAULT_SPEC
+
+
+def register_tokenizer(prefix: str, spec: TokenizerSpec) -> None:
+    """Add or replace a calibration entry."""
+    TOKENIZERS[prefix.lower()] = spec
+    tokenizer_for.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str):
+    """Load a tiktoken encoding once; ``None`` when it cannot be loaded."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _count_cached(encoder, text: str) -> int:
+    # Keyed by content: a history re-sent on every turn is only encoded once.
+    if encoder:
+        return len(encoder.encode(text))
     return len(text.split())
 
 
-def count_message_tokens(messages: List[BaseMessage]) -> int:
+def count_tokens(text: str, model: str | None = None) -> int:
+    """Return the token count using tiktoken if available.
+
+    With ``model`` the count follows that family's entry in
+    :data:`TOKENIZERS`; without tiktoken data it falls back to roughly four
+    characters per token.
+    """
+    if model is None:
+        return _count_cached(_encoder, text)
+    spec = tokenizer_for(model)
+    encoder = get_encoding(spec.encoding)
+    base = _count_cached(encoder, text) if encoder else math.ceil(len(text) / 4)
+    return math.ceil(base * spec.ratio) if spec.ratio != 1.0 else base
+
+
+def _message_tokens(message: BaseMessage, model: str | None) -> int:
+    if model is None:
+        return count_tokens(message.content)
+    return count_tokens(message.content, model) + tokenizer_for(model).per_message
+
+
+def count_message_tokens(messages: List[BaseMessage], model: str | None = None) -> int:
     """Count tokens across a list of messages."""
-    return sum(count_tokens(m.content) for m in messages)
+    return sum(_message_tokens(m, model) for m in messages)
+
+
+def trim_messages_with_delta(
+    messages: List[BaseMessage], max_tokens: int = 8192, model: str | None = None
+) -> Tuple[List[BaseMessage], int]:
+    """Drop the oldest messages until the rest fit in ``max_tokens``.
+
+    Returns the kept messages and the number of tokens removed. Each message
+    is counted once; the cut point is found by binary search over prefix
+    sums instead of popping from the front of the list.
+    """
+    counts = [_message_tokens(m, model) for m in messages]
+    prefix = [0, *accumulate(counts)]
+    total = prefix[-1]
+    if total <= max_tokens:
+        return list(messages), 0
+    start = bisect_left(prefix, total - max_tokens)
+    return list(messages[start:]), prefix[start]
 
 
-def trim_messages(messages: List[BaseMessage], max_tokens: int = 8192) -> List[BaseMessage]:
+def trim_messages(
+    messages: List[BaseMessage], max_tokens: int = 8192, model: str | None = None
+) -> List[BaseMessage]:
     """Trim oldest messages until total token count fits within limit."""
-    total = count_message_tokens(messages)
-    trimmed = list(messages)
-    while trimmed and total > max_tokens:
-        msg = trimmed.pop(0)
-        total -= count_tokens(msg.content)
-    return trimmed
+    return trim_messages_with_delta(messages, max_tokens, model)[0]